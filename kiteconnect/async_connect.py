@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""
+    async_connect.py
+
+    asyncio client for the Kite Connect HTTP API.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import asyncio
+import hashlib
+import datetime
+import logging
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+import dateutil.parser
+
+from . import batch
+from .connect import KiteConnect
+from .ratelimit import RateLimiter, TokenBucket
+from .retry import RetryPolicy
+
+log = logging.getLogger(__name__)
+
+
+class AsyncKiteConnect(KiteConnect):
+    """
+    asyncio client for the Kite Connect API.
+
+    Has the same methods and constants as `KiteConnect`, which return coroutines. Routes, request building
+    and response parsing, including errors raised as Kite exceptions, are shared with `KiteConnect`.
+    Requires the `httpx` package.
+
+    Requests go through a single `httpx.AsyncClient`, which keeps connections alive between requests and
+    uses HTTP/2 when the `h2` package is installed, so concurrent requests share one connection. Calls made
+    concurrently take about one round trip per `max_concurrency` calls instead of one per call.
+
+        #!python
+        import asyncio
+        from kiteconnect import AsyncKiteConnect
+
+        async def main():
+            async with AsyncKiteConnect("your_api_key", access_token="your_access_token") as kite:
+                triggers = await asyncio.gather(*[
+                    kite.place_gtt(**gtt) for gtt in gtts
+                ], return_exceptions=True)
+
+        asyncio.run(main())
+
+    Call `close` or use the client as an async context manager to close its connections.
+    """
+
+    # Default maximum number of requests in flight
+    MAX_CONCURRENCY = 20
+
+    def __init__(self,
+                 api_key,
+                 access_token=None,
+                 root=None,
+                 debug=False,
+                 timeout=None,
+                 proxies=None,
+                 pool=None,
+                 disable_ssl=False,
+                 rate_limiter=None,
+                 retry_policy=None,
+                 http2=True,
+                 max_concurrency=MAX_CONCURRENCY,
+                 client=None):
+        """
+        Initialise a new asyncio Kite Connect client instance.
+
+        Parameters are the same as `KiteConnect`'s, with
+
+        - `proxies` is the proxy url passed to `httpx.AsyncClient`.
+        - `pool` is a dict of params accepted by `httpx.Limits`, like `max_connections` and `max_keepalive_connections`.
+        - `http2` uses HTTP/2 if the `h2` package is installed.
+        - `max_concurrency` is the maximum number of requests in flight, further requests wait for one to complete.
+        - `client` is an `httpx.AsyncClient` to send requests with instead of creating one.
+        """
+        if httpx is None and client is None:
+            raise ImportError("httpx is required for `AsyncKiteConnect`. Install it with `pip install httpx`.")
+
+        self.debug = debug
+        self.api_key = api_key
+        self.session_expiry_hook = None
+        self.disable_ssl = disable_ssl
+        self.access_token = access_token
+        self.proxies = proxies
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        # The quote cache waits on threads, it isn't used from the event loop.
+        self.quote_cache = None
+        # Spaces the requests of batches when there is no `rate_limiter`, shared by all batches of the client
+        self._quote_bucket = TokenBucket(*RateLimiter.LIMITS["market.quote*"])
+
+        self.root = root or self._default_root_uri
+        self.timeout = timeout or self._default_timeout
+        self.http2 = http2 and _HTTP2
+        self.max_concurrency = max_concurrency
+
+        self._own_client = client is None
+        if client is None:
+            kwargs = {
+                "http2": self.http2,
+                "verify": not disable_ssl,
+                "timeout": self.timeout,
+                "follow_redirects": True,
+                "limits": httpx.Limits(**(pool or {"max_connections": max_concurrency}))
+            }
+            if proxies:
+                kwargs["proxy"] = proxies
+            client = httpx.AsyncClient(**kwargs)
+
+        self.client = client
+        self._semaphore = None
+
+    async def close(self):
+        """Close connections of the client."""
+        if self._own_client:
+            await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # Methods below process the response data. The rest of `KiteConnect`'s methods return what `_request`
+    # returns as is, the coroutine here, so they are inherited.
+
+    async def generate_session(self, request_token, api_secret):
+        """
+        Generate user session details like `access_token` etc by exchanging `request_token`.
+        Access token is automatically set if the session is retrieved successfully.
+
+        - `request_token` is the token obtained from the GET paramers after a successful login redirect.
+        - `api_secret` is the API api_secret issued with the API key.
+        """
+        h = hashlib.sha256(self.api_key.encode("utf-8") + request_token.encode("utf-8") + api_secret.encode("utf-8"))
+        checksum = h.hexdigest()
+
+        resp = await self._post("api.token", params={
+            "api_key": self.api_key,
+            "request_token": request_token,
+            "checksum": checksum
+        })
+
+        if "access_token" in resp:
+            self.set_access_token(resp["access_token"])
+
+        if resp["login_time"] and len(resp["login_time"]) == 19:
+            resp["login_time"] = dateutil.parser.parse(resp["login_time"])
+
+        return resp
+
+    async def renew_access_token(self, refresh_token, api_secret):
+        """
+        Renew expired `refresh_token` using valid `refresh_token`.
+
+        - `refresh_token` is the token obtained from previous successful login flow.
+        - `api_secret` is the API api_secret issued with the API key.
+        """
+        h = hashlib.sha256(self.api_key.encode("utf-8") + refresh_token.encode("utf-8") + api_secret.encode("utf-8"))
+        checksum = h.hexdigest()
+
+        resp = await self._post("api.token.renew", params={
+            "api_key": self.api_key,
+            "refresh_token": refresh_token,
+            "checksum": checksum
+        })
+
+        if "access_token" in resp:
+            self.set_access_token(resp["access_token"])
+
+        return resp
+
+    async def place_order(self,
+                          variety,
+                          exchange,
+                          tradingsymbol,
+                          transaction_type,
+                          quantity,
+                          product,
+                          order_type,
+                          price=None,
+                          validity=None,
+                          validity_ttl=None,
+                          disclosed_quantity=None,
+                          trigger_price=None,
+                          iceberg_legs=None,
+                          iceberg_quantity=None,
+                          auction_number=None,
+                          tag=None):
+        """Place an order."""
+        params = locals()
+        del (params["self"])
+
+        return (await self._post("order.place",
+                                 url_args={"variety": variety},
+                                 params=params))["order_id"]
+
+    async def modify_order(self,
+                           variety,
+                           order_id,
+                           parent_order_id=None,
+                           quantity=None,
+                           price=None,
+                           order_type=None,
+                           trigger_price=None,
+                           validity=None,
+                           disclosed_quantity=None):
+        """Modify an open order."""
+        params = locals()
+        del (params["self"])
+
+        return (await self._put("order.modify",
+                                url_args={"variety": variety, "order_id": order_id},
+                                params=params))["order_id"]
+
+    async def exit_order(self, variety, order_id, parent_order_id=None):
+        """Exit a CO order."""
+        return await self.cancel_order(variety, order_id, parent_order_id=parent_order_id)
+
+    async def cancel_order(self, variety, order_id, parent_order_id=None):
+        """Cancel an order."""
+        return (await self._delete("order.cancel",
+                                   url_args={"variety": variety, "order_id": order_id},
+                                   params={"parent_order_id": parent_order_id}))["order_id"]
+
+    async def orders(self):
+        """Get list of orders."""
+        return self._format_response(await self._get("orders"))
+
+    async def order_history(self, order_id):
+        """
+        Get history of individual order.
+
+        - `order_id` is the ID of the order to retrieve order history.
+        """
+        return self._format_response(await self._get("order.info", url_args={"order_id": order_id}))
+
+    async def trades(self):
+        """Retrieve the list of trades executed (all or ones under a particular order)."""
+        return self._format_response(await self._get("trades"))
+
+    async def order_trades(self, order_id):
+        """
+        Retrieve the list of trades executed for a particular order.
+
+        - `order_id` is the ID of the order to retrieve trade history.
+        """
+        return self._format_response(await self._get("order.trades", url_args={"order_id": order_id}))
+
+    async def mf_orders(self, order_id=None):
+        """Get all mutual fund orders or individual order info."""
+        if order_id:
+            return self._format_response(await self._get("mf.order.info", url_args={"order_id": order_id}))
+        else:
+            return self._format_response(await self._get("mf.orders"))
+
+    async def mf_sips(self, sip_id=None):
+        """Get list of all mutual fund SIP's or individual SIP info."""
+        if sip_id:
+            return self._format_response(await self._get("mf.sip.info", url_args={"sip_id": sip_id}))
+        else:
+            return self._format_response(await self._get("mf.sips"))
+
+    async def mf_instruments(self):
+        """Get list of mutual fund instruments."""
+        return self._parse_mf_instruments(await self._get("mf.instruments"))
+
+    async def instruments(self, exchange=None):
+        """
+        Retrieve the list of market instruments available to trade.
+
+        - `exchange` is specific exchange to fetch (Optional)
+        """
+        if exchange:
+            return self._parse_instruments(await self._get("market.instruments", url_args={"exchange": exchange}))
+        else:
+            return self._parse_instruments(await self._get("market.instruments.all"))
+
+    async def quote(self, *instruments):
+        """
+        Retrieve quote for list of instruments.
+
+        - `instruments` is a list of instruments, Instrument are in the format of `exchange:tradingsymbol`. For example NSE:INFY
+        """
+        ins = list(instruments)
+
+        # If first element is a list then accept it as instruments list for legacy reason
+        if len(instruments) > 0 and type(instruments[0]) == list:
+            ins = instruments[0]
+
+        data = await self._get("market.quote", params={"i": ins})
+        return {key: self._format_response(data[key]) for key in data}
+
+    async def _fetch_batch(self, route, instruments, workers=None):
+        """Make the requests of a batch concurrently and merge their results."""
+        chunks = batch.split(instruments, self._batch_sizes[route])
+        result = batch.BatchResult()
+
+        # Requests in flight are already limited by `max_concurrency`. A single request isn't spaced, like a plain call.
+        bucket = self._batch_bucket() if len(chunks) > 1 else None
+        responses = await asyncio.gather(*[self._fetch_chunk(route, chunk, bucket) for chunk in chunks],
+                                         return_exceptions=True)
+        for chunk, data in zip(chunks, responses):
+            if isinstance(data, Exception):
+                result.add(chunk, error=data)
+            elif isinstance(data, BaseException):
+                raise data
+            else:
+                result.add(chunk, data)
+
+        return result
+
+    async def _fetch_chunk(self, route, chunk, bucket=None):
+        if bucket is not None:
+            delay = bucket.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+        return self._format_chunk(route, await self._get(route, params={"i": chunk}))
+
+    async def historical_data(self, instrument_token, from_date, to_date, interval, continuous=False, oi=False):
+        """
+        Retrieve historical data (candles) for an instrument.
+
+        Parameters are the same as `KiteConnect.historical_data`'s.
+        """
+        date_string_format = "%Y-%m-%d %H:%M:%S"
+        from_date_string = from_date.strftime(date_string_format) if type(from_date) == datetime.datetime else from_date
+        to_date_string = to_date.strftime(date_string_format) if type(to_date) == datetime.datetime else to_date
+
+        data = await self._get("market.historical",
+                               url_args={"instrument_token": instrument_token, "interval": interval},
+                               params={
+                                   "from": from_date_string,
+                                   "to": to_date_string,
+                                   "interval": interval,
+                                   "continuous": 1 if continuous else 0,
+                                   "oi": 1 if oi else 0
+                               })
+
+        return self._format_historical(data)
+
+    async def _request(self, route, method, url_args=None, params=None, is_json=False, query_params=None):
+        """Make an HTTP request."""
+        url, headers, json_body, data, query_params = self._prepare_request(
+            route, method, url_args=url_args, params=params, is_json=is_json, query_params=query_params)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter:
+                delay = self.rate_limiter.reserve(route)
+                if delay:
+                    await asyncio.sleep(delay)
+
+            r = None
+            error = None
+            try:
+                async with self._semaphore:
+                    r = await self.client.request(method,
+                                                  url,
+                                                  json=json_body,
+                                                  data=_without_none(data),
+                                                  params=_without_none(query_params),
+                                                  headers=headers)
+            except Exception as e:
+                error = e
+                retry = self._retry(route, method, attempt, params)
+                if retry is None:
+                    raise
+
+            if r is not None:
+                retry = self._retry(route, method, attempt, params, r)
+                if retry is None:
+                    return self._parse_response(r)
+
+            decision, delay = retry
+            await asyncio.sleep(delay)
+
+            if decision == RetryPolicy.REQUERY:
+                try:
+                    order = await self._find_placed_order(params)
+                except Exception:
+                    # The placement's failure matters, not the lookup's
+                    log.exception("Couldn't look up order placed with tag {}.".format(params["tag"]))
+                    if error is not None:
+                        raise error
+                    return self._parse_response(r)
+
+                if order:
+                    self.retry_policy.recovered(route)
+                    return {"order_id": order["order_id"]}
+
+    async def _find_placed_order(self, params):
+        """
+        Order placed with `params`, looked up by tag a few times as a placement which timed out may still be in
+        progress. None if it isn't found.
+        """
+        for lookup in range(self.retry_policy.requery_attempts):
+            if lookup:
+                await asyncio.sleep(self.retry_policy.delay(lookup))
+
+            order = self.retry_policy.find_order(await self._get("orders"), params)
+            if order:
+                return order
+
+        return None
+
+
+def _without_none(params):
+    """Params without None values, which `requests` leaves out and `httpx` sends empty."""
+    if not isinstance(params, dict):
+        return params
+    return dict((k, v) for k, v in params.items() if v is not None)
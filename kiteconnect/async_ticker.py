@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+    async_ticker.py
+
+    asyncio websocket implementation for kite ticker
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import json
+import asyncio
+import inspect
+import logging
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+from .__version__ import __version__, __title__
+from .ticker import KiteTicker, _parse_binary
+from .orders import OrderStateCache, parse_text_message
+from .reconnect import ReconnectPolicy
+from .subscription import SubscriptionBatcher
+
+log = logging.getLogger(__name__)
+
+# Put in the ticks queue once the ticker is closed for good.
+_CLOSED = object()
+
+
+class AsyncKiteTicker(object):
+    """
+    asyncio client for Kite Connect's streaming quotes service.
+
+    Works like `KiteTicker` without Twisted, so any number of tickers can be started and stopped in a
+    process. Frames are decoded with the same decoder and ticks are read by iterating over the ticker.
+    Requires the `websockets` package.
+
+        #!python
+        import asyncio
+        from kiteconnect import AsyncKiteTicker
+
+        async def main():
+            async with AsyncKiteTicker("your_api_key", "your_access_token") as kws:
+                await kws.subscribe([738561, 5633])
+                await kws.set_mode(kws.MODE_FULL, [738561])
+
+                async for ticks in kws:
+                    print(ticks)
+
+        asyncio.run(main())
+
+    Decoded frames wait in a queue of at most `max_queue` frames. When the consumer falls behind, the
+    ticker stops reading from the socket until there is room, so backpressure reaches the server instead
+    of buffering without bound.
+
+    Reconnection, its limits and resubscription of `subscribed_tokens` on reconnect work the same as in
+    `KiteTicker`. Iteration ends when the ticker is closed or stops reconnecting.
+
+    Callbacks
+    ---------
+    - `on_order_update(ws, data)` -  Triggered when there is an order update for the connected user.
+    - `on_error(ws, code, reason)` -  Triggered when the server sends an error or the connection fails.
+    - `on_reconnect(ws, attempts_count)` -  Triggered when auto reconnection is attempted.
+    - `on_noreconnect(ws)` -  Triggered when number of auto reconnection attempts exceeds `reconnect_tries`.
+    """
+
+    MODE_FULL = KiteTicker.MODE_FULL
+    MODE_QUOTE = KiteTicker.MODE_QUOTE
+    MODE_LTP = KiteTicker.MODE_LTP
+
+    TICK_FORMAT_DICT = KiteTicker.TICK_FORMAT_DICT
+    TICK_FORMAT_OBJECT = KiteTicker.TICK_FORMAT_OBJECT
+
+    # Default maximum number of decoded frames waiting to be read
+    MAX_QUEUE = 1024
+
+    def __init__(self, api_key, access_token, debug=False, root=None,
+                 reconnect=True, reconnect_max_tries=KiteTicker.RECONNECT_MAX_TRIES,
+                 reconnect_max_delay=KiteTicker.RECONNECT_MAX_DELAY, connect_timeout=KiteTicker.CONNECT_TIMEOUT,
+                 tick_format=KiteTicker.TICK_FORMAT_DICT, lazy_depth=False, max_queue=MAX_QUEUE,
+                 subscribe_chunk_size=SubscriptionBatcher.CHUNK_SIZE, reconnect_policy=None):
+        """
+        Initialise websocket client instance.
+
+        Parameters are the same as `KiteTicker`'s, with
+
+        - `max_queue` is the maximum number of decoded frames waiting to be read before reading from the socket pauses.
+        """
+        self.root = root or KiteTicker.ROOT_URI
+        self.debug = debug
+        self.reconnect = reconnect
+
+        # Same limits as `KiteTicker`
+        if reconnect_max_tries > KiteTicker._maximum_reconnect_max_tries:
+            log.warning("`reconnect_max_tries` can not be more than {val}. Setting to highest possible value - {val}.".format(
+                val=KiteTicker._maximum_reconnect_max_tries))
+            reconnect_max_tries = KiteTicker._maximum_reconnect_max_tries
+
+        if reconnect_max_delay < KiteTicker._minimum_reconnect_max_delay:
+            log.warning("`reconnect_max_delay` can not be less than {val}. Setting to lowest possible value - {val}.".format(
+                val=KiteTicker._minimum_reconnect_max_delay))
+            reconnect_max_delay = KiteTicker._minimum_reconnect_max_delay
+
+        if tick_format not in (self.TICK_FORMAT_DICT, self.TICK_FORMAT_OBJECT):
+            raise ValueError("Invalid `tick_format`: {}. Use `dict` or `object`.".format(tick_format))
+
+        self.reconnect_max_tries = reconnect_max_tries
+        self.reconnect_max_delay = reconnect_max_delay
+        self.reconnect_policy = reconnect_policy or ReconnectPolicy(max_delay=reconnect_max_delay)
+        self.connect_timeout = connect_timeout
+        self.tick_format = tick_format
+        self.lazy_depth = lazy_depth
+        self.max_queue = max_queue
+
+        self.socket_url = "{root}?api_key={api_key}"\
+            "&access_token={access_token}".format(
+                root=self.root,
+                api_key=api_key,
+                access_token=access_token
+            )
+
+        # Placeholders for callbacks.
+        self.on_order_update = None
+        self.on_error = None
+        self.on_reconnect = None
+        self.on_noreconnect = None
+
+        # Latest state of orders from order updates
+        self.order_states = OrderStateCache()
+
+        # List of current subscribed tokens
+        self.subscribed_tokens = {}
+        self._subscriptions = SubscriptionBatcher(chunk_size=subscribe_chunk_size)
+
+        self.ws = None
+        self._queue = None
+        self._task = None
+        self._closing = False
+        self._closed = None
+
+    async def connect(self):
+        """
+        Connect and start receiving ticks in the background.
+
+        Returns once connected. Raises the connection error if it can't connect within the reconnect attempts.
+        """
+        if websockets is None:
+            raise ImportError("websockets is required for `AsyncKiteTicker`. Install it with `pip install websockets`.")
+
+        loop = asyncio.get_event_loop()
+        self._closing = False
+        self._closed = asyncio.Event()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        opened = loop.create_future()
+        self._task = asyncio.ensure_future(self._run(opened))
+
+        await opened
+
+    def is_connected(self):
+        """Check if WebSocket connection is established."""
+        return self.ws is not None
+
+    async def close(self):
+        """Close the connection and stop reconnecting. Pending iteration ends."""
+        self._closing = True
+        if self._closed is not None:
+            self._closed.set()
+
+        if self.ws is not None:
+            await self.ws.close()
+
+        if self._task is not None:
+            await self._task
+
+    async def subscribe(self, instrument_tokens):
+        """
+        Subscribe to a list of instrument_tokens.
+
+        Tokens which are already subscribed keep their mode and aren't sent again.
+        Tokens subscribed before connecting are sent once connected.
+
+        - `instrument_tokens` is list of instrument instrument_tokens to subscribe
+        """
+        for token in instrument_tokens:
+            self.subscribed_tokens.setdefault(token, self.MODE_QUOTE)
+
+        self._subscriptions.changed(instrument_tokens)
+        await self._send_subscriptions()
+        return True
+
+    async def unsubscribe(self, instrument_tokens):
+        """
+        Unsubscribe the given list of instrument_tokens.
+
+        - `instrument_tokens` is list of instrument_tokens to unsubscribe.
+        """
+        for token in instrument_tokens:
+            self.subscribed_tokens.pop(token, None)
+
+        self._subscriptions.changed(instrument_tokens)
+        await self._send_subscriptions()
+        return True
+
+    async def set_mode(self, mode, instrument_tokens):
+        """
+        Set streaming mode for the given list of tokens.
+
+        - `mode` is the mode to set. It can be one of the following class constants:
+            MODE_LTP, MODE_QUOTE, or MODE_FULL.
+        - `instrument_tokens` is list of instrument tokens on which the mode should be applied
+        """
+        for token in instrument_tokens:
+            self.subscribed_tokens[token] = mode
+
+        self._subscriptions.changed(instrument_tokens)
+        await self._send_subscriptions()
+        return True
+
+    async def resubscribe(self):
+        """Resubscribe to all current subscribed tokens."""
+        if self.debug:
+            log.debug("Resubscribe {} tokens.".format(len(self.subscribed_tokens)))
+
+        self._subscriptions.reset(self.subscribed_tokens)
+        await self._send_subscriptions()
+
+    def get_order_state(self, order_id):
+        """
+        Latest state of an order merged from its order updates, None if no update of it was received.
+
+        - `order_id` is the ID of the order.
+        """
+        return self.order_states.get(order_id)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._queue is None:
+            raise StopAsyncIteration
+
+        ticks = await self._queue.get()
+        if ticks is _CLOSED:
+            # Let other consumers see the end as well
+            self._queue.put_nowait(_CLOSED)
+            raise StopAsyncIteration
+
+        return ticks
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _send_subscriptions(self):
+        # Changes stay pending and are sent on connect
+        if self.ws is None:
+            return
+
+        for action, value in self._subscriptions.messages(self.subscribed_tokens):
+            await self.ws.send(json.dumps({"a": action, "v": value}))
+
+    async def _open(self):
+        headers = {"X-Kite-Version": "3"}
+        user_agent = (__title__ + "-python/").capitalize() + __version__
+        kwargs = {"open_timeout": self.connect_timeout}
+
+        # websockets 14 replaced `extra_headers` with `additional_headers`
+        if "additional_headers" in inspect.signature(websockets.connect).parameters:
+            kwargs["additional_headers"] = headers
+        else:
+            kwargs["extra_headers"] = headers
+
+        return await websockets.connect(self.socket_url, user_agent_header=user_agent, **kwargs)
+
+    async def _run(self, opened):
+        retries = 0
+        error = None
+
+        while not self._closing:
+            try:
+                self.ws = await self._open()
+            except Exception as e:
+                error = e
+                log.error("Connection error: {}".format(e))
+                self._callback(self.on_error, self, 0, str(e))
+            else:
+                retries = 0
+                self.reconnect_policy.reset()
+
+                if not opened.done():
+                    opened.set_result(None)
+
+                try:
+                    # Tokens subscribed before connecting or before the connection dropped
+                    await self.resubscribe()
+
+                    async for message in self.ws:
+                        await self._on_message(message)
+                except (websockets.ConnectionClosed, OSError) as e:
+                    error = e
+                    log.error("Connection closed: {}".format(e))
+                except Exception as e:
+                    # Drop the connection rather than stop the ticker
+                    error = e
+                    log.exception("Error while reading from the connection.")
+                    await self.ws.close()
+                finally:
+                    self.ws = None
+
+            if self._closing or not self.reconnect:
+                break
+
+            retries += 1
+            if retries > self.reconnect_max_tries:
+                if self.debug:
+                    log.debug("Maximum retries ({}) exhausted.".format(self.reconnect_max_tries))
+                self._callback(self.on_noreconnect, self)
+                break
+
+            wait = self.reconnect_policy.next_delay()
+            log.error("Retrying connection. Retry attempt count: {}. Next retry in around: {} seconds".format(
+                retries, int(round(wait))))
+            self._callback(self.on_reconnect, self, retries)
+
+            # `close` ends the wait early
+            try:
+                await asyncio.wait_for(self._closed.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+        if not opened.done():
+            opened.set_exception(error or ConnectionError("Connection closed."))
+
+        # End iteration. Frames left in the queue aren't read once closed, else drop the oldest if the queue is full.
+        while self._queue.full() or (self._closing and not self._queue.empty()):
+            self._queue.get_nowait()
+        self._queue.put_nowait(_CLOSED)
+
+    async def _on_message(self, message):
+        if isinstance(message, bytes):
+            # Frames received while closing are dropped so that the closing handshake can be read.
+            if len(message) > 4 and not self._closing:
+                ticks = _parse_binary(message, self.tick_format, self.lazy_depth)
+                if not self._queue.full():
+                    self._queue.put_nowait(ticks)
+                else:
+                    await self._put_or_close(ticks)
+        else:
+            self._parse_text_message(message)
+
+    async def _put_or_close(self, ticks):
+        """Wait for room in the queue, which pauses reading from the socket. Gives up once the ticker is closed."""
+        put = asyncio.ensure_future(self._queue.put(ticks))
+        closed = asyncio.ensure_future(self._closed.wait())
+        try:
+            await asyncio.wait([put, closed], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            put.cancel()
+            closed.cancel()
+
+    def _callback(self, callback, *args):
+        """Call a user callback, logging the exceptions it raises."""
+        if callback is None:
+            return
+
+        try:
+            callback(*args)
+        except Exception:
+            log.exception("Error in callback {}.".format(getattr(callback, "__name__", callback)))
+
+    def _parse_text_message(self, payload):
+        """Parse text message."""
+        # Only order updates and errors are parsed
+        data = parse_text_message(payload)
+        if data is None:
+            return
+
+        # Order update callback
+        if data.get("type") == "order" and data.get("data"):
+            self.order_states.update(data["data"])
+
+            self._callback(self.on_order_update, self, data["data"])
+
+        # Custom error with websocket error code 0
+        if data.get("type") == "error":
+            self._callback(self.on_error, self, 0, data.get("data"))
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+    batch.py
+
+    Splitting instrument lists into requests and merging their results.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+
+
+class BatchResult(dict):
+    """
+    Merged data of the requests of a batch, keyed by instrument like the data of a single request.
+
+    `errors` is a dict of the exception raised by the request of every instrument whose request failed. Instruments
+    which the API returned no data for, like unknown ones, are in neither.
+    """
+
+    def __init__(self):
+        super(BatchResult, self).__init__()
+        self.errors = {}
+
+    def add(self, chunk, data=None, error=None):
+        """Add the data of the request for the instruments in `chunk`, or the exception it raised."""
+        if error is not None:
+            for instrument in chunk:
+                self.errors[instrument] = error
+        else:
+            self.update(data)
+
+
+def split(instruments, size):
+    """List of lists of at most `size` instruments, with duplicates dropped."""
+    seen = set()
+    unique = []
+    for instrument in instruments:
+        if instrument not in seen:
+            seen.add(instrument)
+            unique.append(instrument)
+
+    return [unique[i:i + size] for i in range(0, len(unique), size)]
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+    candles.py
+
+    Build OHLCV candles from ticks as they are received.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import time
+import logging
+import threading
+from array import array
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+# Fields of a bar in the bar arrays: the forming bar followed by the last closed bar.
+_START, _OPEN, _HIGH, _LOW, _CLOSE, _VOLUME = range(6)
+_FIELDS = 6
+_CLOSED = _FIELDS
+_SLOT_SIZE = 2 * _FIELDS
+
+
+class CandleBuilder(object):
+    """
+    Keep forming and last closed OHLCV candles of every instrument for a set of intervals, updated with every tick.
+
+    Bars are kept in arrays allocated for `max_instruments` instruments up front, so updating them with a tick
+    doesn't allocate. A bar is closed when the first tick of a later bar arrives, or by `close_due` when no tick
+    arrives, and passed to `on_candle(instrument_token, interval, candle)`. Candles are dicts with the same keys
+    as `KiteConnect.historical_data` candles.
+
+    Bars start at multiples of the interval from the session open, 09:15 IST by default, so a 60 minute bar covers
+    09:15 to 10:15 like the historical data candles do. Ticks are placed by `exchange_timestamp`, or by the time
+    they're received for modes without it. Volume is the difference of the cumulative `volume_traded` between ticks,
+    so it needs quote or full mode.
+
+    `update` is called on the thread ticks are received on, while `close_due` and reading candles can be done from
+    any thread.
+
+        #!python
+        kws.candles = CandleBuilder(on_candle=on_candle)
+
+        # Latest closed 5 minute candle
+        kws.candles.last_closed(738561, "5minute")
+    """
+
+    # Default intervals
+    INTERVALS = ("minute", "3minute", "5minute", "15minute")
+    # Default maximum number of instruments
+    MAX_INSTRUMENTS = 4096
+    # Default session open in IST
+    SESSION_OPEN = "09:15"
+    # IST offset from UTC in seconds
+    _IST_OFFSET = 19800
+
+    # Length of supported intervals in seconds
+    _INTERVAL_SECONDS = {
+        "minute": 60,
+        "2minute": 120,
+        "3minute": 180,
+        "4minute": 240,
+        "5minute": 300,
+        "10minute": 600,
+        "15minute": 900,
+        "30minute": 1800,
+        "60minute": 3600
+    }
+
+    def __init__(self, intervals=INTERVALS, on_candle=None, max_instruments=MAX_INSTRUMENTS, session_open=SESSION_OPEN):
+        """
+        Initialise builder.
+
+        - `intervals` is the list of candle intervals, named like `KiteConnect.historical_data` intervals (`minute`, `5minute` etc.).
+        - `on_candle` is called with the instrument token, interval and candle dict of every closed bar.
+        - `max_instruments` is the number of instruments for which bars are allocated. Ticks of further instruments are ignored.
+        - `session_open` is the `HH:MM` time in IST which bars are aligned to, like `09:00` for MCX.
+        """
+        for interval in intervals:
+            if interval not in self._INTERVAL_SECONDS:
+                raise ValueError("Invalid interval: {}. Use one of {}.".format(
+                    interval, ", ".join(sorted(self._INTERVAL_SECONDS, key=self._INTERVAL_SECONDS.get))))
+
+        self.intervals = tuple(intervals)
+        self.on_candle = on_candle
+        self.max_instruments = max_instruments
+
+        # Epoch time of the session open on 1970-01-01, bars start at multiples of the interval from it.
+        hours, minutes = session_open.split(":")
+        self._anchor = (int(hours) * 3600 + int(minutes) * 60 - self._IST_OFFSET) % 86400
+        # Reentrant as `on_candle` is called with it held and may read candles
+        self._lock = threading.RLock()
+
+        self._seconds = [self._INTERVAL_SECONDS[interval] for interval in self.intervals]
+        self._bars = [array("d", [0.0]) * (max_instruments * _SLOT_SIZE) for interval in self.intervals]
+        # Last cumulative volume of each instrument
+        self._volumes = array("d", [-1.0]) * max_instruments
+        self._slots = {}
+
+        # Last exchange timestamp and its epoch time
+        self._timestamp = (None, 0)
+
+        # Counters
+        self.ticks_ignored = 0
+
+    def update(self, ticks):
+        """Add ticks to the bars of their instruments, closing bars of earlier periods."""
+        with self._lock:
+            self._update(ticks)
+
+    def _update(self, ticks):
+        for tick in ticks:
+            token = tick["instrument_token"]
+            slot = self._slots.get(token)
+            if slot is None:
+                slot = self._add_slot(token)
+                if slot is None:
+                    continue
+
+            price = tick["last_price"]
+            timestamp = self._tick_time(tick)
+
+            # Volume traded since the previous tick
+            volume = 0
+            cumulative = tick.get("volume_traded")
+            if cumulative is not None:
+                last = self._volumes[slot]
+                # Cumulative volume restarts with a new session
+                if last >= 0:
+                    volume = cumulative - last if cumulative >= last else cumulative
+                self._volumes[slot] = cumulative
+
+            for i, seconds in enumerate(self._seconds):
+                bars = self._bars[i]
+                offset = slot * _SLOT_SIZE
+                start = timestamp - (timestamp - self._anchor) % seconds
+
+                if bars[offset + _START] != start:
+                    # Late tick of a closed bar, including one closed by `close_due`
+                    if bars[offset + _START] > start or start <= bars[offset + _CLOSED + _START]:
+                        continue
+
+                    if bars[offset + _START]:
+                        self._close(token, i, offset)
+
+                    bars[offset + _START] = start
+                    bars[offset + _OPEN] = price
+                    bars[offset + _HIGH] = price
+                    bars[offset + _LOW] = price
+                    bars[offset + _CLOSE] = price
+                    bars[offset + _VOLUME] = volume
+                else:
+                    if price > bars[offset + _HIGH]:
+                        bars[offset + _HIGH] = price
+                    if price < bars[offset + _LOW]:
+                        bars[offset + _LOW] = price
+                    bars[offset + _CLOSE] = price
+                    bars[offset + _VOLUME] += volume
+
+    def close_due(self, now=None):
+        """
+        Close bars whose period has ended without a tick of a later period. Call it periodically to get bars of
+        instruments which stopped ticking. Returns the number of bars closed.
+
+        - `now` is the current epoch time, defaults to `time.time()`.
+        """
+        now = time.time() if now is None else now
+        closed = 0
+
+        with self._lock:
+            for token, slot in list(self._slots.items()):
+                offset = slot * _SLOT_SIZE
+                for i, seconds in enumerate(self._seconds):
+                    bars = self._bars[i]
+                    if bars[offset + _START] and bars[offset + _START] + seconds <= now:
+                        self._close(token, i, offset)
+                        bars[offset + _START] = 0
+                        closed += 1
+
+        return closed
+
+    def current(self, instrument_token, interval):
+        """Forming candle of an instrument, None if there is none."""
+        with self._lock:
+            return self._candle(instrument_token, interval, 0)
+
+    def last_closed(self, instrument_token, interval):
+        """Last closed candle of an instrument, None if there is none."""
+        with self._lock:
+            return self._candle(instrument_token, interval, _CLOSED)
+
+    def _candle(self, instrument_token, interval, field_offset):
+        slot = self._slots.get(instrument_token)
+        if slot is None:
+            return None
+
+        bars = self._bars[self.intervals.index(interval)]
+        offset = slot * _SLOT_SIZE + field_offset
+        if not bars[offset + _START]:
+            return None
+
+        return {
+            "date": datetime.fromtimestamp(bars[offset + _START]),
+            "open": bars[offset + _OPEN],
+            "high": bars[offset + _HIGH],
+            "low": bars[offset + _LOW],
+            "close": bars[offset + _CLOSE],
+            "volume": int(bars[offset + _VOLUME])
+        }
+
+    def _close(self, token, index, offset):
+        bars = self._bars[index]
+        bars[offset + _CLOSED:offset + _SLOT_SIZE] = bars[offset:offset + _FIELDS]
+
+        if self.on_candle:
+            try:
+                self.on_candle(token, self.intervals[index], self._candle(token, self.intervals[index], _CLOSED))
+            except Exception:
+                log.exception("Error in candle callback.")
+
+    def _add_slot(self, token):
+        if len(self._slots) >= self.max_instruments:
+            self.ticks_ignored += 1
+            if self.ticks_ignored == 1:
+                log.warning("Candles are built for at most {} instruments, ignoring others.".format(self.max_instruments))
+            return None
+
+        slot = self._slots[token] = len(self._slots)
+        return slot
+
+    def _tick_time(self, tick):
+        exchange_timestamp = tick.get("exchange_timestamp")
+        if exchange_timestamp is None:
+            return time.time()
+
+        # Ticks of a frame mostly share the timestamp, convert it once.
+        cached, timestamp = self._timestamp
+        if exchange_timestamp != cached:
+            timestamp = time.mktime(exchange_timestamp.timetuple())
+            self._timestamp = (exchange_timestamp, timestamp)
+
+        return timestamp
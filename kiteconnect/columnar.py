@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+    columnar.py
+
+    Columnar (NumPy structured array) decoding of binary ticker frames.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import struct
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_UINT16 = struct.Struct(">H")
+
+# Segment constants used for price divisors and tradable flag.
+_SEGMENT_CDS = 3
+_SEGMENT_BCD = 6
+_SEGMENT_INDICES = 9
+
+if np is not None:
+    # Decoded tick row. Fields which are not part of a packet's mode are left as zero.
+    # Timestamps are epoch seconds and depth levels are ordered best first.
+    TICK_DTYPE = np.dtype([
+        ("instrument_token", "u4"),
+        ("mode", "S5"),
+        ("tradable", "?"),
+        ("last_price", "f8"),
+        ("last_traded_quantity", "u4"),
+        ("average_traded_price", "f8"),
+        ("volume_traded", "u4"),
+        ("total_buy_quantity", "u4"),
+        ("total_sell_quantity", "u4"),
+        ("open", "f8"),
+        ("high", "f8"),
+        ("low", "f8"),
+        ("close", "f8"),
+        ("change", "f8"),
+        ("last_trade_time", "i8"),
+        ("exchange_timestamp", "i8"),
+        ("oi", "u4"),
+        ("oi_day_high", "u4"),
+        ("oi_day_low", "u4"),
+        ("depth_buy_quantity", "u4", (5,)),
+        ("depth_buy_price", "f8", (5,)),
+        ("depth_buy_orders", "u2", (5,)),
+        ("depth_sell_quantity", "u4", (5,)),
+        ("depth_sell_price", "f8", (5,)),
+        ("depth_sell_orders", "u2", (5,)),
+    ])
+
+    _DEPTH_LEVEL = np.dtype([("quantity", ">u4"), ("price", ">u4"), ("orders", ">u2"), ("_", "V2")])
+
+    # Big-endian wire layouts of each packet length and the mode they represent.
+    _LAYOUTS = {
+        8: (b"ltp", np.dtype([
+            ("instrument_token", ">u4"), ("last_price", ">u4")
+        ])),
+        28: (b"quote", np.dtype([
+            ("instrument_token", ">u4"), ("last_price", ">u4"), ("high", ">u4"), ("low", ">u4"),
+            ("open", ">u4"), ("close", ">u4"), ("_change", ">u4")
+        ])),
+        32: (b"full", np.dtype([
+            ("instrument_token", ">u4"), ("last_price", ">u4"), ("high", ">u4"), ("low", ">u4"),
+            ("open", ">u4"), ("close", ">u4"), ("_change", ">u4"), ("exchange_timestamp", ">u4")
+        ])),
+        44: (b"quote", np.dtype([
+            ("instrument_token", ">u4"), ("last_price", ">u4"), ("last_traded_quantity", ">u4"),
+            ("average_traded_price", ">u4"), ("volume_traded", ">u4"), ("total_buy_quantity", ">u4"),
+            ("total_sell_quantity", ">u4"), ("open", ">u4"), ("high", ">u4"), ("low", ">u4"), ("close", ">u4")
+        ])),
+        184: (b"full", np.dtype([
+            ("instrument_token", ">u4"), ("last_price", ">u4"), ("last_traded_quantity", ">u4"),
+            ("average_traded_price", ">u4"), ("volume_traded", ">u4"), ("total_buy_quantity", ">u4"),
+            ("total_sell_quantity", ">u4"), ("open", ">u4"), ("high", ">u4"), ("low", ">u4"), ("close", ">u4"),
+            ("last_trade_time", ">u4"), ("oi", ">u4"), ("oi_day_high", ">u4"), ("oi_day_low", ">u4"),
+            ("exchange_timestamp", ">u4"), ("depth", _DEPTH_LEVEL, (10,))
+        ])),
+    }
+
+    # Same layouts prefixed with the 2 byte packet length, used when a frame only has packets of one length.
+    _PREFIXED_LAYOUTS = {
+        length: np.dtype([("_length", ">u2"), ("packet", layout)])
+        for length, (_, layout) in _LAYOUTS.items()
+    }
+
+    _PRICE_FIELDS = ("last_price", "average_traded_price", "open", "high", "low", "close")
+
+
+def parse_binary_array(bin):
+    """
+    Parse a binary ticker frame to a NumPy structured array of `TICK_DTYPE`, one row per packet.
+
+    Packets of the same length are decoded together in one vectorised pass, so no per tick
+    Python objects are created. Packets of unknown length are skipped.
+    """
+    if np is None:
+        raise ImportError("numpy is required for columnar tick decoding. Install it with `pip install numpy`.")
+
+    # Ignore heartbeat data.
+    if len(bin) < 2:
+        return np.zeros(0, dtype=TICK_DTYPE)
+
+    number_of_packets = _UINT16.unpack_from(bin, 0)[0]
+    if number_of_packets == 0:
+        return np.zeros(0, dtype=TICK_DTYPE)
+
+    first_length = _UINT16.unpack_from(bin, 2)[0]
+
+    # Fast path: all packets have the same length, decode the whole frame as a strided view. Packets of
+    # different lengths can add up to the same total, so the length of every packet is checked too.
+    if first_length in _LAYOUTS and len(bin) == 2 + number_of_packets * (first_length + 2):
+        records = np.frombuffer(bin, dtype=_PREFIXED_LAYOUTS[first_length], count=number_of_packets, offset=2)
+        if (records["_length"] == first_length).all():
+            out = np.zeros(number_of_packets, dtype=TICK_DTYPE)
+            _fill(out, slice(None), first_length, records["packet"])
+            return out
+
+    # Group packet offsets by length.
+    groups = {}
+    rows = 0
+    j = 2
+    for _ in range(number_of_packets):
+        # Stop at a truncated packet
+        if j + 2 > len(bin):
+            break
+
+        packet_length = _UINT16.unpack_from(bin, j)[0]
+        if j + 2 + packet_length > len(bin):
+            break
+
+        if packet_length in _LAYOUTS:
+            groups.setdefault(packet_length, ([], []))
+            groups[packet_length][0].append(rows)
+            groups[packet_length][1].append(j + 2)
+            rows += 1
+        j = j + 2 + packet_length
+
+    raw = np.frombuffer(bin, dtype=np.uint8)
+    out = np.zeros(rows, dtype=TICK_DTYPE)
+    for packet_length, (indexes, offsets) in groups.items():
+        # Gather all packets of this length into one contiguous block and view it with the packet layout.
+        block = raw[np.asarray(offsets)[:, None] + np.arange(packet_length)]
+        records = block.view(_LAYOUTS[packet_length][1]).reshape(-1)
+        _fill(out, np.asarray(indexes), packet_length, records)
+
+    return out
+
+
+def _fill(out, rows, packet_length, records):
+    """Copy decoded `records` of a packet layout to the given `rows` of `out` applying price divisors."""
+    mode, layout = _LAYOUTS[packet_length]
+
+    tokens = records["instrument_token"]
+    segments = tokens & 0xff
+
+    # Price divisor based on segment
+    divisor = np.full(len(records), 100.0)
+    divisor[segments == _SEGMENT_CDS] = 10000000.0
+    divisor[segments == _SEGMENT_BCD] = 10000.0
+
+    target = out[rows] if not isinstance(rows, slice) else out
+    target["instrument_token"] = tokens
+    target["mode"] = mode
+    target["tradable"] = segments != _SEGMENT_INDICES
+
+    for name in layout.names:
+        if name.startswith("_") or name in ("instrument_token", "depth"):
+            continue
+
+        if name in _PRICE_FIELDS:
+            target[name] = records[name] / divisor
+        else:
+            target[name] = records[name]
+
+    if "close" in layout.names:
+        close = target["close"]
+        nonzero = close != 0
+        target["change"][nonzero] = (target["last_price"][nonzero] - close[nonzero]) * 100 / close[nonzero]
+
+    if "depth" in layout.names:
+        depth = records["depth"]
+        target["depth_buy_quantity"] = depth["quantity"][:, :5]
+        target["depth_buy_price"] = depth["price"][:, :5] / divisor[:, None]
+        target["depth_buy_orders"] = depth["orders"][:, :5]
+        target["depth_sell_quantity"] = depth["quantity"][:, 5:]
+        target["depth_sell_price"] = depth["price"][:, 5:] / divisor[:, None]
+        target["depth_sell_orders"] = depth["orders"][:, 5:]
+
+    # Fancy indexing returns a copy, write it back to the output.
+    if not isinstance(rows, slice):
+        out[rows] = target
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+    conflation.py
+
+    Tick conflation for `on_ticks` handlers which are slower than the feed.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import time
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+
+class TickConflator(object):
+    """
+    Keep only the newest tick of each instrument and hand them to a handler in batches from a worker thread.
+
+    `push` is called from the thread which decodes ticks and only holds a lock for as long as it takes to
+    update the pending batch, so a slow handler never blocks it. The worker thread calls the handler with
+    the pending batch at most `max_rate` times a second. Ticks replaced by a newer tick of the same
+    instrument before they were handed over are counted as dropped.
+    """
+
+    # Default batches handed to the handler per second
+    MAX_RATE = 10
+    # Default maximum number of instruments in a pending batch
+    MAX_INSTRUMENTS = 10000
+
+    def __init__(self, handler, max_rate=MAX_RATE, max_instruments=MAX_INSTRUMENTS):
+        """
+        Initialise conflator.
+
+        - `handler` is called with a list of conflated ticks.
+        - `max_rate` is the maximum number of times a second the handler is called.
+        - `max_instruments` bounds the pending batch. Ticks of new instruments are dropped once it's full.
+        """
+        self.handler = handler
+        self.interval = 1.0 / max_rate
+        self.max_instruments = max_instruments
+
+        self._pending = {}
+        self._pending_since = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._running = False
+
+        # Counters
+        self.frames_received = 0
+        self.ticks_received = 0
+        self.ticks_dropped = 0
+        self.ticks_overflowed = 0
+        self.batches_delivered = 0
+        self.handler_lag = 0.0
+        self.max_handler_lag = 0.0
+
+    def start(self):
+        """Start the worker thread if it isn't running."""
+        self._running = True
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._thread = threading.Thread(target=self._run, name="kite-ticker-conflator")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the worker thread. Pending ticks are discarded."""
+        self._running = False
+        self._wakeup.set()
+
+    def push(self, ticks):
+        """Add ticks of a frame to the pending batch. Starts the worker thread on first use."""
+        if not self._running:
+            self.start()
+
+        with self._lock:
+            pending = self._pending
+            if not pending:
+                self._pending_since = time.monotonic()
+
+            self.frames_received += 1
+            self.ticks_received += len(ticks)
+
+            for tick in ticks:
+                token = tick["instrument_token"]
+                if token in pending:
+                    self.ticks_dropped += 1
+                elif len(pending) >= self.max_instruments:
+                    self.ticks_overflowed += 1
+                    continue
+
+                pending[token] = tick
+
+        self._wakeup.set()
+
+    def stats(self):
+        """Dict of conflation counters. `handler_lag` is in seconds."""
+        return {
+            "frames_received": self.frames_received,
+            "ticks_received": self.ticks_received,
+            "ticks_dropped": self.ticks_dropped,
+            "ticks_overflowed": self.ticks_overflowed,
+            "batches_delivered": self.batches_delivered,
+            "pending": len(self._pending),
+            "handler_lag": self.handler_lag,
+            "max_handler_lag": self.max_handler_lag
+        }
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            if not self._running:
+                return
+
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                pending_since = self._pending_since
+                self._wakeup.clear()
+
+            if not batch:
+                continue
+
+            started = time.monotonic()
+
+            # Time the oldest tick in the batch waited for the handler
+            self.handler_lag = started - pending_since
+            self.max_handler_lag = max(self.max_handler_lag, self.handler_lag)
+
+            try:
+                self.handler(list(batch.values()))
+            except Exception:
+                log.exception("Error in conflated ticks handler.")
+
+            self.batches_delivered += 1
+
+            # Limit the rate at which the handler is called
+            remaining = self.interval - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
@@ -15,11 +15,16 @@ import dateutil.parser
 import hashlib
 import logging
 import datetime
+import time
 import requests
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 
 from .__version__ import __version__, __title__
 import kiteconnect.exceptions as ex
+from . import batch
+from .retry import RetryPolicy
+from .ratelimit import RateLimiter, TokenBucket
 
 log = logging.getLogger(__name__)
 
@@ -104,6 +109,15 @@ class KiteConnect(object):
     GTT_STATUS_REJECTED = "rejected"
     GTT_STATUS_DELETED = "deleted"
 
+    # Maximum number of instruments in a request of batched quote calls
+    _batch_sizes = {
+        "market.quote": 500,
+        "market.quote.ohlc": 1000,
+        "market.quote.ltp": 1000
+    }
+    # Default number of requests of a batch made at once
+    _batch_workers = 4
+
     # URIs to various calls
     _routes = {
         "api.token": "/session/token",
@@ -173,7 +187,10 @@ class KiteConnect(object):
                  timeout=None,
                  proxies=None,
                  pool=None,
-                 disable_ssl=False):
+                 disable_ssl=False,
+                 rate_limiter=None,
+                 retry_policy=None,
+                 quote_cache=None):
         """
         Initialise a new Kite Connect client instance.
 
@@ -195,6 +212,11 @@ class KiteConnect(object):
         - `pool` is manages request pools. It takes a dict of params accepted by HTTPAdapter as described here in [python requests documentation](http://docs.python-requests.org/en/master/api/#requests.adapters.HTTPAdapter)
         - `disable_ssl` disables the SSL verification while making a request.
         If set requests won't throw SSLError if its set to custom `root` url without SSL.
+        - `rate_limiter` is a `RateLimiter` which requests wait on to stay within the API rate limits.
+        Share one between clients of the same `api_key`. Requests aren't limited by default.
+        - `retry_policy` is a `RetryPolicy` deciding which failed requests are retried. Requests aren't retried by default.
+        - `quote_cache` is a `QuoteCache` which `quote`, `ohlc` and `ltp` data is served from for a short time.
+        Concurrent calls for the same instruments share a request. Data isn't cached by default.
         """
         self.debug = debug
         self.api_key = api_key
@@ -202,6 +224,11 @@ class KiteConnect(object):
         self.disable_ssl = disable_ssl
         self.access_token = access_token
         self.proxies = proxies if proxies else {}
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.quote_cache = quote_cache
+        # Spaces the requests of batches when there is no `rate_limiter`, shared by all batches of the client
+        self._quote_bucket = TokenBucket(*RateLimiter.LIMITS["market.quote*"])
 
         self.root = root or self._default_root_uri
         self.timeout = timeout or self._default_timeout
@@ -579,6 +606,9 @@ class KiteConnect(object):
         if len(instruments) > 0 and type(instruments[0]) == list:
             ins = instruments[0]
 
+        if self.quote_cache:
+            return self.quote_cache.get("quote", ins, self._batch_fetcher("market.quote"))
+
         data = self._get("market.quote", params={"i": ins})
         return {key: self._format_response(data[key]) for key in data}
 
@@ -594,6 +624,9 @@ class KiteConnect(object):
         if len(instruments) > 0 and type(instruments[0]) == list:
             ins = instruments[0]
 
+        if self.quote_cache:
+            return self.quote_cache.get("ohlc", ins, self._batch_fetcher("market.quote.ohlc"))
+
         return self._get("market.quote.ohlc", params={"i": ins})
 
     def ltp(self, *instruments):
@@ -608,8 +641,91 @@ class KiteConnect(object):
         if len(instruments) > 0 and type(instruments[0]) == list:
             ins = instruments[0]
 
+        if self.quote_cache:
+            return self.quote_cache.get("ltp", ins, self._batch_fetcher("market.quote.ltp"))
+
         return self._get("market.quote.ltp", params={"i": ins})
 
+    def quote_batch(self, instruments, workers=None):
+        """
+        Retrieve quote for a list of instruments of any size.
+
+        The list is split into requests of at most 500 instruments, which are made concurrently. Returns the merged
+        data as a `BatchResult`, whose `errors` has the exception of every instrument whose request failed.
+
+        Without a `rate_limiter` the requests are still spaced to the quote rate limit of 1 request a second, so
+        they don't fail with HTTP 429.
+
+        - `instruments` is a list of instruments, Instrument are in the format of `exchange:tradingsymbol`. For example NSE:INFY
+        - `workers` is the number of requests made at once. Defaults to 4.
+        """
+        return self._fetch_batch("market.quote", instruments, workers)
+
+    def ohlc_batch(self, instruments, workers=None):
+        """
+        Retrieve OHLC for a list of instruments of any size, in requests of at most 1000 instruments.
+
+        Parameters and result are the same as `quote_batch`'s.
+        """
+        return self._fetch_batch("market.quote.ohlc", instruments, workers)
+
+    def ltp_batch(self, instruments, workers=None):
+        """
+        Retrieve last price for a list of instruments of any size, in requests of at most 1000 instruments.
+
+        Parameters and result are the same as `quote_batch`'s.
+        """
+        return self._fetch_batch("market.quote.ltp", instruments, workers)
+
+    def _fetch_batch(self, route, instruments, workers=None):
+        """Make the requests of a batch on a thread pool and merge their results."""
+        chunks = batch.split(instruments, self._batch_sizes[route])
+        result = batch.BatchResult()
+        if not chunks:
+            return result
+
+        # A single request isn't spaced, like a plain call
+        if len(chunks) == 1:
+            try:
+                result.add(chunks[0], self._fetch_chunk(route, chunks[0]))
+            except Exception as e:
+                result.add(chunks[0], error=e)
+            return result
+
+        workers = min(workers or self._batch_workers, len(chunks))
+        bucket = self._batch_bucket()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._fetch_chunk, route, chunk, bucket) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                try:
+                    result.add(chunk, future.result())
+                except Exception as e:
+                    result.add(chunk, error=e)
+
+        return result
+
+    def _batch_fetcher(self, route):
+        """Function fetching a batch of instruments for the quote cache."""
+        return lambda instruments: self._fetch_batch(route, instruments)
+
+    def _batch_bucket(self):
+        """Token bucket spacing the requests of batches to the quote rate limit, None if `rate_limiter` does it."""
+        if self.rate_limiter:
+            return None
+        return self._quote_bucket
+
+    def _fetch_chunk(self, route, chunk, bucket=None):
+        if bucket is not None:
+            delay = bucket.reserve()
+            if delay:
+                time.sleep(delay)
+        return self._format_chunk(route, self._get(route, params={"i": chunk}))
+
+    def _format_chunk(self, route, data):
+        if route == "market.quote":
+            return {key: self._format_response(data[key]) for key in data}
+        return data
+
     def historical_data(self, instrument_token, from_date, to_date, interval, continuous=False, oi=False):
         """
         Retrieve historical data (candles) for an instrument.
@@ -874,6 +990,96 @@ class KiteConnect(object):
 
     def _request(self, route, method, url_args=None, params=None, is_json=False, query_params=None):
         """Make an HTTP request."""
+        url, headers, json_body, data, query_params = self._prepare_request(
+            route, method, url_args=url_args, params=params, is_json=is_json, query_params=query_params)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter:
+                self.rate_limiter.wait(route)
+
+            r = None
+            error = None
+            try:
+                r = self.reqsession.request(method,
+                                            url,
+                                            json=json_body,
+                                            data=data,
+                                            params=query_params,
+                                            headers=headers,
+                                            verify=not self.disable_ssl,
+                                            allow_redirects=True,
+                                            timeout=self.timeout,
+                                            proxies=self.proxies)
+            # Any requests lib related exceptions are raised here - https://requests.readthedocs.io/en/latest/api/#exceptions
+            except Exception as e:
+                error = e
+                retry = self._retry(route, method, attempt, params)
+                if retry is None:
+                    raise
+
+            if r is not None:
+                retry = self._retry(route, method, attempt, params, r)
+                if retry is None:
+                    return self._parse_response(r)
+
+            decision, delay = retry
+            time.sleep(delay)
+
+            if decision == RetryPolicy.REQUERY:
+                try:
+                    order = self._find_placed_order(params)
+                except Exception:
+                    # The placement's failure matters, not the lookup's
+                    log.exception("Couldn't look up order placed with tag {}.".format(params["tag"]))
+                    if error is not None:
+                        raise error
+                    return self._parse_response(r)
+
+                if order:
+                    self.retry_policy.recovered(route)
+                    return {"order_id": order["order_id"]}
+
+    def _find_placed_order(self, params):
+        """
+        Order placed with `params`, looked up by tag a few times as a placement which timed out may still be in
+        progress. None if it isn't found.
+        """
+        for lookup in range(self.retry_policy.requery_attempts):
+            if lookup:
+                time.sleep(self.retry_policy.delay(lookup))
+
+            order = self.retry_policy.find_order(self._get("orders"), params)
+            if order:
+                return order
+
+        return None
+
+    def _retry(self, route, method, attempt, params, r=None):
+        """
+        Retry decision of the retry policy and wait before retrying a failed request, None to not retry.
+
+        - `r` is the response, None if sending the request raised.
+        """
+        if not self.retry_policy:
+            return None
+
+        if r is not None and not self.retry_policy.retry_status(r.status_code):
+            return None
+
+        status_code = r.status_code if r is not None else None
+        decision = self.retry_policy.decide(route, method, attempt, params=params, status_code=status_code)
+        if decision is None:
+            return None
+
+        log.warning("Retrying {method} {route} after attempt {attempt} failed{status}.".format(
+            method=method, route=route, attempt=attempt,
+            status=" with status {}".format(status_code) if status_code else ""))
+        return decision, self.retry_policy.delay(attempt, r.headers.get("Retry-After") if r is not None else None)
+
+    def _prepare_request(self, route, method, url_args=None, params=None, is_json=False, query_params=None):
+        """Url, headers, JSON body, form body and query params of a request. Shared by the sync and async clients."""
         # Form a restful URL
         if url_args:
             uri = self._routes[route].format(**url_args)
@@ -900,21 +1106,17 @@ class KiteConnect(object):
         if method in ["GET", "DELETE"]:
             query_params = params
 
-        try:
-            r = self.reqsession.request(method,
-                                        url,
-                                        json=params if (method in ["POST", "PUT"] and is_json) else None,
-                                        data=params if (method in ["POST", "PUT"] and not is_json) else None,
-                                        params=query_params,
-                                        headers=headers,
-                                        verify=not self.disable_ssl,
-                                        allow_redirects=True,
-                                        timeout=self.timeout,
-                                        proxies=self.proxies)
-        # Any requests lib related exceptions are raised here - https://requests.readthedocs.io/en/latest/api/#exceptions
-        except Exception as e:
-            raise e
+        json_body = params if (method in ["POST", "PUT"] and is_json) else None
+        data = params if (method in ["POST", "PUT"] and not is_json) else None
+
+        return url, headers, json_body, data, query_params
 
+    def _parse_response(self, r):
+        """
+        Data of a response, raising Kite errors as exceptions. Shared by the sync and async clients.
+
+        - `r` is a response with `status_code`, `headers`, `content` and `json()`, as `requests` and `httpx` responses have.
+        """
         if self.debug:
             log.debug("Response: {code} {content}".format(code=r.status_code, content=r.content))
 
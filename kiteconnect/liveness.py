@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+    liveness.py
+
+    Connection liveness and round trip time tracking for the ticker.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+from array import array
+
+
+class LivenessMonitor(object):
+    """
+    Decide when to ping a connection and when to give up on it, and keep a rolling window of ping round trip times.
+
+    Any frame received proves the connection is alive, so while data is flowing liveness pings are skipped. A ping
+    is still sent every `rtt_interval` seconds to keep round trip times current. The connection is considered dead
+    when nothing, neither the pong nor any other frame, was received for `timeout` seconds after a ping. Being idle
+    alone isn't enough, as a pong received just before a check skips the next ping. Round trip times are kept in a preallocated ring of the last
+    `rtt_window` samples. All times are from a monotonic clock and passed in by the caller.
+    """
+
+    PING = "ping"
+    DEAD = "dead"
+
+    # Default number of round trip times kept
+    RTT_WINDOW = 64
+
+    def __init__(self, interval=2.5, timeout=None, rtt_interval=10, rtt_window=RTT_WINDOW):
+        """
+        Initialise monitor.
+
+        - `interval` in seconds is how often `check` is called, and how long the connection can be idle before it's pinged.
+        - `timeout` in seconds without receiving anything after a ping after which the connection is dead. Defaults to
+            twice `interval`.
+        - `rtt_interval` in seconds is how often a ping is sent to measure round trip time while data is flowing.
+        - `rtt_window` is the number of round trip times kept.
+        """
+        self.interval = interval
+        self.timeout = timeout or 2 * interval
+        self.rtt_interval = rtt_interval
+
+        self._rtts = array("d", [0.0] * rtt_window)
+        self._rtt_index = 0
+        self._rtt_count = 0
+
+        # Counters
+        self.pings_sent = 0
+        self.pings_skipped = 0
+        self.pongs_received = 0
+        self.pongs_missed = 0
+
+        self.reset(None)
+
+    def reset(self, now):
+        """Start monitoring a new connection opened at `now`."""
+        self.last_received = now
+        self._ping_sent = None
+        self._last_rtt_time = now
+
+    def frame_received(self, now):
+        """Record that a frame was received."""
+        self.last_received = now
+
+    def check(self, now):
+        """`PING` if a ping should be sent, `DEAD` if the connection should be dropped, None otherwise."""
+        if self.last_received is None:
+            return None
+
+        if self._ping_sent is not None:
+            if now - self._ping_sent <= self.timeout:
+                return None
+
+            if self.last_received < self._ping_sent:
+                return self.DEAD
+
+            # Lost ping, the connection is still alive as frames are received.
+            self._ping_sent = None
+            self.pongs_missed += 1
+
+        if now - self.last_received >= self.interval or now - self._last_rtt_time >= self.rtt_interval:
+            return self.PING
+
+        self.pings_skipped += 1
+        return None
+
+    def ping_sent(self, now):
+        """Record that a ping was sent."""
+        self._ping_sent = now
+        self.pings_sent += 1
+
+    def pong_received(self, now):
+        """Record a pong. Returns the round trip time in milliseconds, None for a pong of no ping."""
+        self.last_received = now
+        if self._ping_sent is None:
+            return None
+
+        rtt = (now - self._ping_sent) * 1000
+        self._ping_sent = None
+        self._last_rtt_time = now
+        self.pongs_received += 1
+
+        self._rtts[self._rtt_index] = rtt
+        self._rtt_index = (self._rtt_index + 1) % len(self._rtts)
+        self._rtt_count = min(self._rtt_count + 1, len(self._rtts))
+        return rtt
+
+    def rtt_window(self):
+        """List of round trip times in milliseconds in the window, oldest first."""
+        if self._rtt_count < len(self._rtts):
+            return self._rtts[:self._rtt_count].tolist()
+        return (self._rtts[self._rtt_index:] + self._rtts[:self._rtt_index]).tolist()
+
+    def stats(self):
+        """Dict of round trip time summary of the window in milliseconds and ping counters."""
+        window = self.rtt_window()
+        return {
+            "rtt_last": window[-1] if window else None,
+            "rtt_min": min(window) if window else None,
+            "rtt_mean": sum(window) / len(window) if window else None,
+            "rtt_max": max(window) if window else None,
+            "rtt_samples": len(window),
+            "pings_sent": self.pings_sent,
+            "pings_skipped": self.pings_skipped,
+            "pongs_received": self.pongs_received,
+            "pongs_missed": self.pongs_missed
+        }
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+    orders.py
+
+    Ticker text messages and the latest state of orders from order updates.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import json
+import threading
+
+# orjson or ujson parse order updates several times faster than json, use them if they are installed.
+try:
+    import orjson as fast_json
+except ImportError:
+    try:
+        import ujson as fast_json
+    except ImportError:
+        fast_json = None
+
+# Message types handled by the ticker, other messages aren't parsed.
+_HANDLED_TYPES = (b'"order"', b'"error"')
+_TYPE_KEY = b'"type"'
+# Bytes after the type key in which its value is looked for, enough for `: "order"` with some whitespace.
+_TYPE_VALUE_LENGTH = 16
+
+
+def parse_text_message(payload):
+    """
+    Parse a ticker text message to a dict.
+
+    Returns None if it's not JSON, or if its type is neither `order` nor `error`. The type is checked on the raw
+    bytes before parsing, so messages of other types are skipped without being parsed.
+
+    - `payload` is the message as bytes or str.
+    """
+    if not isinstance(payload, bytes):
+        payload = payload.encode("utf-8")
+
+    start = payload.find(_TYPE_KEY)
+    if start >= 0:
+        value = payload[start + len(_TYPE_KEY):start + len(_TYPE_KEY) + _TYPE_VALUE_LENGTH]
+        if _HANDLED_TYPES[0] not in value and _HANDLED_TYPES[1] not in value:
+            return None
+
+    try:
+        if fast_json is not None:
+            data = fast_json.loads(payload)
+        else:
+            data = json.loads(payload.decode("utf-8"))
+    except ValueError:
+        return None
+
+    return data if isinstance(data, dict) else None
+
+
+class OrderStateCache(object):
+    """
+    Latest state of every order, merged from order updates.
+
+    An update replaces the fields it has, fields it doesn't have or which are empty keep their previous values.
+    Updates are applied in exchange order: an update with an `exchange_update_timestamp` older than the one already
+    applied to the order arrived out of sequence and is ignored.
+    """
+
+    def __init__(self):
+        self._orders = {}
+        self._lock = threading.Lock()
+
+        # Counters
+        self.updates_received = 0
+        self.updates_stale = 0
+
+    def update(self, data):
+        """Merge an order update. Returns the merged state, None if the update is stale or has no `order_id`."""
+        order_id = data.get("order_id")
+        if order_id is None:
+            return None
+
+        with self._lock:
+            self.updates_received += 1
+            state = self._orders.get(order_id)
+
+            if state is None:
+                state = self._orders[order_id] = {}
+            else:
+                updated = data.get("exchange_update_timestamp")
+                applied = state.get("exchange_update_timestamp")
+                # Timestamps are formatted as `YYYY-MM-DD HH:MM:SS`, which sort as strings.
+                if updated and applied and updated < applied:
+                    self.updates_stale += 1
+                    return None
+
+            for key, value in data.items():
+                if value is not None and value != "":
+                    state[key] = value
+
+            return dict(state)
+
+    def get(self, order_id):
+        """Latest state of an order, None if no update of it was received."""
+        with self._lock:
+            state = self._orders.get(order_id)
+            return dict(state) if state is not None else None
+
+    def clear(self):
+        """Forget all orders."""
+        with self._lock:
+            self._orders = {}
+
+    def __len__(self):
+        return len(self._orders)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+    pipeline.py
+
+    Decode binary ticker frames on a worker pool instead of the reactor thread.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from six.moves import queue
+
+log = logging.getLogger(__name__)
+
+
+class TickPipeline(object):
+    """
+    Decode frames on a thread or process pool and dispatch them in the order they were received.
+
+    `submit` is called on the reactor thread and only hands the payload to the pool, it never waits for
+    decoding or callbacks. Frames are decoded concurrently and a single dispatcher thread passes them to
+    `dispatch` in the order they were submitted, which preserves the order of ticks of every instrument.
+
+    At most `queue_size` frames can wait to be dispatched. Frames received while the queue is full are
+    dropped and counted in `frames_dropped`, so a stalled handler never blocks the reactor.
+
+    With the process executor `decode` must be picklable and decoded ticks are pickled back to the
+    dispatcher, which only pays off when decoding is much more expensive than copying the ticks.
+    """
+
+    EXECUTOR_THREAD = "thread"
+    EXECUTOR_PROCESS = "process"
+
+    # Default number of frames waiting to be dispatched
+    QUEUE_SIZE = 256
+
+    def __init__(self, decode, dispatch, workers=2, executor=EXECUTOR_THREAD, queue_size=QUEUE_SIZE):
+        """
+        Initialise pipeline.
+
+        - `decode` is called on the pool with a payload and returns the decoded ticks.
+        - `dispatch` is called on the dispatcher thread with the payload and its decoded ticks.
+        - `workers` is the number of threads or processes decoding frames.
+        - `executor` is `thread` or `process`.
+        - `queue_size` is the maximum number of frames waiting to be dispatched.
+        """
+        if executor == self.EXECUTOR_THREAD:
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+        elif executor == self.EXECUTOR_PROCESS:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            raise ValueError("Invalid `executor`: {}. Use `thread` or `process`.".format(executor))
+
+        self.decode = decode
+        self.dispatch = dispatch
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._stopped = False
+        self._lock = threading.Lock()
+
+        # Counters
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.frames_dispatched = 0
+        self.decode_errors = 0
+
+    def submit(self, payload, *args):
+        """
+        Queue a frame for decoding. Returns False if the frame was dropped because the queue is full.
+
+        - `args` are passed to `decode` after the payload.
+        """
+        if self._stopped:
+            return False
+
+        if self._thread is None:
+            self._start()
+
+        self.frames_received += 1
+
+        # Only the submitting thread adds to the queue, so a free slot can't be taken in between.
+        if self._queue.full():
+            self.frames_dropped += 1
+            if self.frames_dropped == 1:
+                log.warning("Tick pipeline queue is full, dropping frames.")
+            return False
+
+        self._queue.put_nowait((payload, self._executor.submit(self.decode, payload, *args)))
+        return True
+
+    def stop(self):
+        """
+        Stop dispatching after frames already in the queue and shutdown the pool. It can't be restarted.
+
+        Doesn't wait for a slow `dispatch`, if the queue is full its oldest frames are dropped to make room to stop.
+        """
+        with self._lock:
+            self._stopped = True
+            if self._thread is not None:
+                self._put_stop()
+                self._thread = None
+
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        """Dict of pipeline counters."""
+        return {
+            "frames_received": self.frames_received,
+            "frames_dropped": self.frames_dropped,
+            "frames_dispatched": self.frames_dispatched,
+            "decode_errors": self.decode_errors,
+            "queued": self._queue.qsize()
+        }
+
+    def _put_stop(self):
+        while True:
+            try:
+                self._queue.put_nowait((None, None))
+                return
+            except queue.Full:
+                pass
+
+            try:
+                payload, future = self._queue.get_nowait()
+            except queue.Empty:
+                continue
+            future.cancel()
+            self.frames_dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="kite-ticker-dispatcher")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            payload, future = self._queue.get()
+            if future is None:
+                return
+
+            try:
+                ticks = future.result()
+            except Exception:
+                self.decode_errors += 1
+                log.exception("Error while decoding ticks.")
+                continue
+
+            try:
+                self.dispatch(payload, ticks)
+            except Exception:
+                log.exception("Error in ticks callback.")
+
+            self.frames_dispatched += 1
@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+    pool.py
+
+    Spread ticker subscriptions across several websocket connections.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import time
+import logging
+import threading
+
+from .ticker import KiteTicker
+
+log = logging.getLogger(__name__)
+
+
+class KiteTickerPool(object):
+    """
+    Subscribe to more instruments than a single connection allows by sharding them over several `KiteTicker` connections.
+
+    Every subscribed instrument is assigned to the connection with the fewest instruments, and ticks of all connections
+    are delivered to one `on_ticks` callback. When a connection drops, its instruments are moved to connections which
+    are still open and have room, so they keep streaming while it reconnects. `rebalance()` evens out instruments
+    across open connections, for example after a dropped connection is back.
+
+    All connections run on the same Twisted reactor. `on_ticks` is never called concurrently, even when the tickers
+    decode frames on worker threads.
+
+        #!python
+        from kiteconnect.pool import KiteTickerPool
+
+        pool = KiteTickerPool("your_api_key", "your_access_token", connections=3)
+
+        def on_ticks(pool, ticks):
+            print(ticks)
+
+        pool.on_ticks = on_ticks
+        pool.subscribe(fno_tokens, mode=KiteTicker.MODE_LTP)
+        pool.connect()
+
+    Callbacks
+    ---------
+    - `on_ticks(pool, ticks)` -  Triggered with the ticks of any connection.
+    - `on_order_update(pool, data)` -  Triggered for order updates. Only updates received on one connection are delivered.
+    - `on_error(pool, index, code, reason)` -  Triggered when connection `index` throws an error.
+    - `on_close(pool, index, code, reason)` -  Triggered when connection `index` is closed.
+    """
+
+    # Instruments a single connection can subscribe to
+    MAX_TOKENS_PER_CONNECTION = 3000
+    # Default number of connections
+    CONNECTIONS = 3
+
+    def __init__(self, api_key, access_token, connections=CONNECTIONS,
+                 max_tokens_per_connection=MAX_TOKENS_PER_CONNECTION, **kwargs):
+        """
+        Initialise the pool.
+
+        - `api_key` is the API key issued to you
+        - `access_token` is the token obtained after the login flow
+        - `connections` is the number of websocket connections.
+        - `max_tokens_per_connection` is the maximum number of instruments subscribed on a connection.
+
+        Other keyword arguments are passed to every `KiteTicker`.
+        """
+        if connections < 1:
+            raise ValueError("`connections` should be at least 1.")
+
+        self.max_tokens_per_connection = max_tokens_per_connection
+        self.tickers = [KiteTicker(api_key, access_token, **kwargs) for i in range(connections)]
+
+        # Placeholders for callbacks.
+        self.on_ticks = None
+        self.on_order_update = None
+        self.on_error = None
+        self.on_close = None
+
+        # Mode of subscribed tokens and index of the connection they are subscribed on
+        self.subscribed_tokens = {}
+        self._assigned = {}
+
+        self._lock = threading.RLock()
+        self._dispatch_lock = threading.Lock()
+        self._connected = set()
+        self._closing = False
+
+        self._stats = [{
+            "frames": 0,
+            "ticks": 0,
+            "drops": 0,
+            "reconnects": 0,
+            "moved_tokens": 0,
+            "last_tick_time": None
+        } for i in range(connections)]
+
+        for index, ticker in enumerate(self.tickers):
+            self._register(index, ticker)
+
+    def connect(self, threaded=False, disable_ssl_verification=False, proxy=None):
+        """
+        Connect all connections. Arguments are the same as `KiteTicker.connect`.
+        """
+        self._closing = False
+        for ticker in self.tickers:
+            ticker._connect_ws(disable_ssl_verification=disable_ssl_verification, proxy=proxy)
+
+        self.tickers[0]._run_reactor(threaded=threaded)
+
+    def close(self, code=None, reason=None):
+        """Close all connections."""
+        self._closing = True
+        for ticker in self.tickers:
+            if getattr(ticker, "factory", None) is not None:
+                ticker.close(code, reason)
+
+    def stop(self):
+        """Stop the event loop. Reconnection can't happen past this method."""
+        self.tickers[0].stop()
+
+    def is_connected(self):
+        """Check if any connection is open."""
+        return bool(self._connected)
+
+    def subscribe(self, instrument_tokens, mode=KiteTicker.MODE_QUOTE):
+        """
+        Subscribe to a list of instrument_tokens, spreading new instruments across connections.
+
+        Instruments subscribed before connecting are subscribed once their connection is open.
+        Raises `ValueError` if there isn't room for all the instruments on the connections.
+
+        - `instrument_tokens` is list of instrument instrument_tokens to subscribe
+        - `mode` is the mode to subscribe in.
+        """
+        with self._lock:
+            new_tokens = [token for token in dict.fromkeys(instrument_tokens) if token not in self._assigned]
+            free = sum(self._free(index) for index in range(len(self.tickers)))
+            if len(new_tokens) > free:
+                raise ValueError("Can't subscribe to {} more instruments, only {} more fit on {} connections.".format(
+                    len(new_tokens), free, len(self.tickers)))
+
+            # New instruments go to the least loaded connection, preferring open ones.
+            groups = {}
+            for token in new_tokens:
+                index = min((i for i in range(len(self.tickers)) if self._free(i) > len(groups.get(i, []))),
+                            key=lambda i: (i not in self._connected, self._count(i) + len(groups.get(i, []))))
+                groups.setdefault(index, []).append(token)
+
+            for index, tokens in groups.items():
+                for token in tokens:
+                    self._assigned[token] = index
+
+            # Tokens already subscribed only change mode on their connection
+            new_tokens = set(new_tokens)
+            for token in dict.fromkeys(instrument_tokens):
+                self.subscribed_tokens[token] = mode
+                if token not in new_tokens:
+                    groups.setdefault(self._assigned[token], []).append(token)
+
+            for index, tokens in groups.items():
+                self._subscribe(index, tokens, mode)
+
+        return True
+
+    def unsubscribe(self, instrument_tokens):
+        """
+        Unsubscribe the given list of instrument_tokens.
+
+        - `instrument_tokens` is list of instrument_tokens to unsubscribe.
+        """
+        with self._lock:
+            groups = {}
+            for token in instrument_tokens:
+                index = self._assigned.pop(token, None)
+                self.subscribed_tokens.pop(token, None)
+                if index is not None:
+                    groups.setdefault(index, []).append(token)
+
+            for index, tokens in groups.items():
+                self._unsubscribe(index, tokens)
+
+        return True
+
+    def set_mode(self, mode, instrument_tokens):
+        """
+        Set streaming mode for the given list of subscribed tokens.
+
+        - `mode` is the mode to set. It can be one of the `KiteTicker` constants MODE_LTP, MODE_QUOTE, or MODE_FULL.
+        - `instrument_tokens` is list of instrument tokens on which the mode should be applied
+        """
+        with self._lock:
+            groups = {}
+            for token in instrument_tokens:
+                if token in self._assigned:
+                    self.subscribed_tokens[token] = mode
+                    groups.setdefault(self._assigned[token], []).append(token)
+
+            for index, tokens in groups.items():
+                self.tickers[index].set_mode(mode, tokens)
+
+        return True
+
+    def rebalance(self):
+        """
+        Move instruments from the most to the least loaded open connections until they differ by at most one.
+
+        Returns the number of instruments moved.
+        """
+        moved = 0
+        with self._lock:
+            connected = sorted(self._connected)
+            if len(connected) < 2:
+                return 0
+
+            target = -(-len(self._assigned) // len(connected))
+            excess = []
+            for index in connected:
+                tokens = list(self.tickers[index].subscribed_tokens)
+                if len(tokens) > target:
+                    excess.append((index, tokens[target:]))
+
+            # Subscribe on the new connection before unsubscribing, so that ticks don't stop in between.
+            for source, tokens in excess:
+                placed = self._place(tokens, exclude=source)
+                self._unsubscribe(source, tokens[:placed])
+                moved += placed
+
+        if moved:
+            log.info("Rebalanced {} instruments across {} connections.".format(moved, len(connected)))
+
+        return moved
+
+    def stats(self):
+        """
+        List of per connection health dicts, in the order of `tickers`.
+
+        `last_tick_age` is the number of seconds since the connection delivered ticks, None if it never did.
+        """
+        now = time.monotonic()
+        stats = []
+        with self._lock:
+            for index, counters in enumerate(self._stats):
+                last_tick_time = counters["last_tick_time"]
+                stats.append({
+                    "index": index,
+                    "connected": index in self._connected,
+                    "tokens": self._count(index),
+                    "frames": counters["frames"],
+                    "ticks": counters["ticks"],
+                    "drops": counters["drops"],
+                    "reconnects": counters["reconnects"],
+                    "moved_tokens": counters["moved_tokens"],
+                    "last_tick_age": None if last_tick_time is None else now - last_tick_time
+                })
+
+        return stats
+
+    def _count(self, index):
+        return len(self.tickers[index].subscribed_tokens)
+
+    def _free(self, index):
+        return self.max_tokens_per_connection - self._count(index)
+
+    def _subscribe(self, index, tokens, mode):
+        # Sent when the connection opens if it isn't open
+        self.tickers[index].set_mode(mode, tokens)
+
+    def _unsubscribe(self, index, tokens):
+        self.tickers[index].unsubscribe(tokens)
+
+    def _place(self, tokens, exclude):
+        """Subscribe tokens on open connections other than `exclude` with room for them. Returns the number placed."""
+        placed = 0
+        groups = {}
+        for token in tokens:
+            free = [i for i in self._connected if i != exclude and self._free(i) > len(groups.get(i, []))]
+            if not free:
+                break
+
+            index = min(free, key=lambda i: self._count(i) + len(groups.get(i, [])))
+            groups.setdefault(index, []).append(token)
+            placed += 1
+
+        for index, group in groups.items():
+            for mode in set(self.subscribed_tokens[token] for token in group):
+                self._subscribe(index, [token for token in group if self.subscribed_tokens[token] == mode], mode)
+
+            for token in group:
+                self._assigned[token] = index
+            self._stats[index]["moved_tokens"] += len(group)
+
+        return placed
+
+    def _register(self, index, ticker):
+        ticker.on_ticks = lambda ws, ticks: self._on_ticks(index, ticks)
+        ticker.on_open = lambda ws: self._on_open(index)
+        ticker.on_close = lambda ws, code, reason: self._on_close(index, code, reason)
+        ticker.on_error = lambda ws, code, reason: self._on_error(index, code, reason)
+        ticker.on_reconnect = lambda ws, attempts_count: self._on_reconnect(index)
+        ticker.on_noreconnect = lambda ws: self._on_noreconnect(index)
+        ticker.on_order_update = lambda ws, data: self._on_order_update(index, data)
+
+    def _on_ticks(self, index, ticks):
+        counters = self._stats[index]
+        counters["frames"] += 1
+        counters["ticks"] += len(ticks)
+        counters["last_tick_time"] = time.monotonic()
+
+        if self.on_ticks:
+            with self._dispatch_lock:
+                self.on_ticks(self, ticks)
+
+    def _on_open(self, index):
+        with self._lock:
+            self._connected.add(index)
+
+    def _on_close(self, index, code, reason):
+        with self._lock:
+            was_connected = index in self._connected
+            self._connected.discard(index)
+
+            if was_connected and not self._closing:
+                self._stats[index]["drops"] += 1
+                self._move_away(index)
+
+        if self.on_close:
+            self.on_close(self, index, code, reason)
+
+    def _on_error(self, index, code, reason):
+        if self.on_error:
+            self.on_error(self, index, code, reason)
+
+    def _on_reconnect(self, index):
+        self._stats[index]["reconnects"] += 1
+
+    def _on_noreconnect(self, index):
+        log.error("Connection {} stopped reconnecting.".format(index))
+        with self._lock:
+            self._move_away(index)
+
+    def _move_away(self, index):
+        """Move instruments of a dropped connection to open connections with room for them."""
+        ticker = self.tickers[index]
+        tokens = list(ticker.subscribed_tokens)
+        if not tokens:
+            return
+
+        placed = self._place(tokens, exclude=index)
+
+        # Moved instruments aren't resubscribed when the connection is back
+        self._unsubscribe(index, tokens[:placed])
+
+        if placed < len(tokens):
+            log.warning("No room for {} instruments of dropped connection {}, they resume once it reconnects.".format(
+                len(tokens) - placed, index))
+
+    def _on_order_update(self, index, data):
+        # Every connection receives the order updates of the user, deliver them from the first open one.
+        if self.on_order_update and index == min(self._connected or [index]):
+            self.on_order_update(self, data)
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+    quote_cache.py
+
+    Short lived cache of quotes shared by concurrent callers.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import time
+import threading
+
+
+class _Flight(object):
+    """Request in flight for some instruments, which other callers wait on."""
+
+    __slots__ = ("event", "errors")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.errors = {}
+
+
+class QuoteCache(object):
+    """
+    Cache of `quote`, `ohlc` and `ltp` data of `KiteConnect`, per instrument, for a short time per call type.
+
+    Instruments a call needs which aren't cached are fetched together in a single request. When another thread
+    is already fetching some of them, the call waits for that request instead of making its own, so concurrent
+    calls for the same instruments make one request between them. A TTL of 0 turns caching off for a call type
+    while still sharing requests in flight.
+
+        #!python
+        from kiteconnect.quote_cache import QuoteCache
+
+        kite = KiteConnect(api_key="your_api_key", quote_cache=QuoteCache(ttl={"ltp": 0.5}))
+
+        # At most one request every half a second for any number of callers
+        kite.ltp("NSE:INFY")
+
+    Cached data is shared by callers, so it must not be modified.
+    """
+
+    # Default seconds data is cached for, per call type
+    TTL = {
+        "quote": 1.0,
+        "ohlc": 1.0,
+        "ltp": 1.0
+    }
+
+    def __init__(self, ttl=None):
+        """
+        Initialise cache.
+
+        - `ttl` is a dict of seconds data is cached for keyed by call type, `quote`, `ohlc` or `ltp`. Call types
+            which aren't in it use the default `TTL`.
+        """
+        self.ttl = dict(self.TTL, **(ttl or {}))
+
+        self._lock = threading.Lock()
+        self._entries = dict((kind, {}) for kind in self.ttl)
+        self._flights = dict((kind, {}) for kind in self.ttl)
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.requests = 0
+
+    def get(self, kind, instruments, fetch):
+        """
+        Data of instruments keyed by instrument, from the cache where it's fresh and fetched otherwise.
+
+        Raises the exception of the request for an instrument if it failed, after the data of the other
+        instruments is cached.
+
+        - `kind` is the call type, `quote`, `ohlc` or `ltp`.
+        - `instruments` is a list of instruments, as `exchange:tradingsymbol` or instrument tokens.
+        - `fetch` is called with the list of instruments to fetch and returns their data. If the returned dict has
+            an `errors` dict, like a `BatchResult`, its instruments failed.
+        """
+        entries = self._entries[kind]
+        flights = self._flights[kind]
+
+        result = {}
+        missing = []
+        waiting = []
+        seen = set()
+
+        with self._lock:
+            now = time.monotonic()
+            for instrument in instruments:
+                # Data is keyed by strings, also for instrument tokens
+                instrument = str(instrument)
+                if instrument in seen:
+                    continue
+                seen.add(instrument)
+
+                entry = entries.get(instrument)
+                if entry is not None and entry[0] > now:
+                    result[instrument] = entry[1]
+                    self.hits += 1
+                elif instrument in flights:
+                    waiting.append((instrument, flights[instrument]))
+                    self.coalesced += 1
+                else:
+                    missing.append(instrument)
+
+            if missing:
+                flight = _Flight()
+                for instrument in missing:
+                    flights[instrument] = flight
+                self.misses += len(missing)
+                self.requests += 1
+
+        if missing:
+            self._fetch(kind, missing, flight, fetch, result)
+
+        for instrument, other in waiting:
+            other.event.wait()
+            if instrument in other.errors:
+                raise other.errors[instrument]
+
+            entry = entries.get(instrument)
+            if entry is not None:
+                result[instrument] = entry[1]
+
+        return result
+
+    def clear(self):
+        """Forget cached data."""
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+
+    def stats(self):
+        """Dict of counters: instruments served from the cache, fetched and waited for, and requests made."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "requests": self.requests
+        }
+
+    def _fetch(self, kind, missing, flight, fetch, result):
+        data = {}
+        try:
+            data = fetch(missing)
+            flight.errors = dict(getattr(data, "errors", {}))
+        except Exception as e:
+            flight.errors = dict.fromkeys(missing, e)
+            raise
+        finally:
+            with self._lock:
+                entries = self._entries[kind]
+                flights = self._flights[kind]
+                expires = time.monotonic() + self.ttl[kind]
+                for instrument in missing:
+                    if flights.get(instrument) is flight:
+                        del flights[instrument]
+                    if instrument in data:
+                        entries[instrument] = (expires, data[instrument])
+            flight.event.set()
+
+        for instrument in missing:
+            if instrument in data:
+                result[instrument] = data[instrument]
+
+        if flight.errors:
+            raise next(iter(flight.errors.values()))
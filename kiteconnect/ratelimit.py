@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+    ratelimit.py
+
+    Client side rate limiting of Kite Connect API requests.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import time
+import fnmatch
+import threading
+
+
+class TokenBucket(object):
+    """
+    Token bucket allowing `rate` requests per second, with bursts of up to `burst` requests.
+
+    Callers reserve a token and wait for the returned delay. Tokens are reserved in the order callers arrive, so
+    callers waiting on a bucket are spaced `1 / rate` seconds apart instead of retrying together.
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        Initialise bucket.
+
+        - `rate` is the number of requests allowed per second.
+        - `burst` is the number of requests which can be made at once after the bucket was idle.
+        """
+        if rate <= 0:
+            raise ValueError("Invalid `rate`: {}. It has to be more than 0.".format(rate))
+
+        self.rate = float(rate)
+        self.burst = max(1, burst)
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+        # Counters
+        self.requests = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def reserve(self):
+        """Take a token. Returns the delay in seconds to wait before making the request, 0 if it can be made now."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            self.requests += 1
+
+            if self._tokens >= 0:
+                return 0
+
+            delay = -self._tokens / self.rate
+            self.waits += 1
+            self.wait_time += delay
+            return delay
+
+    def stats(self):
+        """Dict of the rate and request counters."""
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "requests": self.requests,
+            "waits": self.waits,
+            "wait_time": self.wait_time
+        }
+
+
+class RateLimiter(object):
+    """
+    Token buckets for groups of `KiteConnect` routes, so requests stay within Kite's per second limits
+    instead of failing with HTTP 429.
+
+    Groups are `_routes` keys, or patterns of them like `market.quote*`, each with a `(rate, burst)` limit. A route
+    belongs to the group matching it, `*` matches routes no other group matches, and all routes of a group share
+    its bucket. Share a limiter between clients of the same `api_key`, and across threads, to keep their combined
+    requests within the limits.
+
+        #!python
+        from kiteconnect.ratelimit import RateLimiter
+
+        limiter = RateLimiter()
+        kite = KiteConnect(api_key="your_api_key", rate_limiter=limiter)
+
+        # Slower historical data requests, defaults for the rest
+        limits = dict(RateLimiter.LIMITS, **{"market.historical": (2, 1)})
+        kite = KiteConnect(api_key="your_api_key", rate_limiter=RateLimiter(limits))
+    """
+
+    # Default limits in requests per second and burst, from the documented API rate limits
+    LIMITS = {
+        "market.quote*": (1, 1),
+        "market.historical": (3, 1),
+        "order.place": (10, 1),
+        "*": (10, 1)
+    }
+
+    def __init__(self, limits=None):
+        """
+        Initialise limiter.
+
+        - `limits` is a dict of route patterns to `(rate, burst)` tuples. Defaults to `LIMITS`. Routes matching no
+            pattern aren't limited.
+        """
+        limits = self.LIMITS if limits is None else limits
+        # The catch all pattern goes last whatever its position in the dict.
+        patterns = sorted(limits, key=lambda pattern: pattern == "*")
+
+        self._groups = [(pattern, TokenBucket(*limits[pattern])) for pattern in patterns]
+        self._routes = {}
+
+    def reserve(self, route):
+        """Take a token for a request to `route`. Returns the delay in seconds to wait before making it."""
+        bucket = self._routes.get(route, False)
+        if bucket is False:
+            bucket = self._bucket(route)
+
+        return bucket.reserve() if bucket is not None else 0
+
+    def wait(self, route):
+        """Block until a request to `route` can be made. Returns the time waited in seconds."""
+        delay = self.reserve(route)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def stats(self):
+        """Dict of bucket stats keyed by group pattern."""
+        return dict((pattern, bucket.stats()) for pattern, bucket in self._groups)
+
+    def _bucket(self, route):
+        bucket = None
+        for pattern, group_bucket in self._groups:
+            if fnmatch.fnmatchcase(route, pattern):
+                bucket = group_bucket
+                break
+
+        self._routes[route] = bucket
+        return bucket
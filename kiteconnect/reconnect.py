@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+    reconnect.py
+
+    Delays between ticker reconnection attempts.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import random
+
+
+class ReconnectPolicy(object):
+    """
+    Reconnect right away after a drop, then back off with decorrelated jitter.
+
+    Most drops are short network blips, so the first attempt is made without waiting. Later attempts wait a random
+    delay between `base_delay` and three times the previous delay, capped at `max_delay`. Compared to a fixed
+    exponential backoff this reaches the cap as fast on average, but spreads the attempts of many clients which
+    dropped at the same time instead of having them retry in lockstep.
+    """
+
+    # Default lowest delay between attempts after the first one
+    BASE_DELAY = 0.5
+
+    def __init__(self, max_delay=60, base_delay=BASE_DELAY, immediate_first=True):
+        """
+        Initialise policy.
+
+        - `max_delay` in seconds is the longest delay between attempts.
+        - `base_delay` in seconds is the lowest delay between attempts after the first one.
+        - `immediate_first` makes the first attempt after a drop without a delay.
+        """
+        self.max_delay = max_delay
+        self.base_delay = min(base_delay, max_delay)
+        self.immediate_first = immediate_first
+        self.reset()
+
+    def next_delay(self):
+        """Delay in seconds before the next attempt."""
+        self.attempts += 1
+        if self.attempts == 1 and self.immediate_first:
+            return 0
+
+        self._delay = min(self.max_delay, random.uniform(self.base_delay, self._delay * 3))
+        return self._delay
+
+    def reset(self):
+        """Start over after a successful connection."""
+        self.attempts = 0
+        self._delay = self.base_delay
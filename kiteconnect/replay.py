@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+    replay.py
+
+    Record binary ticker frames to a file and replay them through a `KiteTicker`.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import os
+import mmap
+import time
+import struct
+
+# File header
+_MAGIC = b"KTREC001"
+# Receive timestamp (epoch seconds) and payload length before every frame.
+_FRAME_HEADER = struct.Struct("<dI")
+
+
+class TickRecorder(object):
+    """
+    Append binary ticker frames to a file with the time they were received.
+
+    The file is grown in chunks of `chunk_size` bytes and written through a memory map, so recording
+    a frame is a memory copy without a system call. The unused tail of the last chunk is truncated when
+    the recorder is closed. Assign a recorder to `KiteTicker.recorder` to record every binary frame.
+    """
+
+    # Default size by which the file is grown
+    CHUNK_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, path, append=False, chunk_size=CHUNK_SIZE):
+        """
+        Open a recording file.
+
+        - `path` is the file to record to.
+        - `append` adds frames to the end of an existing recording instead of overwriting it.
+        - `chunk_size` is the number of bytes by which the file is grown when it's full.
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.frames_recorded = 0
+
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, "r+b")
+            self._position = _end_of_frames(self._file)
+        else:
+            self._file = open(path, "w+b")
+            self._file.write(_MAGIC)
+            self._position = len(_MAGIC)
+
+        self._map = None
+        self._grow(0)
+
+    def record(self, payload, timestamp=None):
+        """Append a frame. `timestamp` defaults to the current time."""
+        size = _FRAME_HEADER.size + len(payload)
+        if self._position + size > len(self._map):
+            self._grow(size)
+
+        _FRAME_HEADER.pack_into(self._map, self._position, timestamp or time.time(), len(payload))
+        start = self._position + _FRAME_HEADER.size
+        self._map[start:start + len(payload)] = payload
+        self._position += size
+        self.frames_recorded += 1
+
+    def flush(self):
+        """Flush recorded frames to disk."""
+        self._map.flush()
+
+    def close(self):
+        """Flush frames and truncate the file to the recorded size."""
+        if self._file.closed:
+            return
+
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(self._position)
+        self._file.close()
+
+    def _grow(self, size):
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+
+        length = self._position + max(size, self.chunk_size)
+        self._file.truncate(length)
+        self._map = mmap.mmap(self._file.fileno(), length)
+
+
+class TickReplayer(object):
+    """
+    Replay frames recorded by `TickRecorder` through a `KiteTicker`.
+
+    Frames go through the same decoding and callbacks as live frames (`on_message`, `on_ticks`, snapshots
+    and so on), either as fast as possible or at the recorded pace scaled by `speed`.
+
+        #!python
+        kws = KiteTicker("your_api_key", "your_access_token")
+        kws.on_ticks = on_ticks
+
+        TickReplayer("session.ticks").replay(kws)
+    """
+
+    def __init__(self, path):
+        """
+        Open a recording.
+
+        - `path` is the file recorded by `TickRecorder`.
+        """
+        self.path = path
+
+    def __iter__(self):
+        """Iterate over `(timestamp, payload)` of recorded frames."""
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size <= len(_MAGIC):
+                return
+
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                if data[:len(_MAGIC)] != _MAGIC:
+                    raise ValueError("{} is not a tick recording.".format(self.path))
+
+                for timestamp, start, length in _frames(data, len(_MAGIC), len(data)):
+                    yield timestamp, data[start:start + length]
+            finally:
+                data.close()
+
+    def replay(self, ticker, speed=None):
+        """
+        Feed recorded frames to a ticker. Returns the number of frames replayed.
+
+        - `ticker` is the `KiteTicker` whose callbacks receive the frames. It doesn't need to be connected.
+        - `speed` replays at the recorded pace multiplied by `speed` (1 is real time).
+            Frames are replayed as fast as possible if not given.
+        """
+        count = 0
+        first_timestamp = None
+        started = time.monotonic()
+
+        for timestamp, payload in self:
+            if speed:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+
+                delay = (timestamp - first_timestamp) / speed - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+            ticker._on_message(ticker.ws, payload, True)
+            count += 1
+
+        return count
+
+
+def _frames(data, start, end):
+    """Yield `(timestamp, offset, length)` of frames in `data` between `start` and `end`."""
+    position = start
+    while position + _FRAME_HEADER.size <= end:
+        timestamp, length = _FRAME_HEADER.unpack_from(data, position)
+
+        # Zero filled tail of a recording which wasn't closed
+        if timestamp == 0 or position + _FRAME_HEADER.size + length > end:
+            return
+
+        yield timestamp, position + _FRAME_HEADER.size, length
+        position += _FRAME_HEADER.size + length
+
+
+def _end_of_frames(f):
+    """Offset after the last complete frame of an open recording."""
+    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("{} is not a tick recording.".format(f.name))
+
+        end = len(_MAGIC)
+        for timestamp, start, length in _frames(data, len(_MAGIC), len(data)):
+            end = start + length
+
+        return end
+    finally:
+        data.close()
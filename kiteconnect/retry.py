@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+    retry.py
+
+    Retrying failed Kite Connect API requests which are safe to repeat.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import threading
+
+
+class RetryPolicy(object):
+    """
+    Decide which failed requests are retried, and how long to wait before each retry.
+
+    A request failed if sending it raised, like on a connection reset or timeout, or if the response status is one
+    of `statuses`. Requests of safe methods and `idempotent_routes` are retried up to `max_retries` times, waiting
+    `backoff` seconds doubled on every retry, at most `max_backoff` seconds or what the server asks for in
+    `Retry-After`. Other requests are retried only on HTTP 429, when the server didn't process them.
+
+    An order placement which failed otherwise may have been placed anyway, so it isn't sent again blindly. If it
+    has a `tag`, the order book is queried for an order with that tag and the same instrument, side and quantity,
+    up to `requery_attempts` times with backoff as the placement may still be in progress: when there is one its
+    order id is returned, else the order is sent again. If the order book can't be fetched, the placement's error is
+    raised. Use a unique tag per order for this, placements without a tag aren't retried.
+
+        #!python
+        from kiteconnect.retry import RetryPolicy
+
+        kite = KiteConnect(api_key="your_api_key", retry_policy=RetryPolicy(max_retries=3))
+        kite.place_order(..., tag="batch42x17")
+
+        kite.retry_policy.stats()
+    """
+
+    RETRY = "retry"
+    REQUERY = "requery"
+
+    # Default response statuses retried
+    STATUSES = (429, 500, 502, 503, 504)
+    # Default methods retried on any failure
+    METHODS = ("GET",)
+    # Default POST routes which only compute, and are retried like GET requests
+    IDEMPOTENT_ROUTES = ("order.margins", "order.margins.basket", "order.contract_note")
+    # Route of order placements retried after looking them up by tag
+    ORDER_PLACE_ROUTE = "order.place"
+
+    def __init__(self, max_retries=3, backoff=0.5, max_backoff=8, statuses=STATUSES, methods=METHODS,
+                 idempotent_routes=IDEMPOTENT_ROUTES, requery_attempts=3):
+        """
+        Initialise policy.
+
+        - `max_retries` is the maximum number of retries of a request.
+        - `backoff` in seconds is the wait before the first retry, doubled for every further retry.
+        - `max_backoff` in seconds is the longest wait between retries.
+        - `statuses` is the list of HTTP response statuses which are failures.
+        - `methods` is the list of HTTP methods whose requests are safe to retry.
+        - `idempotent_routes` is the list of `_routes` keys which are safe to retry whatever their method.
+        - `requery_attempts` is the number of times the order book is queried for a failed order placement before
+            it's sent again.
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(methods)
+        self.idempotent_routes = frozenset(idempotent_routes)
+        self.requery_attempts = max(1, requery_attempts)
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def decide(self, route, method, attempt, params=None, status_code=None):
+        """
+        How to retry a failed request: `RETRY` to send it again, `REQUERY` to look the order up before sending it
+        again, None to give up. Counts the retry.
+
+        - `route` and `method` are the request's route and HTTP method.
+        - `attempt` is the number of times it was sent.
+        - `params` are the request params.
+        - `status_code` is the response status, None if sending the request raised.
+        """
+        if method in self.methods or route in self.idempotent_routes or status_code == 429:
+            decision = self.RETRY
+        elif route == self.ORDER_PLACE_ROUTE and params and params.get("tag"):
+            decision = self.REQUERY
+        else:
+            return None
+
+        if attempt > self.max_retries:
+            self._count("exhausted", route)
+            return None
+
+        self._count("retries", route)
+        return decision
+
+    def retry_status(self, status_code):
+        """Whether a response status is a failure."""
+        return status_code in self.statuses
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Wait in seconds before sending a request again.
+
+        - `attempt` is the number of times it was sent.
+        - `retry_after` is the response's `Retry-After` header.
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        try:
+            return max(delay, min(self.max_backoff, float(retry_after)))
+        except (TypeError, ValueError):
+            return delay
+
+    def find_order(self, orders, params):
+        """Order in `orders` placed with `params`, by its tag, instrument, side and quantity. None if there is none."""
+        for order in reversed(orders):
+            if order.get("tag") == params["tag"] and \
+                    order.get("exchange") == params.get("exchange") and \
+                    order.get("tradingsymbol") == params.get("tradingsymbol") and \
+                    order.get("transaction_type") == params.get("transaction_type") and \
+                    str(order.get("quantity")) == str(params.get("quantity")):
+                return order
+        return None
+
+    def recovered(self, route):
+        """Count a failed order placement found in the order book."""
+        self._count("recovered", route)
+
+    def stats(self):
+        """Dict of counters, `retries`, `recovered` and `exhausted`, with their counts per route."""
+        with self._lock:
+            return dict((name, dict(self._counts[name], total=sum(self._counts[name].values())))
+                        for name in self._counts)
+
+    def reset(self):
+        """Reset counters."""
+        with self._lock:
+            self._counts = {"retries": {}, "recovered": {}, "exhausted": {}}
+
+    def _count(self, name, route):
+        with self._lock:
+            counts = self._counts[name]
+            counts[route] = counts.get(route, 0) + 1
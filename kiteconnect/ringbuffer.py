@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+    ringbuffer.py
+
+    Shared memory tick ring buffer to fan out one ticker connection to many local processes.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import struct
+import logging
+from datetime import datetime
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    # Python < 3.8
+    shared_memory = None
+
+log = logging.getLogger(__name__)
+
+_MAGIC = b"KTRB"
+_VERSION = 1
+
+# magic, version, capacity, index size, record size, committed records
+_HEADER = struct.Struct("<4sIIIIxxxxQ")
+_COMMITTED = struct.Struct("<Q")
+_COMMITTED_OFFSET = 24
+_HEADER_SIZE = 64
+
+# Sequence stamp of a record. Odd while the record is being written.
+_STAMP = struct.Struct("<Q")
+
+# Fixed width tick record following the stamp: token, mode, flags, last price, last traded quantity,
+# average price, volume, total buy and sell quantity, open, high, low, close, change, last trade time,
+# exchange timestamp, oi, oi day high, oi day low and ten depth levels of quantities, prices and orders.
+_TICK = struct.Struct("<IBB2xdIdIIIdddddqqIII10I10d10H")
+_RECORD_SIZE = _STAMP.size + _TICK.size
+
+# Index slots are a token followed by a record.
+_TOKEN = struct.Struct("<I")
+_INDEX_SLOT_SIZE = _TOKEN.size + _RECORD_SIZE
+
+# Record flags
+_TRADABLE = 1
+# Set for ticks with volume and depth fields, index ticks don't have them.
+_HAS_VOLUME = 2
+
+_MODES = ("ltp", "quote", "full")
+_MODE_CODES = {mode: code for code, mode in enumerate(_MODES)}
+_EMPTY_DEPTH = (0,) * 10 + (0.0,) * 10 + (0,) * 10
+
+
+# Names of blocks created by publishers in this process
+_created = set()
+
+
+def _attach(name):
+    """Attach to an existing shared memory block without letting this process unlink it on exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers attached blocks with the resource tracker as well, which unlinks
+        # them when the reader exits. Blocks created in this process must stay registered.
+        shm = shared_memory.SharedMemory(name=name)
+        if shm.name not in _created:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _epoch(value):
+    return int(value.timestamp()) if value else 0
+
+
+def _datetime(value):
+    return datetime.fromtimestamp(value) if value else None
+
+
+class TickPublisher(object):
+    """
+    Write decoded ticks to a shared memory ring buffer which `TickReader`s in other processes read without locks.
+
+    Every tick is written as a fixed width record to the next slot of a ring of `capacity` slots and to a
+    per instrument slot which always has its latest tick. Each record is guarded by a sequence stamp which
+    is odd while the record is written, so readers detect and retry torn reads instead of taking a lock.
+    There must be only one publisher per buffer.
+
+    Assign a publisher to `KiteTicker.tick_publisher` to publish every decoded frame.
+    """
+
+    # Default number of ticks kept in the ring
+    CAPACITY = 65536
+    # Default maximum number of instruments in the latest tick index
+    MAX_INSTRUMENTS = 8192
+
+    def __init__(self, name=None, capacity=CAPACITY, max_instruments=MAX_INSTRUMENTS):
+        """
+        Create a shared memory tick buffer.
+
+        - `name` is the shared memory block name readers attach to. A random name is used if not given.
+        - `capacity` is the number of ticks kept in the ring before the oldest are overwritten.
+        - `max_instruments` is the maximum number of instruments kept in the latest tick index.
+        """
+        if shared_memory is None:
+            raise ImportError("Shared memory tick buffer requires Python 3.8 or later.")
+
+        # Power of two open addressing table with at most 50% load
+        index_size = 1
+        while index_size < 2 * max_instruments:
+            index_size *= 2
+
+        self.capacity = capacity
+        self.max_instruments = max_instruments
+        self._index_size = index_size
+        self._ring_offset = _HEADER_SIZE
+        self._index_offset = _HEADER_SIZE + capacity * _RECORD_SIZE
+
+        size = self._index_offset + index_size * _INDEX_SLOT_SIZE
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.shm.name
+        self._buf = self.shm.buf
+        _created.add(self.name)
+
+        self._committed = 0
+        self._slots = {}
+        self.ticks_unindexed = 0
+
+        _HEADER.pack_into(self._buf, 0, _MAGIC, _VERSION, capacity, index_size, _RECORD_SIZE, 0)
+
+    def publish(self, ticks):
+        """Write ticks to the ring and the latest tick index."""
+        buf = self._buf
+        committed = self._committed
+
+        for tick in ticks:
+            values = self._values(tick)
+
+            # Ring slot stamps are 2 * sequence + 2 once the record of that sequence is written.
+            offset = self._ring_offset + (committed % self.capacity) * _RECORD_SIZE
+            _STAMP.pack_into(buf, offset, 2 * committed + 1)
+            _TICK.pack_into(buf, offset + _STAMP.size, *values)
+            _STAMP.pack_into(buf, offset, 2 * committed + 2)
+            committed += 1
+
+            offset = self._index_slot(values[0])
+            if offset is not None:
+                stamp = _STAMP.unpack_from(buf, offset)[0]
+                _STAMP.pack_into(buf, offset, stamp + 1)
+                _TICK.pack_into(buf, offset + _STAMP.size, *values)
+                _STAMP.pack_into(buf, offset, stamp + 2)
+
+        # Make the new records visible to readers
+        self._committed = committed
+        _COMMITTED.pack_into(buf, _COMMITTED_OFFSET, committed)
+
+    def close(self, unlink=True):
+        """Detach from the buffer and remove it unless `unlink` is False."""
+        self._buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+            _created.discard(self.name)
+
+    def _index_slot(self, token):
+        """Offset of the record of an instrument in the latest tick index, None if the index is full."""
+        offset = self._slots.get(token)
+        if offset is not None:
+            return offset
+
+        if len(self._slots) >= self.max_instruments:
+            self.ticks_unindexed += 1
+            return None
+
+        # Linear probing from the token's hash slot. Tokens are never removed.
+        mask = self._index_size - 1
+        i = token & mask
+        while True:
+            slot = self._index_offset + i * _INDEX_SLOT_SIZE
+            if _TOKEN.unpack_from(self._buf, slot)[0] == 0:
+                break
+            i = (i + 1) & mask
+
+        # Readers find the slot as soon as the token is written, its stamp stays 0 until the first record is written.
+        offset = slot + _TOKEN.size
+        self._slots[token] = offset
+        _TOKEN.pack_into(self._buf, slot, token)
+        return offset
+
+    def _values(self, tick):
+        """Flatten a tick dict or object to record values."""
+        ohlc = tick.get("ohlc")
+        if ohlc:
+            open_, high, low, close = ohlc["open"], ohlc["high"], ohlc["low"], ohlc["close"]
+        else:
+            open_ = high = low = close = 0.0
+
+        depth = tick.get("depth")
+        if depth:
+            levels = depth["buy"] + depth["sell"]
+            depth_values = tuple([level["quantity"] for level in levels])
+            depth_values += tuple([level["price"] for level in levels])
+            depth_values += tuple([level["orders"] for level in levels])
+        else:
+            depth_values = _EMPTY_DEPTH
+
+        return (
+            tick["instrument_token"],
+            _MODE_CODES[tick["mode"]],
+            (_TRADABLE if tick["tradable"] else 0) | (_HAS_VOLUME if "volume_traded" in tick else 0),
+            tick["last_price"],
+            tick.get("last_traded_quantity", 0),
+            tick.get("average_traded_price", 0.0),
+            tick.get("volume_traded", 0),
+            tick.get("total_buy_quantity", 0),
+            tick.get("total_sell_quantity", 0),
+            open_, high, low, close,
+            tick.get("change", 0.0),
+            _epoch(tick.get("last_trade_time")),
+            _epoch(tick.get("exchange_timestamp")),
+            tick.get("oi", 0),
+            tick.get("oi_day_high", 0),
+            tick.get("oi_day_low", 0)
+        ) + depth_values
+
+
+class TickReader(object):
+    """
+    Read ticks written by a `TickPublisher` in another process.
+
+    Readers never write to the buffer and don't take locks. `read` returns ticks published since the
+    previous call, skipping ticks which were overwritten before they were read (counted in `ticks_lost`).
+    `latest` returns the latest tick of an instrument. Ticks are dicts in the same structure as `on_ticks`
+    ticks, fields which are not part of a tick's mode are left out.
+    """
+
+    # Attempts to read a record which is being written before giving up
+    MAX_RETRIES = 100
+
+    def __init__(self, name, from_start=False):
+        """
+        Attach to a tick buffer.
+
+        - `name` is the shared memory block name of the publisher.
+        - `from_start` reads ticks still in the ring, otherwise only ticks published after attaching are read.
+        """
+        if shared_memory is None:
+            raise ImportError("Shared memory tick buffer requires Python 3.8 or later.")
+
+        self.shm = _attach(name)
+        self._buf = self.shm.buf
+
+        magic, version, capacity, index_size, record_size, committed = _HEADER.unpack_from(self._buf, 0)
+        if magic != _MAGIC or version != _VERSION or record_size != _RECORD_SIZE:
+            self.shm.close()
+            raise ValueError("Shared memory block `{}` is not a compatible tick buffer.".format(name))
+
+        self.capacity = capacity
+        self._index_size = index_size
+        self._ring_offset = _HEADER_SIZE
+        self._index_offset = _HEADER_SIZE + capacity * _RECORD_SIZE
+        self._slots = {}
+
+        self.cursor = max(0, committed - capacity) if from_start else committed
+        self.ticks_lost = 0
+
+    def read(self, max_ticks=None):
+        """List of ticks published since the last read, at most `max_ticks` if given."""
+        committed = _COMMITTED.unpack_from(self._buf, _COMMITTED_OFFSET)[0]
+
+        # Records older than the ring capacity have been overwritten
+        if committed - self.cursor > self.capacity:
+            self.ticks_lost += committed - self.capacity - self.cursor
+            self.cursor = committed - self.capacity
+
+        end = committed if max_ticks is None else min(committed, self.cursor + max_ticks)
+
+        ticks = []
+        while self.cursor < end:
+            seq = self.cursor
+            offset = self._ring_offset + (seq % self.capacity) * _RECORD_SIZE
+            values = self._read_record(offset, 2 * seq + 2)
+            if values is None:
+                # Overwritten while reading
+                self.ticks_lost += 1
+            else:
+                ticks.append(self._tick(values))
+            self.cursor += 1
+
+        return ticks
+
+    def latest(self, instrument_token):
+        """Latest tick of an instrument, None if the publisher hasn't written one."""
+        offset = self._slots.get(instrument_token)
+        if offset is None:
+            offset = self._find_slot(instrument_token)
+            if offset is None:
+                return None
+            self._slots[instrument_token] = offset
+
+        values = self._read_record(offset)
+        return self._tick(values) if values is not None else None
+
+    def close(self):
+        """Detach from the buffer."""
+        self._buf = None
+        self.shm.close()
+
+    def _find_slot(self, token):
+        mask = self._index_size - 1
+        i = token & mask
+        for _ in range(self._index_size):
+            slot = self._index_offset + i * _INDEX_SLOT_SIZE
+            slot_token = _TOKEN.unpack_from(self._buf, slot)[0]
+            if slot_token == token:
+                return slot + _TOKEN.size
+            if slot_token == 0:
+                return None
+            i = (i + 1) & mask
+
+        return None
+
+    def _read_record(self, offset, expected=None):
+        """
+        Read record values at `offset` with a consistent stamp.
+
+        With `expected` the stamp must match it, records with a newer stamp have been overwritten.
+        Returns None if the record can't be read.
+        """
+        buf = self._buf
+        for _ in range(self.MAX_RETRIES):
+            stamp = _STAMP.unpack_from(buf, offset)[0]
+            if stamp == 0 or (expected is not None and stamp > expected):
+                return None
+
+            # Being written
+            if stamp & 1 or (expected is not None and stamp != expected):
+                continue
+
+            values = _TICK.unpack_from(buf, offset + _STAMP.size)
+            if _STAMP.unpack_from(buf, offset)[0] == stamp:
+                return values
+
+        return None
+
+    def _tick(self, values):
+        mode = _MODES[values[1]]
+        tick = {
+            "tradable": bool(values[2] & _TRADABLE),
+            "mode": mode,
+            "instrument_token": values[0],
+            "last_price": values[3]
+        }
+
+        if mode == "ltp":
+            return tick
+
+        tick["ohlc"] = {"open": values[9], "high": values[10], "low": values[11], "close": values[12]}
+        tick["change"] = values[13]
+
+        has_volume = values[2] & _HAS_VOLUME
+        if has_volume:
+            tick["last_traded_quantity"] = values[4]
+            tick["average_traded_price"] = values[5]
+            tick["volume_traded"] = values[6]
+            tick["total_buy_quantity"] = values[7]
+            tick["total_sell_quantity"] = values[8]
+
+        if mode == "full":
+            tick["exchange_timestamp"] = _datetime(values[15])
+            if has_volume:
+                tick["last_trade_time"] = _datetime(values[14])
+                tick["oi"] = values[16]
+                tick["oi_day_high"] = values[17]
+                tick["oi_day_low"] = values[18]
+
+                quantity, price, orders = values[19:29], values[29:39], values[39:49]
+                levels = [{"quantity": quantity[i], "price": price[i], "orders": orders[i]} for i in range(10)]
+                tick["depth"] = {"buy": levels[:5], "sell": levels[5:]}
+
+        return tick
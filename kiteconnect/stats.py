@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+    stats.py
+
+    Fixed size histograms for ticker latency instrumentation.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import math
+import threading
+
+# Buckets per power of two. Values are reported within about 1/16 of their size.
+_SUB_BUCKETS = 16
+# Smallest and largest power of two with their own buckets, about 1e-6 and 1e12.
+_MIN_EXPONENT = -20
+_MAX_EXPONENT = 40
+_BUCKETS = (_MAX_EXPONENT - _MIN_EXPONENT) * _SUB_BUCKETS
+
+
+class Histogram(object):
+    """
+    Histogram of non-negative values with log-linear buckets.
+
+    Recording a value only increments a bucket, so it costs the same no matter how many values were recorded and
+    needs no memory after initialisation. Percentiles are the upper bound of the bucket they fall in, which is
+    within about 6% of the actual value.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, value):
+        """Add a value."""
+        if value > 0:
+            mantissa, exponent = math.frexp(value)
+            index = (exponent - _MIN_EXPONENT) * _SUB_BUCKETS + int((mantissa - 0.5) * 2 * _SUB_BUCKETS)
+            index = min(max(index, 0), _BUCKETS - 1)
+        else:
+            value = 0
+            index = 0
+
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, q):
+        """Value below which `q` percent of the recorded values are. 0 if there are none."""
+        if not self.count:
+            return 0
+
+        rank = max(1, int(math.ceil(self.count * q / 100.0)))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(_upper_bound(index), self.max)
+
+        return self.max
+
+    def reset(self):
+        """Forget recorded values."""
+        with self._lock:
+            self._counts = [0] * _BUCKETS
+            self.count = 0
+            self.total = 0
+            self.max = 0
+
+    def to_dict(self):
+        """Dict of count, mean, p50, p90, p99 and max."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max
+        }
+
+
+def _upper_bound(index):
+    exponent, sub_bucket = divmod(index, _SUB_BUCKETS)
+    return math.ldexp(0.5 + (sub_bucket + 1) / (2.0 * _SUB_BUCKETS), exponent + _MIN_EXPONENT)
+
+
+class TickerStats(object):
+    """
+    Latency histograms of a ticker. Times are in milliseconds and sizes in bytes.
+
+    - `exchange_latency` is the time from a tick's `exchange_timestamp` to its frame being decoded. Exchange timestamps
+        have a resolution of a second, so it's only meaningful in aggregate.
+    - `decode_time` is the time taken to decode a frame.
+    - `handler_time` is the time spent in `on_ticks` for a frame.
+    - `frame_size` is the size of binary frames.
+    """
+
+    _NAMES = ("exchange_latency", "decode_time", "handler_time", "frame_size")
+
+    def __init__(self):
+        self.exchange_latency = Histogram()
+        self.decode_time = Histogram()
+        self.handler_time = Histogram()
+        self.frame_size = Histogram()
+
+    def to_dict(self):
+        """Dict of histogram dicts keyed by name."""
+        return dict((name, getattr(self, name).to_dict()) for name in self._NAMES)
+
+    def reset(self):
+        """Forget recorded values of all histograms."""
+        for name in self._NAMES:
+            getattr(self, name).reset()
+
+    def summary(self):
+        """One line summary for logs."""
+        parts = []
+        for name in self._NAMES:
+            histogram = getattr(self, name)
+            unit = "B" if name == "frame_size" else "ms"
+            parts.append("{name} p50={p50:.3f}{unit} p99={p99:.3f}{unit} max={max:.3f}{unit}".format(
+                name=name, p50=histogram.percentile(50), p99=histogram.percentile(99), max=histogram.max, unit=unit))
+
+        return "frames={}, {}".format(self.frame_size.count, ", ".join(parts))
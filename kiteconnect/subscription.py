@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+    subscription.py
+
+    Turn subscription changes into the fewest ticker messages.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import threading
+
+# Mode in which tokens are subscribed, `KiteTicker.MODE_QUOTE`
+MODE_QUOTE = "quote"
+
+_ACTION_SUBSCRIBE = "subscribe"
+_ACTION_UNSUBSCRIBE = "unsubscribe"
+_ACTION_MODE = "mode"
+
+
+class SubscriptionBatcher(object):
+    """
+    Track which subscriptions the server has and build messages for the difference from the wanted subscriptions.
+
+    Changes are marked with `changed` as they are made to the wanted subscriptions, a dict of instrument token to
+    mode like `KiteTicker.subscribed_tokens`. `messages` then diffs only the changed tokens against what was already
+    sent, so changes which cancel out or repeat the current state send nothing, and merges everything into at most
+    one unsubscribe, one subscribe and one mode message per mode. Messages are split into chunks of at most
+    `chunk_size` tokens to keep frames under the server's size limit.
+    """
+
+    # Default maximum number of tokens in a message
+    CHUNK_SIZE = 1000
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        """
+        Initialise batcher.
+
+        - `chunk_size` is the maximum number of tokens in a message.
+        """
+        if chunk_size < 1:
+            raise ValueError("`chunk_size` should be at least 1.")
+
+        self.chunk_size = chunk_size
+
+        # Mode of tokens as sent to the server
+        self._sent = {}
+        # Tokens changed since the last messages, in the order they were changed
+        self._dirty = {}
+        self._lock = threading.Lock()
+
+    def changed(self, instrument_tokens):
+        """Mark tokens whose wanted subscription has changed."""
+        with self._lock:
+            for token in instrument_tokens:
+                self._dirty[token] = None
+
+    def pending(self):
+        """Check if there are changes which haven't been turned into messages."""
+        return bool(self._dirty)
+
+    def reset(self, subscribed_tokens):
+        """Forget what was sent, for a new connection which has no subscriptions. All wanted tokens are sent again."""
+        with self._lock:
+            self._sent = {}
+            self._dirty = dict.fromkeys(subscribed_tokens)
+
+    def messages(self, subscribed_tokens):
+        """
+        List of `(action, value)` messages which bring the server to `subscribed_tokens`.
+
+        The changes are considered sent once this returns.
+
+        - `subscribed_tokens` is a dict of wanted modes keyed by instrument token.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            sent = self._sent
+
+            unsubscribe = []
+            subscribe = []
+            modes = {}
+
+            for token in dirty:
+                mode = subscribed_tokens.get(token)
+                current = sent.get(token)
+                if mode == current:
+                    continue
+
+                if mode is None:
+                    unsubscribe.append(token)
+                    del sent[token]
+                    continue
+
+                # Tokens are subscribed in quote mode
+                if current is None:
+                    subscribe.append(token)
+                    current = MODE_QUOTE
+
+                if mode != current:
+                    modes.setdefault(mode, []).append(token)
+
+                sent[token] = mode
+
+        messages = []
+        for tokens in self._chunks(unsubscribe):
+            messages.append((_ACTION_UNSUBSCRIBE, tokens))
+        for tokens in self._chunks(subscribe):
+            messages.append((_ACTION_SUBSCRIBE, tokens))
+        for mode, tokens in modes.items():
+            for chunk in self._chunks(tokens):
+                messages.append((_ACTION_MODE, [mode, chunk]))
+
+        return messages
+
+    def _chunks(self, tokens):
+        for start in range(0, len(tokens), self.chunk_size):
+            yield tokens[start:start + self.chunk_size]
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+    tick.py
+
+    Slotted tick objects used by `KiteTicker` when `tick_format` is "object" and for lazily decoded depth.
+
+    :copyright: (c) 2021 by Zerodha Technology Pvt. Ltd.
+    :license: see LICENSE for details.
+"""
+import struct
+from array import array
+
+# Ten depth levels of quantity, price, orders and 2 bytes of padding each.
+DEPTH_LEVEL_FORMAT = "IIH2x"
+_DEPTH_LEVELS = struct.Struct(">" + DEPTH_LEVEL_FORMAT * 10)
+
+
+class _Record(object):
+    """
+    Base class for slotted tick records.
+
+    Fields can be read as attributes or with dict style access (`tick["last_price"]`) so
+    handlers written for dict ticks keep working. Fields which are not part of a tick's mode are not set.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and hasattr(self, key)
+
+    def get(self, key, default=None):
+        """Get field value or `default` if the field is not set."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        """List of fields set on this record."""
+        return [key for key in self.__slots__ if hasattr(self, key)]
+
+    def to_dict(self):
+        """Convert to the dict structure passed to `on_ticks` in the default tick format."""
+        d = {}
+        for key in self.keys():
+            value = getattr(self, key)
+            if isinstance(value, _Record):
+                value = value.to_dict()
+            elif isinstance(value, list):
+                # Depth changes
+                value = [v.to_dict() if isinstance(v, _Record) else v for v in value]
+            d[key] = value
+        return d
+
+    def __eq__(self, other):
+        if isinstance(other, _Record):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, self.to_dict())
+
+
+class OHLC(_Record):
+    """Open, high, low and close prices of a tick."""
+
+    __slots__ = ("open", "high", "low", "close")
+
+    def __init__(self, open, high, low, close):
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+
+
+class Depth(_Record):
+    """
+    Five levels of bids and offers of a full mode tick, decoded lazily.
+
+    Only the raw depth bytes of the packet are kept until a level is first read, so ticks whose
+    depth is never looked at don't pay for decoding it. Levels are kept in flat arrays of ten entries,
+    the first five are bids and the last five are offers. `buy` and `sell` build the list of
+    `{"quantity", "price", "orders"}` dicts of the dict tick format.
+    """
+
+    __slots__ = ("_raw", "_divisor", "_quantity", "_price", "_orders")
+
+    LEVELS = 5
+
+    def __init__(self, raw, divisor):
+        """
+        Initialise depth from the raw packet bytes.
+
+        - `raw` is the 120 bytes of depth entries of a full mode packet.
+        - `divisor` is the price divisor of the instrument's segment.
+        """
+        self._raw = raw
+        self._divisor = divisor
+        self._quantity = None
+        self._price = None
+        self._orders = None
+
+    def _decode(self):
+        raw = self._raw
+        # Already decoded by another thread, raw bytes are dropped only after all levels are set.
+        if raw is None:
+            return
+
+        fields = _DEPTH_LEVELS.unpack(raw)
+        divisor = self._divisor
+
+        self._quantity = array("I", fields[0::3])
+        self._price = array("d", [p / divisor for p in fields[1::3]])
+        self._orders = array("H", fields[2::3])
+        self._raw = None
+
+    @property
+    def quantity(self):
+        """Quantities of all ten levels."""
+        if self._quantity is None:
+            self._decode()
+        return self._quantity
+
+    @property
+    def price(self):
+        """Prices of all ten levels."""
+        if self._price is None:
+            self._decode()
+        return self._price
+
+    @property
+    def orders(self):
+        """Number of orders of all ten levels."""
+        if self._orders is None:
+            self._decode()
+        return self._orders
+
+    @property
+    def buy(self):
+        """Bid levels, best first."""
+        return self._levels(0, self.LEVELS)
+
+    @property
+    def sell(self):
+        """Offer levels, best first."""
+        return self._levels(self.LEVELS, 2 * self.LEVELS)
+
+    def _levels(self, start, end):
+        quantity, price, orders = self.quantity, self.price, self.orders
+        return [{
+            "quantity": quantity[i],
+            "price": price[i],
+            "orders": orders[i]
+        } for i in range(start, end)]
+
+    def __getitem__(self, key):
+        if key in ("buy", "sell", "quantity", "price", "orders"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in ("buy", "sell")
+
+    def keys(self):
+        return ["buy", "sell"]
+
+    def to_dict(self):
+        return {"buy": self.buy, "sell": self.sell}
+
+
+class DepthChange(_Record):
+    """A depth level which changed since the previous tick of an instrument, with `KiteTicker(depth_delta=True)`."""
+
+    __slots__ = ("side", "level", "quantity", "price", "orders")
+
+    def __init__(self, side, level, quantity, price, orders):
+        self.side = side
+        self.level = level
+        self.quantity = quantity
+        self.price = price
+        self.orders = orders
+
+
+class Tick(_Record):
+    """A decoded tick. Check `KiteTicker` for the fields available in each mode."""
+
+    __slots__ = (
+        "tradable",
+        "mode",
+        "instrument_token",
+        "last_price",
+        "last_traded_quantity",
+        "average_traded_price",
+        "volume_traded",
+        "total_buy_quantity",
+        "total_sell_quantity",
+        "ohlc",
+        "change",
+        "last_trade_time",
+        "oi",
+        "oi_day_high",
+        "oi_day_low",
+        "exchange_timestamp",
+        "depth",
+        "depth_changes"
+    )
@@ -14,6 +14,7 @@ import json
 import struct
 import logging
 import threading
+from functools import partial
 from datetime import datetime
 from twisted.internet import reactor, ssl
 from twisted.python import log as twisted_log
@@ -22,9 +23,40 @@ from autobahn.twisted.websocket import WebSocketClientProtocol, \
     WebSocketClientFactory, connectWS
 
 from .__version__ import __version__, __title__
+from . import columnar
+from .conflation import TickConflator
+from .liveness import LivenessMonitor
+from .orders import OrderStateCache, parse_text_message
+from .pipeline import TickPipeline
+from .reconnect import ReconnectPolicy
+from .stats import TickerStats
+from .subscription import SubscriptionBatcher
+from .tick import Tick, OHLC, Depth, DepthChange, DEPTH_LEVEL_FORMAT
 
 log = logging.getLogger(__name__)
 
+# Precompiled big-endian layouts of the binary tick packets, keyed by their sizes in comments.
+_UINT16 = struct.Struct(">H")  # number of packets and packet length
+_TOKEN = struct.Struct(">I")
+_LTP_PACKET = struct.Struct(">II")  # 8 bytes
+_INDEX_QUOTE_PACKET = struct.Struct(">7I")  # 28 bytes
+_INDEX_FULL_PACKET = struct.Struct(">8I")  # 32 bytes
+_QUOTE_PACKET = struct.Struct(">11I")  # 44 bytes
+# 64 bytes of quote, timestamp and OI fields followed by 10 depth levels of
+# quantity, price, orders and 2 bytes of padding each.
+_FULL_PACKET = struct.Struct(">16I" + DEPTH_LEVEL_FORMAT * 10)  # 184 bytes
+# Leading 64 bytes of a full packet, used when depth is decoded lazily.
+_FULL_PACKET_HEADER = struct.Struct(">16I")
+_DEPTH_OFFSET = 64
+# Trailing 120 bytes of a full packet, used to compare depth with the previous tick.
+_DEPTH_LEVELS = struct.Struct(">" + DEPTH_LEVEL_FORMAT * 10)
+
+# Price divisors for segments which don't use the default of 100 (cds and bcd).
+_SEGMENT_DIVISORS = {
+    3: 10000000.0,
+    6: 10000.0
+}
+
 
 class KiteTickerClientProtocol(WebSocketClientProtocol):
     """Kite ticker autobahn WebSocket protocol."""
@@ -32,10 +64,7 @@ class KiteTickerClientProtocol(WebSocketClientProtocol):
     PING_INTERVAL = 2.5
     KEEPALIVE_INTERVAL = 5
 
-    _next_ping = None
-    _next_pong_check = None
-    _last_pong_time = None
-    _last_ping_time = None
+    _next_heartbeat = None
 
     def __init__(self, *args, **kwargs):
         """Initialize protocol with all options passed from factory."""
@@ -55,10 +84,9 @@ class KiteTickerClientProtocol(WebSocketClientProtocol):
     # Overide method
     def onOpen(self):  # noqa
         """Called when the initial WebSocket opening handshake was completed."""
-        # send ping
-        self._loop_ping()
-        # init last pong check after X seconds
-        self._loop_pong_check()
+        # Start liveness checks
+        self.factory.liveness.reset(time.monotonic())
+        self._next_heartbeat = self.factory.reactor.callLater(self.PING_INTERVAL, self._loop_heartbeat)
 
         if self.factory.on_open:
             self.factory.on_open(self)
@@ -66,6 +94,9 @@ class KiteTickerClientProtocol(WebSocketClientProtocol):
     # Overide method
     def onMessage(self, payload, is_binary):  # noqa
         """Called when text or binary message is received."""
+        # Any frame proves the connection is alive
+        self.factory.liveness.frame_received(time.monotonic())
+
         if self.factory.on_message:
             self.factory.on_message(self, payload, is_binary)
 
@@ -79,60 +110,45 @@ class KiteTickerClientProtocol(WebSocketClientProtocol):
         if self.factory.on_close:
             self.factory.on_close(self, code, reason)
 
-        # Cancel next ping and timer
-        self._last_ping_time = None
-        self._last_pong_time = None
-
-        if self._next_ping:
-            self._next_ping.cancel()
-
-        if self._next_pong_check:
-            self._next_pong_check.cancel()
+        # Cancel next liveness check
+        if self._next_heartbeat and self._next_heartbeat.active():
+            self._next_heartbeat.cancel()
 
     def onPong(self, response):  # noqa
         """Called when pong message is received."""
-        if self._last_pong_time and self.factory.debug:
-            log.debug("last pong was {} seconds back.".format(time.time() - self._last_pong_time))
-
-        self._last_pong_time = time.time()
+        rtt = self.factory.liveness.pong_received(time.monotonic())
 
         if self.factory.debug:
-            log.debug("pong => {}".format(response))
+            log.debug("pong => {}, round trip time: {} ms".format(response, rtt))
 
     """
     Custom helper and exposed methods.
     """
 
-    def _loop_ping(self):  # noqa
-        """Start a ping loop where it sends ping message every X seconds."""
-        if self.factory.debug:
-            if self._last_ping_time:
-                log.debug("last ping was {} seconds back.".format(time.time() - self._last_ping_time))
-
-        # Set current time as last ping time
-        self._last_ping_time = time.time()
-
-        # Call self after X seconds
-        self._next_ping = self.factory.reactor.callLater(self.PING_INTERVAL, self._loop_ping)
-
-    def _loop_pong_check(self):
+    def _loop_heartbeat(self):
         """
-        Timer sortof to check if connection is still there.
+        Check liveness every `PING_INTERVAL` seconds with a single timer.
 
-        Checks last pong message time and disconnects the existing connection to make sure it doesn't become a ghost connection.
+        Pings the connection when it's idle or round trip time is due, and drops it when nothing was received
+        for long after a ping so that it doesn't become a ghost connection.
         """
-        if self._last_pong_time:
-            # No pong message since long time, so init reconnect
-            last_pong_diff = time.time() - self._last_pong_time
-            if last_pong_diff > (2 * self.PING_INTERVAL):
-                if self.factory.debug:
-                    log.debug("Last pong was {} seconds ago. So dropping connection to reconnect.".format(
-                        last_pong_diff))
-                # drop existing connection to avoid ghost connection
-                self.dropConnection(abort=True)
+        liveness = self.factory.liveness
+        now = time.monotonic()
+        action = liveness.check(now)
+
+        if action == liveness.DEAD:
+            if self.factory.debug:
+                log.debug("Nothing received for {} seconds after a ping. So dropping connection to reconnect.".format(
+                    now - liveness.last_received))
+            # drop existing connection to avoid ghost connection
+            self.dropConnection(abort=True)
+            return
+
+        if action == liveness.PING:
+            self.sendPing()
+            liveness.ping_sent(now)
 
-        # Call self after X seconds
-        self._next_pong_check = self.factory.reactor.callLater(self.PING_INTERVAL, self._loop_pong_check)
+        self._next_heartbeat = self.factory.reactor.callLater(self.PING_INTERVAL, self._loop_heartbeat)
 
 
 class KiteTickerClientFactory(WebSocketClientFactory, ReconnectingClientFactory):
@@ -144,10 +160,14 @@ class KiteTickerClientFactory(WebSocketClientFactory, ReconnectingClientFactory)
 
     _last_connection_time = None
 
+    # Delays between attempts, Twisted's exponential backoff if not set
+    reconnect_policy = None
+
     def __init__(self, *args, **kwargs):
         """Initialize with default callback method values."""
         self.debug = False
         self.ws = None
+        self.liveness = LivenessMonitor(interval=KiteTickerClientProtocol.PING_INTERVAL)
         self.on_open = None
         self.on_error = None
         self.on_close = None
@@ -189,6 +209,25 @@ class KiteTickerClientFactory(WebSocketClientFactory, ReconnectingClientFactory)
         self.retry(connector)
         self.send_noreconnect()
 
+    def retry(self, connector=None):
+        """Schedule the next attempt with the delay given by `reconnect_policy`."""
+        if self.reconnect_policy is None:
+            return ReconnectingClientFactory.retry(self, connector)
+
+        self.jitter = 0
+        delay = self.delay = self.reconnect_policy.next_delay()
+        ReconnectingClientFactory.retry(self, connector)
+
+        # Backoff of the base class doesn't apply
+        self.delay = delay
+
+    def resetDelay(self):  # noqa
+        """Reset retries after a successful connection."""
+        ReconnectingClientFactory.resetDelay(self)
+
+        if self.reconnect_policy is not None:
+            self.reconnect_policy.reset()
+
     def send_noreconnect(self):
         """Callback `no_reconnect` if max retries are exhausted."""
         if self.maxRetries is not None and (self.retries > self.maxRetries):
@@ -201,6 +240,68 @@ class KiteTickerClientFactory(WebSocketClientFactory, ReconnectingClientFactory)
                 self.on_noreconnect()
 
 
+def _parse_binary(bin, tick_format, lazy_depth):
+    """Parse binary data to ticks outside of a connected `KiteTicker`, used by decode worker processes."""
+    key = (tick_format, lazy_depth)
+    if key not in _decoders:
+        _decoders[key] = KiteTicker(None, None, tick_format=tick_format, lazy_depth=lazy_depth)
+
+    return _decoders[key]._parse_binary(bin)
+
+
+# Tickers used only to decode frames in worker processes, keyed by decoding options.
+_decoders = {}
+
+
+class TickStore(object):
+    """
+    Latest tick of each instrument keyed by `instrument_token`.
+
+    The store is only written from the thread which decodes ticks. Reads are single dict
+    operations, so `latest` and `snapshot` are safe to call from any other thread without locking.
+    """
+
+    def __init__(self):
+        """Initialise an empty store."""
+        self._ticks = {}
+
+    def update(self, ticks):
+        """Replace the latest tick of instruments in `ticks`."""
+        store = self._ticks
+        for tick in ticks:
+            store[tick["instrument_token"]] = tick
+
+    def latest(self, instrument_token):
+        """Latest tick of an instrument, None if no tick was received yet."""
+        return self._ticks.get(instrument_token)
+
+    def snapshot(self, instrument_tokens=None):
+        """
+        Dict of latest ticks keyed by instrument token.
+
+        - `instrument_tokens` is the list of tokens to return. Defaults to all instruments in the store.
+            Tokens without a tick yet are left out.
+        """
+        if instrument_tokens is None:
+            return self._ticks.copy()
+
+        ticks = self._ticks
+        snapshot = {}
+        for token in instrument_tokens:
+            tick = ticks.get(token)
+            if tick is not None:
+                snapshot[token] = tick
+
+        return snapshot
+
+    def clear(self):
+        """Remove all ticks."""
+        self._ticks = {}
+
+    def __len__(self):
+        return len(self._ticks)
+
+
 class KiteTicker(object):
     """
     The WebSocket client for connecting to Kite Connect's streaming quotes service.
@@ -248,6 +349,8 @@ class KiteTicker(object):
 
     - `on_ticks(ws, ticks)` -  Triggered when ticks are recevied.
         - `ticks` - List of `tick` object. Check below for sample structure.
+    - `on_ticks_array(ws, ticks)` -  Triggered when ticks are recevied, with ticks decoded column wise. Requires `numpy`.
+        - `ticks` - NumPy structured array of `kiteconnect.columnar.TICK_DTYPE` with one row per tick.
     - `on_close(ws, code, reason)` -  Triggered when connection is closed.
         - `code` - WebSocket standard close event code (https://developer.mozilla.org/en-US/docs/Web/API/CloseEvent)
         - `reason` - DOMString indicating the reason the server closed the connection
@@ -262,6 +365,7 @@ class KiteTicker(object):
     - `on_reconnect(ws, attempts_count)` -  Triggered when auto reconnection is attempted.
         - `attempts_count` - Current reconnect attempt number.
     - `on_noreconnect(ws)` -  Triggered when number of auto reconnection attempts exceeds `reconnect_tries`.
+    - `on_gap(ws, seconds, ticks)` -  Triggered with the seconds without data when ticks resume after a reconnection.
     - `on_order_update(ws, data)` -  Triggered when there is an order update for the connected user.
 
 
@@ -337,20 +441,143 @@ class KiteTicker(object):
         ...,
         ...]
 
+    Latest tick snapshot
+    --------------------
+
+    With `snapshot=True` the latest tick of every instrument is kept in memory as frames are received.
+    `latest(instrument_token)` and `snapshot(instrument_tokens)` read it in constant time per instrument and
+    are safe to call from other threads, so the latest price of a subscribed instrument doesn't have to be
+    tracked in `on_ticks` or fetched over HTTP.
+
+    Conflation
+    ----------
+
+    When `on_ticks` can't keep up with the feed, `conflate=True` keeps only the newest tick of each instrument
+    and calls `on_ticks` from a separate thread with the conflated ticks, at most `conflate_max_rate` times a second.
+    Frames are never queued behind a slow handler. `conflator.stats()` has counters for frames received,
+    ticks dropped by conflation and handler lag.
+
+    Decoding off the reactor thread
+    -------------------------------
+
+    By default frames are decoded and `on_ticks` is called on the Twisted reactor thread, so heavy frames and slow
+    handlers delay ping/pong handling. With `decode_workers` set, the reactor thread only hands frames to a pool of
+    `decode_workers` threads (or processes with `decode_executor="process"`) which decode them, and a separate
+    dispatcher thread calls the tick callbacks in the order frames were received. Up to `decode_queue_size` frames can
+    wait to be dispatched, frames received while it's full are dropped and counted in `pipeline.stats()`.
+
+    Sharing ticks with other processes
+    ----------------------------------
+
+    A `kiteconnect.ringbuffer.TickPublisher` assigned to `tick_publisher` writes every decoded tick to a shared memory
+    ring buffer, which any number of local processes read with `kiteconnect.ringbuffer.TickReader` without locks.
+    This fans out one connection to many processes. Requires Python 3.8 or later.
+
+        #!python
+        kws.tick_publisher = TickPublisher(name="kite-ticks")
+
+        # In another process
+        reader = TickReader("kite-ticks")
+        ticks = reader.read()
+        tick = reader.latest(738561)
+
+    Latency statistics
+    ------------------
+
+    With `latency_stats=True` every frame is recorded in histograms of exchange to decode latency, decoding time, time
+    spent in `on_ticks` and frame size, so that a lag spike can be traced to the exchange, the network, decoding or the
+    handler. `stats()` returns their count, mean, percentiles and max, and `stats_log_interval` logs a summary periodically.
+    Nothing is recorded when it's disabled.
+
+    Liveness
+    --------
+
+    Any frame received proves the connection is alive, so it's only pinged when idle, and dropped to reconnect when nothing
+    is received for `2 * PING_INTERVAL` seconds after a ping. A ping is also sent every few seconds while data flows to measure round trip
+    time. `liveness.rtt_window()` has the recent round trip times in milliseconds, a network latency signal independent of
+    exchange timestamps, and `stats()["liveness"]` summarises them.
+
+    Order updates
+    -------------
+
+    Order updates are merged into the latest state of each order, read with `get_order_state(order_id)` instead of polling
+    `KiteConnect.orders()`. Text messages which aren't order updates or errors are skipped before they're parsed, and
+    `orjson` or `ujson` are used to parse them when installed.
+
+    Depth deltas
+    ------------
+
+    Consecutive full mode ticks of an instrument mostly change only a few of the ten depth levels. With `depth_delta=True`
+    full mode ticks have `depth_changes` instead of `depth`, a list of the levels which differ from the previous tick of the
+    instrument, each with `side` (`buy` or `sell`), `level` (0 to 4), `quantity`, `price` and `orders`. The first tick of an
+    instrument has all ten levels and a tick whose depth didn't change has an empty list, so a local order book is kept
+    current by applying the changes. After a reconnect, an unsubscription or a change to another mode the next tick of
+    an instrument has all ten levels again.
+
+    Candles
+    -------
+
+    A `kiteconnect.candles.CandleBuilder` assigned to `candles` keeps forming and last closed OHLCV candles of every
+    instrument for 1, 3, 5 and 15 minute intervals (or others) as ticks arrive, and passes closed candles to its
+    `on_candle` callback, instead of fetching the latest candle with `KiteConnect.historical_data`.
+
+        #!python
+        kws.candles = CandleBuilder(on_candle=on_candle)
+
+    Listeners
+    ---------
+
+    `add_listener(instrument_tokens, callback)` calls `callback(ws, ticks)` with the ticks of only those instruments, so that
+    handlers of a few instruments each don't filter every tick. Packets of instruments nobody listens to aren't decoded
+    unless `on_ticks` or another consumer needs every tick.
+
+        #!python
+        kws.add_listener([738561], on_reliance_ticks)
+        kws.add_listener([5633, 738561], on_strategy_ticks)
+
+    Multiple connections
+    --------------------
+
+    A connection can only subscribe to a limited number of instruments. `kiteconnect.pool.KiteTickerPool` spreads
+    subscriptions over several connections sharing the reactor, moves instruments of dropped connections to open
+    ones and delivers ticks of all connections to a single `on_ticks` callback.
+
+    Recording and replay
+    --------------------
+
+    A `kiteconnect.replay.TickRecorder` assigned to `recorder` appends every binary frame with its receive time to a file.
+    `kiteconnect.replay.TickReplayer` feeds a recording back through a ticker's decoding and callbacks, as fast as
+    possible or at the recorded pace, without a connection.
+
+        #!python
+        kws.recorder = TickRecorder("session.ticks")
+
+        # Later, to backtest or profile handlers
+        TickReplayer("session.ticks").replay(kws)
+
+    Tick objects
+    ------------
+
+    With `tick_format="object"` ticks are `kiteconnect.tick.Tick` objects with `__slots__` instead of dicts.
+    Fields can be read as attributes (`tick.last_price`, `tick.ohlc.close`) or with the same dict style access
+    (`tick["ohlc"]["close"]`, `tick["depth"]["buy"][0]["price"]`), and `tick.to_dict()` returns the structure above.
+    Market depth is decoded only when it's first read, which saves most of the decoding cost of full mode ticks
+    for handlers that don't look at depth. Dict ticks can have the same with `lazy_depth=True`.
+
     Auto reconnection
     -----------------
 
     Auto reconnection is enabled by default and it can be disabled by passing `reconnect` param while initialising `KiteTicker`.
     On a side note, reconnection mechanism cannot happen if event loop is terminated using `stop` method inside `on_close` callback.
 
-    Auto reonnection mechanism is based on [Exponential backoff](https://en.wikipedia.org/wiki/Exponential_backoff) algorithm in which
-    next retry interval will be increased exponentially. `reconnect_max_delay` and `reconnect_max_tries` params can be used to tewak
-    the alogrithm where `reconnect_max_delay` is the maximum delay after which subsequent reconnection interval will become constant and
-    `reconnect_max_tries` is maximum number of retries before its quiting reconnection.
+    The first reconnection attempt after a drop is made right away. Later attempts wait a random delay which grows
+    with every attempt ([decorrelated jitter](https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/))
+    up to `reconnect_max_delay` seconds, and reconnection stops after `reconnect_max_tries` attempts. Pass a
+    `kiteconnect.reconnect.ReconnectPolicy` as `reconnect_policy` to change the delays.
 
-    For example if `reconnect_max_delay` is 60 seconds and `reconnect_max_tries` is 50 then the first reconnection interval starts from
-    minimum interval which is 2 seconds and keep increasing up to 60 seconds after which it becomes constant and when reconnection attempt
-    is reached upto 50 then it stops reconnecting.
+    Subscriptions are sent again as soon as the connection is back. When the first frame arrives, `on_gap(ws, seconds, ticks)`
+    is called with the number of seconds without data and the latest tick of each instrument before the drop, so that a
+    price which didn't change can be told apart from one which wasn't received. `ticks_before_drop` keeps the same ticks.
 
     method `stop_retry` can be used to stop ongoing reconnect attempts and `on_reconnect` callback will be called with current reconnect
     attempt and `on_noreconnect` is called when reconnection attempts reaches max retries.
@@ -386,6 +613,13 @@ class KiteTicker(object):
     MODE_QUOTE = "quote"
     MODE_LTP = "ltp"
 
+    # Default number of times a second conflated ticks are passed to `on_ticks`
+    CONFLATE_MAX_RATE = 10
+
+    # Formats in which ticks are passed to `on_ticks`.
+    TICK_FORMAT_DICT = "dict"
+    TICK_FORMAT_OBJECT = "object"
+
     # Flag to set if its first connect
     _is_first_connect = True
 
@@ -402,7 +636,11 @@ class KiteTicker(object):
 
     def __init__(self, api_key, access_token, debug=False, root=None,
                  reconnect=True, reconnect_max_tries=RECONNECT_MAX_TRIES, reconnect_max_delay=RECONNECT_MAX_DELAY,
-                 connect_timeout=CONNECT_TIMEOUT):
+                 connect_timeout=CONNECT_TIMEOUT, tick_format=TICK_FORMAT_DICT, lazy_depth=False,
+                 snapshot=False, conflate=False, conflate_max_rate=CONFLATE_MAX_RATE,
+                 decode_workers=0, decode_executor=TickPipeline.EXECUTOR_THREAD, decode_queue_size=TickPipeline.QUEUE_SIZE,
+                 subscribe_window=0, subscribe_chunk_size=SubscriptionBatcher.CHUNK_SIZE, reconnect_policy=None,
+                 latency_stats=False, stats_log_interval=0, depth_delta=False):
         """
         Initialise websocket client instance.
 
@@ -419,6 +657,26 @@ class KiteTicker(object):
         - `reconnect_max_delay` in seconds is the maximum delay after which subsequent reconnection interval will become constant. Defaults to 60s and minimum acceptable value is 5s.
         - `reconnect_max_tries` is maximum number reconnection attempts. Defaults to 50 attempts and maximum up to 300 attempts.
         - `connect_timeout` in seconds is the maximum interval after which connection is considered as timeout. Defaults to 30s.
+        - `tick_format` is the type of ticks passed to `on_ticks`. `dict` (default) or `object` for
+            slotted `kiteconnect.tick.Tick` objects which support the same dict style access with far fewer allocations.
+        - `lazy_depth` decodes market depth of full mode dict ticks only when it's first read. `tick["depth"]` is then a
+            `kiteconnect.tick.Depth` which supports the same `["buy"]` and `["sell"]` access. Tick objects are always lazy.
+        - `snapshot` keeps the latest tick of each instrument which can be read with `latest` and `snapshot` methods.
+        - `conflate` calls `on_ticks` from a separate thread with only the newest tick of each instrument received since the last call.
+        - `conflate_max_rate` is the maximum number of times a second `on_ticks` is called with conflated ticks. Defaults to 10.
+        - `decode_workers` is the number of workers which decode frames off the reactor thread. Defaults to 0, which decodes
+            frames and calls tick callbacks on the reactor thread.
+        - `decode_executor` is the type of decode workers, `thread` (default) or `process`.
+        - `decode_queue_size` is the maximum number of frames waiting to be dispatched when decoding off the reactor thread.
+        - `subscribe_window` in seconds merges subscription changes made within the window into one set of messages.
+            Defaults to 0, which sends changes right away.
+        - `subscribe_chunk_size` is the maximum number of tokens in a subscription message. Defaults to 1000.
+        - `reconnect_policy` is a `kiteconnect.reconnect.ReconnectPolicy` which gives the delays between reconnection attempts.
+            Defaults to one which retries right away and then backs off up to `reconnect_max_delay`.
+        - `latency_stats` records latency histograms of every frame, read with the `stats` method.
+        - `stats_log_interval` in seconds logs a summary of the latency histograms at this interval. Defaults to 0, which doesn't log.
+        - `depth_delta` replaces `depth` of full mode ticks with `depth_changes`, the levels which changed since the
+            previous tick of the instrument. Can't be used with `decode_workers` or `conflate`.
         """
         self.root = root or self.ROOT_URI
 
@@ -439,6 +697,24 @@ class KiteTicker(object):
             self.reconnect_max_delay = reconnect_max_delay
 
         self.connect_timeout = connect_timeout
+        self.reconnect_policy = reconnect_policy or ReconnectPolicy(max_delay=self.reconnect_max_delay)
+
+        if tick_format not in (self.TICK_FORMAT_DICT, self.TICK_FORMAT_OBJECT):
+            raise ValueError("Invalid `tick_format`: {}. Use `dict` or `object`.".format(tick_format))
+
+        self.tick_format = tick_format
+        self.lazy_depth = lazy_depth
+
+        # Depth is compared with the previous tick in the order frames are received, not on decode workers.
+        if depth_delta and decode_workers:
+            raise ValueError("`depth_delta` can't be used with `decode_workers`.")
+        # Conflation would drop the changes of every tick but the newest.
+        if depth_delta and conflate:
+            raise ValueError("`depth_delta` can't be used with `conflate`.")
+
+        self.depth_delta = depth_delta
+        # Depth levels of the last full mode tick of each instrument
+        self._depth_books = {}
 
         self.socket_url = "{root}?api_key={api_key}"\
             "&access_token={access_token}".format(
@@ -455,6 +731,7 @@ class KiteTicker(object):
 
         # Placeholders for callbacks.
         self.on_ticks = None
+        self.on_ticks_array = None
         self.on_open = None
         self.on_close = None
         self.on_error = None
@@ -462,13 +739,71 @@ class KiteTicker(object):
         self.on_message = None
         self.on_reconnect = None
         self.on_noreconnect = None
+        self.on_gap = None
 
         # Text message updates
         self.on_order_update = None
 
+        # Latest state of orders from order updates
+        self.order_states = OrderStateCache()
+
         # List of current subscribed tokens
         self.subscribed_tokens = {}
 
+        # Tick listeners keyed by instrument token
+        self._listeners = {}
+
+        # Builds subscription messages from changes to `subscribed_tokens`
+        self.subscribe_window = subscribe_window
+        self._subscriptions = SubscriptionBatcher(chunk_size=subscribe_chunk_size)
+        self._subscriptions_scheduled = False
+
+        # Latest tick of each instrument
+        self.tick_store = TickStore() if snapshot else None
+
+        # Publishes ticks to other processes
+        self.tick_publisher = None
+
+        # Records binary frames
+        self.recorder = None
+
+        # Builds candles from ticks
+        self.candles = None
+
+        # Pings and round trip times of the connection
+        self.liveness = LivenessMonitor(interval=KiteTickerClientProtocol.PING_INTERVAL)
+
+        # Latency histograms
+        self.latency_stats = TickerStats() if latency_stats else None
+        self.stats_log_interval = stats_log_interval
+        self._stats_logged = time.monotonic()
+        self._exchange_time = (None, 0)
+
+        # Latest tick of each instrument before the connection dropped
+        self.ticks_before_drop = {}
+        self._last_frame_time = None
+        self._gap_since = None
+
+        # Conflates ticks for slow `on_ticks` handlers
+        self.conflator = TickConflator(self._on_conflated_ticks, max_rate=conflate_max_rate) if conflate else None
+
+        # Decodes frames off the reactor thread
+        self.pipeline = None
+        # Whether the pipeline's decoder takes the time a frame was received at to measure exchange latency
+        self._pipeline_takes_received = False
+        if decode_workers:
+            if decode_executor == TickPipeline.EXECUTOR_PROCESS:
+                # Bound methods of the ticker can't be sent to other processes
+                decode = partial(_parse_binary, tick_format=tick_format, lazy_depth=lazy_depth)
+            else:
+                decode = self._decode
+                self._pipeline_takes_received = True
+
+            self.pipeline = TickPipeline(decode, self._on_ticks_payload,
+                                         workers=decode_workers,
+                                         executor=decode_executor,
+                                         queue_size=decode_queue_size)
+
     def _create_connection(self, url, **kwargs):
         """Create a WebSocket client connection."""
         self.factory = KiteTickerClientFactory(url, **kwargs)
@@ -488,6 +823,8 @@ class KiteTicker(object):
         self.factory.on_noreconnect = self._on_noreconnect
 
         self.factory.maxDelay = self.reconnect_max_delay
+        self.factory.reconnect_policy = self.reconnect_policy
+        self.factory.liveness = self.liveness
         self.factory.maxRetries = self.reconnect_max_tries
 
     def _user_agent(self):
@@ -501,6 +838,18 @@ class KiteTicker(object):
         - `disable_ssl_verification` disables building ssl context
         - `proxy` is a dictionary with keys `host` and `port` which denotes the proxy settings
         """
+        self._connect_ws(disable_ssl_verification=disable_ssl_verification, proxy=proxy)
+        self._run_reactor(threaded=threaded)
+
+    def _connect_ws(self, disable_ssl_verification=False, proxy=None):
+        """Start connecting on the reactor without running it, so that several tickers can share it."""
+        if self.on_ticks_array and columnar.np is None:
+            raise ImportError("numpy is required for `on_ticks_array` callback. Install it with `pip install numpy`.")
+
+        # Latest ticks are needed to report them with gaps
+        if self.on_gap and self.tick_store is None:
+            self.tick_store = TickStore()
+
         # Custom headers
         headers = {
             "X-Kite-Version": "3",  # For version 3
@@ -522,6 +871,8 @@ class KiteTicker(object):
         if self.debug:
             twisted_log.startLogging(sys.stdout)
 
+    def _run_reactor(self, threaded=False):
+        """Run the reactor if it isn't running yet."""
         # Run in seperate thread of blocking
         opts = {}
 
@@ -553,6 +904,15 @@ class KiteTicker(object):
         self.stop_retry()
         self._close(code, reason)
 
+        if self.conflator is not None:
+            self.conflator.stop()
+
+        if self.pipeline is not None:
+            self.pipeline.stop()
+
+        if self.recorder is not None:
+            self.recorder.close()
+
     def stop(self):
         """Stop the event loop. Should be used if main thread has to be closed in `on_close` method.
         Reconnection mechanism cannot happen past this method
@@ -568,20 +928,16 @@ class KiteTicker(object):
         """
         Subscribe to a list of instrument_tokens.
 
+        Tokens which are already subscribed keep their mode and aren't sent again.
+        Tokens subscribed before connecting are sent once connected.
+
         - `instrument_tokens` is list of instrument instrument_tokens to subscribe
         """
-        try:
-            self.ws.sendMessage(
-                six.b(json.dumps({"a": self._message_subscribe, "v": instrument_tokens}))
-            )
+        for token in instrument_tokens:
+            self.subscribed_tokens.setdefault(token, self.MODE_QUOTE)
 
-            for token in instrument_tokens:
-                self.subscribed_tokens[token] = self.MODE_QUOTE
-
-            return True
-        except Exception as e:
-            self._close(reason="Error while subscribe: {}".format(str(e)))
-            raise
+        self._subscriptions_changed(instrument_tokens, "subscribe")
+        return True
 
     def unsubscribe(self, instrument_tokens):
         """
@@ -589,21 +945,12 @@ class KiteTicker(object):
 
         - `instrument_tokens` is list of instrument_tokens to unsubscribe.
         """
-        try:
-            self.ws.sendMessage(
-                six.b(json.dumps({"a": self._message_unsubscribe, "v": instrument_tokens}))
-            )
-
-            for token in instrument_tokens:
-                try:
-                    del (self.subscribed_tokens[token])
-                except KeyError:
-                    pass
+        for token in instrument_tokens:
+            self.subscribed_tokens.pop(token, None)
+            self._depth_books.pop(token, None)
 
-            return True
-        except Exception as e:
-            self._close(reason="Error while unsubscribe: {}".format(str(e)))
-            raise
+        self._subscriptions_changed(instrument_tokens, "unsubscribe")
+        return True
 
     def set_mode(self, mode, instrument_tokens):
         """
@@ -613,38 +960,125 @@ class KiteTicker(object):
             MODE_LTP, MODE_QUOTE, or MODE_FULL.
         - `instrument_tokens` is list of instrument tokens on which the mode should be applied
         """
-        try:
-            self.ws.sendMessage(
-                six.b(json.dumps({"a": self._message_setmode, "v": [mode, instrument_tokens]}))
-            )
+        # Update modes
+        for token in instrument_tokens:
+            self.subscribed_tokens[token] = mode
+            if mode != self.MODE_FULL:
+                self._depth_books.pop(token, None)
 
-            # Update modes
-            for token in instrument_tokens:
-                self.subscribed_tokens[token] = mode
+        self._subscriptions_changed(instrument_tokens, "setting mode")
+        return True
 
-            return True
+    def resubscribe(self):
+        """Resubscribe to all current subscribed tokens."""
+        if self.debug:
+            log.debug("Resubscribe {} tokens.".format(len(self.subscribed_tokens)))
+
+        self._subscriptions.reset(self.subscribed_tokens)
+        self._send_subscriptions("resubscribe")
+
+    def _subscriptions_changed(self, instrument_tokens, action):
+        """Send subscription changes now, or once `subscribe_window` has passed."""
+        self._subscriptions.changed(instrument_tokens)
+
+        if not self.subscribe_window:
+            self._send_subscriptions(action)
+        elif not self._subscriptions_scheduled:
+            self._subscriptions_scheduled = True
+            reactor.callFromThread(reactor.callLater, self.subscribe_window, self._flush_subscriptions)
+
+    def _flush_subscriptions(self):
+        """Send changes merged over `subscribe_window`, on the reactor thread."""
+        self._subscriptions_scheduled = False
+        self._send_subscriptions("subscribe")
+
+    def _send_subscriptions(self, action):
+        # Changes stay pending and are sent on open
+        if not self.is_connected():
+            return
+
+        try:
+            for message_action, value in self._subscriptions.messages(self.subscribed_tokens):
+                self.ws.sendMessage(
+                    six.b(json.dumps({"a": message_action, "v": value}))
+                )
         except Exception as e:
-            self._close(reason="Error while setting mode: {}".format(str(e)))
+            self._close(reason="Error while {}: {}".format(action, str(e)))
             raise
 
-    def resubscribe(self):
-        """Resubscribe to all current subscribed tokens."""
-        modes = {}
+    def add_listener(self, instrument_tokens, callback):
+        """
+        Call `callback(ws, ticks)` with ticks of only the given instruments.
+
+        Ticks are routed through an index of listeners by instrument token, so a listener is called once per frame with
+        only the ticks of its instruments, if there are any. When nothing else needs every tick (`on_ticks`, snapshots
+        or a tick publisher), packets of instruments without listeners aren't decoded at all. Listeners don't subscribe
+        to the instruments and aren't conflated.
 
-        for token in self.subscribed_tokens:
-            m = self.subscribed_tokens[token]
+        - `instrument_tokens` is list of instrument tokens to listen to.
+        - `callback` is the function called with the ticks.
+        """
+        # Replaced rather than changed in place, so frames being dispatched see either the old or the new listeners.
+        listeners = dict(self._listeners)
+        for token in instrument_tokens:
+            callbacks = listeners.get(token, ())
+            if callback not in callbacks:
+                listeners[token] = callbacks + (callback,)
 
-            if not modes.get(m):
-                modes[m] = []
+        self._listeners = listeners
 
-            modes[m].append(token)
+    def remove_listener(self, callback, instrument_tokens=None):
+        """
+        Stop calling a listener.
 
-        for mode in modes:
-            if self.debug:
-                log.debug("Resubscribe and set mode: {} - {}".format(mode, modes[mode]))
+        - `callback` is the function passed to `add_listener`.
+        - `instrument_tokens` is list of instrument tokens to stop listening to. Defaults to all of them.
+        """
+        listeners = dict(self._listeners)
+        for token in list(listeners if instrument_tokens is None else instrument_tokens):
+            callbacks = tuple(c for c in listeners.get(token, ()) if c != callback)
+            if callbacks:
+                listeners[token] = callbacks
+            else:
+                listeners.pop(token, None)
+
+        self._listeners = listeners
+
+    def get_order_state(self, order_id):
+        """
+        Latest state of an order merged from its order updates, None if no update of it was received.
+
+        Updates which arrive out of exchange sequence are ignored, so it's the same as the order in `KiteConnect.orders()`
+        for orders updated since connecting.
+
+        - `order_id` is the ID of the order.
+        """
+        return self.order_states.get(order_id)
+
+    def latest(self, instrument_token):
+        """
+        Latest tick received for an instrument, None if there is none yet.
+
+        Requires `snapshot=True` while initialising.
+
+        - `instrument_token` is the instrument token to get the tick for.
+        """
+        return self._get_tick_store().latest(instrument_token)
+
+    def snapshot(self, instrument_tokens=None):
+        """
+        Dict of latest ticks keyed by instrument token.
+
+        Requires `snapshot=True` while initialising.
+
+        - `instrument_tokens` is the list of instrument tokens to get ticks for. Defaults to all instruments.
+        """
+        return self._get_tick_store().snapshot(instrument_tokens)
 
-            self.subscribe(modes[mode])
-            self.set_mode(mode, modes[mode])
+    def _get_tick_store(self):
+        if self.tick_store is None:
+            raise ValueError("Tick snapshot is not enabled. Initialise `KiteTicker` with `snapshot=True`.")
+        return self.tick_store
 
     def _on_connect(self, ws, response):
         self.ws = ws
@@ -655,6 +1089,11 @@ class KiteTicker(object):
         """Call `on_close` callback when connection is closed."""
         log.error("Connection closed: {} - {}".format(code, str(reason)))
 
+        # Ticks stop at the last frame, keep the latest of each instrument to report with the gap
+        if self._last_frame_time is not None and self._gap_since is None:
+            self._gap_since = self._last_frame_time
+            self.ticks_before_drop = self.tick_store.snapshot() if self.tick_store is not None else {}
+
         if self.on_close:
             self.on_close(self, code, reason)
 
@@ -670,18 +1109,187 @@ class KiteTicker(object):
         if self.on_message:
             self.on_message(self, payload, is_binary)
 
+        if self.recorder is not None and is_binary:
+            self.recorder.record(payload)
+
+        received = None
+        if is_binary:
+            now = time.monotonic()
+            # The gap lasts until the first ticks, heartbeats arrive before resubscribing is done.
+            if self._gap_since is not None and len(payload) > 4:
+                self._on_gap(now - self._gap_since)
+            self._last_frame_time = now
+
+            if self.latency_stats is not None:
+                received = time.time()
+                self.latency_stats.frame_size.record(len(payload))
+                if self.stats_log_interval and now - self._stats_logged >= self.stats_log_interval:
+                    self._stats_logged = now
+                    log.info("Ticker stats: {}".format(self.latency_stats.summary()))
+
         # If the message is binary, parse it and send it to the callback.
-        if self.on_ticks and is_binary and len(payload) > 4:
-            self.on_ticks(self, self._parse_binary(payload))
+        if is_binary and len(payload) > 4:
+            if self.pipeline is not None:
+                if self._pipeline_takes_received:
+                    self.pipeline.submit(payload, received)
+                else:
+                    self.pipeline.submit(payload)
+            else:
+                self._on_ticks_payload(payload, received=received)
 
         # Parse text messages
         if not is_binary:
             self._parse_text_message(payload)
 
+    def _on_ticks_payload(self, payload, ticks=None, received=None):
+        """
+        Pass a binary frame to tick callbacks, decoding it unless it's already decoded to `ticks`.
+
+        - `received` is the epoch time the frame was received at.
+        """
+        if self._listeners or self._takes_every_tick():
+            if ticks is None:
+                ticks = self._decode(payload, received)
+
+            # Update latest ticks before the callback so that it reads the same state.
+            if self.tick_store is not None:
+                self.tick_store.update(ticks)
+
+            if self.tick_publisher is not None:
+                self.tick_publisher.publish(ticks)
+
+            if self.candles is not None:
+                self.candles.update(ticks)
+
+            if self._listeners:
+                self._dispatch_listeners(ticks)
+
+            if self.on_ticks:
+                if self.conflator is not None:
+                    self.conflator.push(ticks)
+                else:
+                    self._call_on_ticks(ticks)
+
+        # Same ticks decoded to a NumPy structured array.
+        if self.on_ticks_array:
+            self.on_ticks_array(self, self._parse_binary_array(payload))
+
+    def _on_gap(self, seconds):
+        """Report the time without data when the first frame is received after a drop."""
+        self._gap_since = None
+        log.warning("No ticks for {:.3f} seconds while reconnecting.".format(seconds))
+
+        if self.on_gap:
+            self.on_gap(self, seconds, self.ticks_before_drop)
+
+    def _on_conflated_ticks(self, ticks):
+        if self.on_ticks:
+            self._call_on_ticks(ticks)
+
+    def _takes_every_tick(self):
+        """Check if anything other than listeners needs every tick."""
+        consumers = (self.tick_store, self.tick_publisher, self.candles)
+        return bool(self.on_ticks) or any(consumer is not None for consumer in consumers)
+
+    def _dispatch_listeners(self, ticks):
+        """Call every listener once with the ticks of its instruments in the frame."""
+        listeners = self._listeners
+        batches = {}
+
+        for tick in ticks:
+            callbacks = listeners.get(tick["instrument_token"])
+            if callbacks:
+                for callback in callbacks:
+                    batch = batches.get(callback)
+                    if batch is None:
+                        batches[callback] = [tick]
+                    else:
+                        batch.append(tick)
+
+        for callback, batch in batches.items():
+            try:
+                callback(self, batch)
+            except Exception:
+                log.exception("Error in ticks listener.")
+
+    def _call_on_ticks(self, ticks):
+        if self.latency_stats is None:
+            self.on_ticks(self, ticks)
+            return
+
+        started = time.perf_counter()
+        self.on_ticks(self, ticks)
+        self.latency_stats.handler_time.record((time.perf_counter() - started) * 1000)
+
+    def _decode(self, payload, received=None):
+        """
+        Parse a frame, recording decoding time and exchange latency if `latency_stats` is enabled.
+
+        - `received` is the epoch time the frame was received at, exchange latency is measured up to it. Defaults to now.
+        """
+        # Only packets of instruments with listeners are needed if nothing else takes every tick
+        instrument_tokens = None
+        if self._listeners and not self._takes_every_tick():
+            instrument_tokens = self._listeners
+
+        if self.latency_stats is None:
+            return self._parse_binary(payload, instrument_tokens)
+
+        if received is None:
+            received = time.time()
+        started = time.perf_counter()
+        ticks = self._parse_binary(payload, instrument_tokens)
+        self.latency_stats.decode_time.record((time.perf_counter() - started) * 1000)
+
+        exchange_latency = self.latency_stats.exchange_latency
+        for tick in ticks:
+            exchange_timestamp = tick.get("exchange_timestamp")
+            if exchange_timestamp is not None:
+                # Ticks of a frame mostly share the timestamp, convert it once.
+                cached, timestamp = self._exchange_time
+                if exchange_timestamp != cached:
+                    timestamp = time.mktime(exchange_timestamp.timetuple())
+                    self._exchange_time = (exchange_timestamp, timestamp)
+
+                exchange_latency.record((received - timestamp) * 1000)
+
+        return ticks
+
+    def stats(self, reset=False):
+        """
+        Dict of ticker statistics.
+
+        Has the `kiteconnect.stats.TickerStats` histograms if `latency_stats` is enabled, `liveness` with ping round trip
+        times, and `conflation` and `pipeline` counters if they're enabled.
+
+        - `reset` clears the histograms after reading them.
+        """
+        stats = {}
+        if self.latency_stats is not None:
+            stats.update(self.latency_stats.to_dict())
+            if reset:
+                self.latency_stats.reset()
+
+        stats["liveness"] = self.liveness.stats()
+
+        if self.conflator is not None:
+            stats["conflation"] = self.conflator.stats()
+
+        if self.pipeline is not None:
+            stats["pipeline"] = self.pipeline.stats()
+
+        return stats
+
     def _on_open(self, ws):
+        # Depth changes restart from full books on a new connection
+        self._depth_books.clear()
+
         # Resubscribe if its reconnect
         if not self._is_first_connect:
             self.resubscribe()
+        elif self._subscriptions.pending():
+            # Changes made before the first connect
+            self._send_subscriptions("subscribe")
 
         # Set first connect to false once its connected first time
         self._is_first_connect = False
@@ -699,165 +1307,302 @@ class KiteTicker(object):
 
     def _parse_text_message(self, payload):
         """Parse text message."""
-        # Decode unicode data
-        if not six.PY2 and type(payload) == bytes:
-            payload = payload.decode("utf-8")
-
-        try:
-            data = json.loads(payload)
-        except ValueError:
+        # Only order updates and errors are parsed
+        data = parse_text_message(payload)
+        if data is None:
             return
 
         # Order update callback
-        if self.on_order_update and data.get("type") == "order" and data.get("data"):
-            self.on_order_update(self, data["data"])
+        if data.get("type") == "order" and data.get("data"):
+            self.order_states.update(data["data"])
+
+            if self.on_order_update:
+                self.on_order_update(self, data["data"])
 
         # Custom error with websocket error code 0
         if data.get("type") == "error":
             self._on_error(self, 0, data.get("data"))
 
-    def _parse_binary(self, bin):
-        """Parse binary data to a (list of) ticks structure."""
-        packets = self._split_packets(bin)  # split data to individual ticks packet
+    def _parse_binary(self, bin, instrument_tokens=None):
+        """
+        Parse binary data to a (list of) ticks structure.
+
+        - `instrument_tokens` limits decoding to packets of these tokens. Other packets are skipped by their token.
+        """
+        buf = memoryview(bin)
         data = []
 
-        for packet in packets:
-            instrument_token = self._unpack_int(packet, 0, 4)
-            segment = instrument_token & 0xff  # Retrive segment constant from instrument_token
+        # Decode individual tick packets in place from their offsets
+        for offset, length in self._split_packets(bin):
+            if instrument_tokens is not None and _TOKEN.unpack_from(buf, offset)[0] not in instrument_tokens:
+                continue
 
-            # Add price divisor based on segment
-            if segment == self.EXCHANGE_MAP["cds"]:
-                divisor = 10000000.0
-            elif segment == self.EXCHANGE_MAP["bcd"]:
-                divisor = 10000.0
-            else:
-                divisor = 100.0
-
-            # All indices are not tradable
-            tradable = False if segment == self.EXCHANGE_MAP["indices"] else True
-
-            # LTP packets
-            if len(packet) == 8:
-                data.append({
-                    "tradable": tradable,
-                    "mode": self.MODE_LTP,
-                    "instrument_token": instrument_token,
-                    "last_price": self._unpack_int(packet, 4, 8) / divisor
-                })
-            # Indices quote and full mode
-            elif len(packet) == 28 or len(packet) == 32:
-                mode = self.MODE_QUOTE if len(packet) == 28 else self.MODE_FULL
-
-                d = {
-                    "tradable": tradable,
-                    "mode": mode,
-                    "instrument_token": instrument_token,
-                    "last_price": self._unpack_int(packet, 4, 8) / divisor,
-                    "ohlc": {
-                        "high": self._unpack_int(packet, 8, 12) / divisor,
-                        "low": self._unpack_int(packet, 12, 16) / divisor,
-                        "open": self._unpack_int(packet, 16, 20) / divisor,
-                        "close": self._unpack_int(packet, 20, 24) / divisor
-                    }
-                }
+            tick = self._parse_packet(buf, offset, length)
+            if tick is not None:
+                data.append(tick)
+
+        return data
 
-                # Compute the change price using close price and last price
-                d["change"] = 0
-                if (d["ohlc"]["close"] != 0):
-                    d["change"] = (d["last_price"] - d["ohlc"]["close"]) * 100 / d["ohlc"]["close"]
+    def _parse_binary_array(self, bin):
+        """Parse binary data to a NumPy structured array with one row per tick."""
+        return columnar.parse_binary_array(bin)
+
+    def _parse_packet(self, buf, offset, length):
+        """
+        Parse a single tick packet of `length` bytes starting at `offset` in `buf`.
+
+        Every known packet layout is decoded with a single `unpack_from` call on a precompiled struct.
+        Returns None for packet lengths which are not recognised.
+        """
+        instrument_token = _TOKEN.unpack_from(buf, offset)[0]
+        segment = instrument_token & 0xff  # Retrive segment constant from instrument_token
+
+        # Add price divisor based on segment
+        divisor = _SEGMENT_DIVISORS.get(segment, 100.0)
+
+        # All indices are not tradable
+        tradable = segment != self.EXCHANGE_MAP["indices"]
+
+        as_object = self.tick_format == self.TICK_FORMAT_OBJECT
+        # Tick objects always decode depth lazily
+        lazy_depth = as_object or self.lazy_depth
+
+        # LTP packets
+        if length == 8:
+            last_price = _LTP_PACKET.unpack_from(buf, offset)[1] / divisor
+
+            if as_object:
+                t = Tick()
+                t.tradable = tradable
+                t.mode = self.MODE_LTP
+                t.instrument_token = instrument_token
+                t.last_price = last_price
+                return t
+
+            return {
+                "tradable": tradable,
+                "mode": self.MODE_LTP,
+                "instrument_token": instrument_token,
+                "last_price": last_price
+            }
+        # Indices quote and full mode
+        elif length == 28 or length == 32:
+            if length == 28:
+                fields = _INDEX_QUOTE_PACKET.unpack_from(buf, offset)
+                mode = self.MODE_QUOTE
+            else:
+                fields = _INDEX_FULL_PACKET.unpack_from(buf, offset)
+                mode = self.MODE_FULL
+
+            last_price = fields[1] / divisor
+            close = fields[5] / divisor
+
+            # Compute the change price using close price and last price
+            change = 0
+            if (close != 0):
+                change = (last_price - close) * 100 / close
+
+            if as_object:
+                t = Tick()
+                t.tradable = tradable
+                t.mode = mode
+                t.instrument_token = instrument_token
+                t.last_price = last_price
+                t.ohlc = OHLC(fields[4] / divisor, fields[2] / divisor, fields[3] / divisor, close)
+                t.change = change
 
                 # Full mode with timestamp
-                if len(packet) == 32:
-                    try:
-                        timestamp = datetime.fromtimestamp(self._unpack_int(packet, 28, 32))
-                    except Exception:
-                        timestamp = None
-
-                    d["exchange_timestamp"] = timestamp
-
-                data.append(d)
-            # Quote and full mode
-            elif len(packet) == 44 or len(packet) == 184:
-                mode = self.MODE_QUOTE if len(packet) == 44 else self.MODE_FULL
-
-                d = {
-                    "tradable": tradable,
-                    "mode": mode,
-                    "instrument_token": instrument_token,
-                    "last_price": self._unpack_int(packet, 4, 8) / divisor,
-                    "last_traded_quantity": self._unpack_int(packet, 8, 12),
-                    "average_traded_price": self._unpack_int(packet, 12, 16) / divisor,
-                    "volume_traded": self._unpack_int(packet, 16, 20),
-                    "total_buy_quantity": self._unpack_int(packet, 20, 24),
-                    "total_sell_quantity": self._unpack_int(packet, 24, 28),
-                    "ohlc": {
-                        "open": self._unpack_int(packet, 28, 32) / divisor,
-                        "high": self._unpack_int(packet, 32, 36) / divisor,
-                        "low": self._unpack_int(packet, 36, 40) / divisor,
-                        "close": self._unpack_int(packet, 40, 44) / divisor
-                    }
-                }
+                if length == 32:
+                    t.exchange_timestamp = self._parse_timestamp(fields[7])
+
+                return t
+
+            d = {
+                "tradable": tradable,
+                "mode": mode,
+                "instrument_token": instrument_token,
+                "last_price": last_price,
+                "ohlc": {
+                    "high": fields[2] / divisor,
+                    "low": fields[3] / divisor,
+                    "open": fields[4] / divisor,
+                    "close": close
+                },
+                "change": change
+            }
 
-                # Compute the change price using close price and last price
-                d["change"] = 0
-                if (d["ohlc"]["close"] != 0):
-                    d["change"] = (d["last_price"] - d["ohlc"]["close"]) * 100 / d["ohlc"]["close"]
+            # Full mode with timestamp
+            if length == 32:
+                d["exchange_timestamp"] = self._parse_timestamp(fields[7])
+
+            return d
+        # Quote and full mode
+        elif length == 44 or length == 184:
+            if length == 44:
+                fields = _QUOTE_PACKET.unpack_from(buf, offset)
+                mode = self.MODE_QUOTE
+            elif self.depth_delta:
+                fields = _FULL_PACKET_HEADER.unpack_from(buf, offset)
+                depth_changes = self._depth_changes(buf, offset, instrument_token, divisor, as_object)
+                mode = self.MODE_FULL
+            elif lazy_depth:
+                # Keep a copy of raw depth bytes to decode on first access.
+                fields = _FULL_PACKET_HEADER.unpack_from(buf, offset)
+                depth = Depth(bytes(buf[offset + _DEPTH_OFFSET:offset + length]), divisor)
+                mode = self.MODE_FULL
+            else:
+                fields = _FULL_PACKET.unpack_from(buf, offset)
+                mode = self.MODE_FULL
+
+            last_price = fields[1] / divisor
+            close = fields[10] / divisor
+
+            # Compute the change price using close price and last price
+            change = 0
+            if (close != 0):
+                change = (last_price - close) * 100 / close
+
+            if as_object:
+                t = Tick()
+                t.tradable = tradable
+                t.mode = mode
+                t.instrument_token = instrument_token
+                t.last_price = last_price
+                t.last_traded_quantity = fields[2]
+                t.average_traded_price = fields[3] / divisor
+                t.volume_traded = fields[4]
+                t.total_buy_quantity = fields[5]
+                t.total_sell_quantity = fields[6]
+                t.ohlc = OHLC(fields[7] / divisor, fields[8] / divisor, fields[9] / divisor, close)
+                t.change = change
 
                 # Parse full mode
-                if len(packet) == 184:
-                    try:
-                        last_trade_time = datetime.fromtimestamp(self._unpack_int(packet, 44, 48))
-                    except Exception:
-                        last_trade_time = None
-
-                    try:
-                        timestamp = datetime.fromtimestamp(self._unpack_int(packet, 60, 64))
-                    except Exception:
-                        timestamp = None
-
-                    d["last_trade_time"] = last_trade_time
-                    d["oi"] = self._unpack_int(packet, 48, 52)
-                    d["oi_day_high"] = self._unpack_int(packet, 52, 56)
-                    d["oi_day_low"] = self._unpack_int(packet, 56, 60)
-                    d["exchange_timestamp"] = timestamp
-
-                    # Market depth entries.
-                    depth = {
-                        "buy": [],
-                        "sell": []
-                    }
-
-                    # Compile the market depth lists.
-                    for i, p in enumerate(range(64, len(packet), 12)):
-                        depth["sell" if i >= 5 else "buy"].append({
-                            "quantity": self._unpack_int(packet, p, p + 4),
-                            "price": self._unpack_int(packet, p + 4, p + 8) / divisor,
-                            "orders": self._unpack_int(packet, p + 8, p + 10, byte_format="H")
-                        })
+                if length == 184:
+                    t.last_trade_time = self._parse_timestamp(fields[11])
+                    t.oi = fields[12]
+                    t.oi_day_high = fields[13]
+                    t.oi_day_low = fields[14]
+                    t.exchange_timestamp = self._parse_timestamp(fields[15])
+                    if self.depth_delta:
+                        t.depth_changes = depth_changes
+                    else:
+                        t.depth = depth
+
+                return t
+
+            d = {
+                "tradable": tradable,
+                "mode": mode,
+                "instrument_token": instrument_token,
+                "last_price": last_price,
+                "last_traded_quantity": fields[2],
+                "average_traded_price": fields[3] / divisor,
+                "volume_traded": fields[4],
+                "total_buy_quantity": fields[5],
+                "total_sell_quantity": fields[6],
+                "ohlc": {
+                    "open": fields[7] / divisor,
+                    "high": fields[8] / divisor,
+                    "low": fields[9] / divisor,
+                    "close": close
+                },
+                "change": change
+            }
+
+            # Parse full mode
+            if length == 184:
+                d["last_trade_time"] = self._parse_timestamp(fields[11])
+                d["oi"] = fields[12]
+                d["oi_day_high"] = fields[13]
+                d["oi_day_low"] = fields[14]
+                d["exchange_timestamp"] = self._parse_timestamp(fields[15])
 
+                if self.depth_delta:
+                    d["depth_changes"] = depth_changes
+                    return d
+
+                if lazy_depth:
                     d["depth"] = depth
+                    return d
 
-                data.append(d)
+                # Market depth entries.
+                depth = {
+                    "buy": [],
+                    "sell": []
+                }
 
-        return data
+                # Compile the market depth lists. Each level is a (quantity, price, orders) triplet.
+                for i, p in enumerate(range(16, 46, 3)):
+                    depth["sell" if i >= 5 else "buy"].append({
+                        "quantity": fields[p],
+                        "price": fields[p + 1] / divisor,
+                        "orders": fields[p + 2]
+                    })
 
-    def _unpack_int(self, bin, start, end, byte_format="I"):
-        """Unpack binary data as unsgined interger."""
-        return struct.unpack(">" + byte_format, bin[start:end])[0]
+                d["depth"] = depth
+
+            return d
+
+        return None
+
+    def _depth_changes(self, buf, offset, instrument_token, divisor, as_object):
+        """List of depth levels of a full packet which differ from the previous tick of the instrument."""
+        levels = _DEPTH_LEVELS.unpack_from(buf, offset + _DEPTH_OFFSET)
+        previous = self._depth_books.get(instrument_token)
+        if levels == previous:
+            return []
+
+        self._depth_books[instrument_token] = levels
+
+        changes = []
+        for level in range(10):
+            p = level * 3
+            if previous is not None and levels[p] == previous[p] and levels[p + 1] == previous[p + 1] and \
+                    levels[p + 2] == previous[p + 2]:
+                continue
+
+            side = "sell" if level >= 5 else "buy"
+            if as_object:
+                changes.append(DepthChange(side, level % 5, levels[p], levels[p + 1] / divisor, levels[p + 2]))
+            else:
+                changes.append({
+                    "side": side,
+                    "level": level % 5,
+                    "quantity": levels[p],
+                    "price": levels[p + 1] / divisor,
+                    "orders": levels[p + 2]
+                })
+
+        return changes
+
+    def _parse_timestamp(self, value):
+        """Convert an epoch timestamp from a packet to datetime, None if it can't be converted."""
+        try:
+            return datetime.fromtimestamp(value)
+        except Exception:
+            return None
 
     def _split_packets(self, bin):
-        """Split the data to individual packets of ticks."""
+        """
+        Yield `(offset, length)` of the individual tick packets in the binary data.
+
+        Packets are not copied out of the payload, they are decoded in place from these offsets.
+        """
         # Ignore heartbeat data.
         if len(bin) < 2:
-            return []
+            return
 
-        number_of_packets = self._unpack_int(bin, 0, 2, byte_format="H")
-        packets = []
+        number_of_packets = _UINT16.unpack_from(bin, 0)[0]
 
         j = 2
         for i in range(number_of_packets):
-            packet_length = self._unpack_int(bin, j, j + 2, byte_format="H")
-            packets.append(bin[j + 2: j + 2 + packet_length])
-            j = j + 2 + packet_length
+            # Stop at a truncated packet
+            if j + 2 > len(bin):
+                return
+
+            packet_length = _UINT16.unpack_from(bin, j)[0]
+            if j + 2 + packet_length > len(bin):
+                return
 
-        return packets
+            yield j + 2, packet_length
+            j = j + 2 + packet_length
@@ -53,6 +53,9 @@ setup(
     setup_requires=["pytest-runner"],
     extras_require={
         "doc": ["pdoc"],
+        "numpy": ["numpy"],
+        "asyncio": ["websockets", "httpx[http2]"],
+        "orjson": ["orjson"],
         ':sys_platform=="win32"': ["pywin32"]
     }
 )
@@ -1,6 +1,7 @@
 # coding: utf-8
 import os
 import json
+import struct
 
 # Mock responses path
 responses_path = {
@@ -93,3 +94,23 @@ def merge_dicts(x, y):
     z = x.copy()
     z.update(y)
     return z
+
+
+def tick_packet(instrument_token, size, last_price=100000, depth=None):
+    """Build a binary tick packet of given size with sequential field values after the last price."""
+    values = [instrument_token, last_price] + list(range(1, size // 4 - 1))
+    if size != 184:
+        return struct.pack(">{}I".format(size // 4), *values)
+
+    packet = struct.pack(">16I", *values[:16])
+    for quantity, price, orders in (depth or [(10, 100000, 1)] * 10):
+        packet += struct.pack(">IIH2x", quantity, price, orders)
+    return packet
+
+
+def tick_frame(*packets):
+    """Build a binary websocket frame out of tick packets."""
+    frame = struct.pack(">H", len(packets))
+    for packet in packets:
+        frame += struct.pack(">H", len(packet)) + packet
+    return frame
@@ -0,0 +1,136 @@
+# coding: utf-8
+"""AsyncKiteConnect tests against a mock transport"""
+import json
+import asyncio
+
+import pytest
+import kiteconnect.exceptions as ex
+from kiteconnect import AsyncKiteConnect
+from kiteconnect.retry import RetryPolicy
+from kiteconnect.ratelimit import RateLimiter
+
+httpx = pytest.importorskip("httpx")
+
+
+def run(handler, client):
+    """Run `client(kite)` with requests answered by `handler(request)`."""
+    async def main():
+        kite = AsyncKiteConnect("<API-KEY>", access_token="<ACCESS-TOKEN>", root="http://kite_trade_test",
+                                client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        async with kite:
+            return await client(kite)
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+def respond(data, status_code=200):
+    return httpx.Response(status_code, json=data)
+
+
+def test_request_headers_and_params():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return respond({"status": "success", "data": {"NSE:INFY": {"last_price": 1500.0}}})
+
+    data = run(handler, lambda kite: kite.ltp(["NSE:INFY", "NSE:TCS"]))
+
+    assert data == {"NSE:INFY": {"last_price": 1500.0}}
+    assert requests[0].url.path == "/quote/ltp"
+    assert requests[0].url.params.get_list("i") == ["NSE:INFY", "NSE:TCS"]
+    assert requests[0].headers["Authorization"] == "token <API-KEY>:<ACCESS-TOKEN>"
+    assert requests[0].headers["X-Kite-Version"] == "3"
+
+
+def test_place_order_leaves_out_none_params():
+    bodies = []
+
+    def handler(request):
+        bodies.append(request.content.decode("utf-8"))
+        return respond({"status": "success", "data": {"order_id": "151220000000000"}})
+
+    order_id = run(handler, lambda kite: kite.place_order(
+        variety="regular", exchange="NSE", tradingsymbol="INFY", transaction_type="BUY",
+        quantity=1, product="CNC", order_type="MARKET"))
+
+    assert order_id == "151220000000000"
+    assert "price" not in bodies[0]
+    assert "tradingsymbol=INFY" in bodies[0]
+
+
+def test_errors_are_kite_exceptions():
+    expired = []
+
+    def handler(request):
+        return respond({"status": "error", "error_type": "TokenException", "message": "Token expired"}, 403)
+
+    async def client(kite):
+        kite.set_session_expiry_hook(lambda: expired.append(True))
+        await kite.profile()
+
+    with pytest.raises(ex.TokenException):
+        run(handler, client)
+    assert expired == [True]
+
+
+def test_concurrent_requests_are_limited():
+    in_flight = [0, 0]
+
+    async def handler(request):
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight[1], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        body = json.loads(request.content)
+        return respond({"status": "success", "data": {"trigger_id": body["id"]}})
+
+    async def client(kite):
+        kite.max_concurrency = 5
+        return await asyncio.gather(*[
+            kite._post("gtt.place", params={"id": i}, is_json=True) for i in range(20)])
+
+    results = run(handler, client)
+
+    assert [r["trigger_id"] for r in results] == list(range(20))
+    assert in_flight[1] == 5
+
+
+def test_get_retried():
+    statuses = [503, 200]
+
+    def handler(request):
+        status = statuses.pop(0)
+        if status != 200:
+            return respond({"status": "error", "error_type": "GeneralException", "message": "Unavailable"}, status)
+        return respond({"status": "success", "data": {"net": []}})
+
+    async def client(kite):
+        kite.retry_policy = RetryPolicy(backoff=0)
+        return await kite.positions()
+
+    assert run(handler, client) == {"net": []}
+    assert statuses == []
+
+
+def test_quote_batch():
+    def handler(request):
+        instruments = request.url.params.get_list("i")
+        if "NSE:S0" in instruments:
+            return respond({"status": "error", "error_type": "InputException", "message": "Invalid"}, 400)
+        return respond({"status": "success", "data": dict((i, {"last_price": 1.0}) for i in instruments)})
+
+    async def client(kite):
+        # Requests of the batch aren't spaced with a rate limiter without quote limits
+        kite.rate_limiter = RateLimiter({})
+        return await kite.quote_batch(["NSE:S{}".format(i) for i in range(1200)])
+
+    result = run(handler, client)
+
+    assert len(result) == 700
+    assert len(result.errors) == 500
+    assert isinstance(result.errors["NSE:S0"], ex.InputException)
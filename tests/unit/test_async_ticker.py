@@ -0,0 +1,186 @@
+# coding: utf-8
+"""AsyncKiteTicker tests against a local websocket server"""
+import json
+import time
+import asyncio
+
+import pytest
+import utils
+from kiteconnect import AsyncKiteTicker
+from kiteconnect.reconnect import ReconnectPolicy
+
+websockets = pytest.importorskip("websockets")
+
+
+def run(server_handler, client):
+    """Run `client(kws)` against a local server calling `server_handler(websocket, connection_count)`."""
+    async def main():
+        connections = []
+
+        async def handler(websocket, *args):
+            connections.append(websocket)
+            await server_handler(websocket, len(connections))
+
+        server = await websockets.serve(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        kws = AsyncKiteTicker("<API-KEY>", "<ACCESS-TOKEN>", root="ws://127.0.0.1:{}".format(port))
+        try:
+            return await asyncio.wait_for(client(kws), 5)
+        finally:
+            await kws.close()
+            server.close()
+            await server.wait_closed()
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+def test_subscribe_and_iterate():
+    received = []
+
+    async def server(websocket, count):
+        received.append(json.loads(await websocket.recv()))
+        received.append(json.loads(await websocket.recv()))
+        await websocket.send(json.dumps({"type": "order", "data": {"order_id": "1"}}))
+        await websocket.send(utils.tick_frame(utils.tick_packet(738561, 8, last_price=100)))
+        await websocket.send(utils.tick_frame(utils.tick_packet(5633, 8, last_price=200)))
+        await websocket.wait_closed()
+
+    async def client(kws):
+        orders = []
+        kws.on_order_update = lambda ws, data: orders.append(data)
+        # Subscribed before connecting
+        await kws.subscribe([738561])
+        await kws.connect()
+        await kws.set_mode(kws.MODE_LTP, [738561])
+
+        ticks = []
+        async for frame in kws:
+            ticks.extend(frame)
+            if len(ticks) == 2:
+                break
+        return orders, ticks
+
+    orders, ticks = run(server, client)
+    assert received[0] == {"a": "subscribe", "v": [738561]}
+    assert received[1]["a"] == "mode"
+    assert orders == [{"order_id": "1"}]
+    assert [(t["instrument_token"], t["last_price"]) for t in ticks] == [(738561, 1.0), (5633, 2.0)]
+
+
+def test_reconnect_resubscribes():
+    received = []
+
+    async def server(websocket, count):
+        received.append((count, json.loads(await websocket.recv())))
+        await websocket.recv()
+        if count == 1:
+            # Drop the first connection
+            await websocket.close()
+            return
+        await websocket.send(utils.tick_frame(utils.tick_packet(738561, 8)))
+        await websocket.wait_closed()
+
+    async def client(kws):
+        attempts = []
+        kws.on_reconnect = lambda ws, count: attempts.append(count)
+        await kws.set_mode(kws.MODE_FULL, [738561])
+        await kws.connect()
+        ticks = await kws.__anext__()
+        return attempts, ticks
+
+    attempts, ticks = run(server, client)
+    assert attempts == [1]
+    assert received == [(1, {"a": "subscribe", "v": [738561]}), (2, {"a": "subscribe", "v": [738561]})]
+    assert ticks[0]["instrument_token"] == 738561
+
+
+def test_iteration_ends_without_reconnect():
+    async def server(websocket, count):
+        await websocket.close()
+
+    async def client(kws):
+        kws.reconnect = False
+        await kws.connect()
+        return [ticks async for ticks in kws]
+
+    assert run(server, client) == []
+
+
+def test_callback_errors_do_not_stop_ticker():
+    async def server(websocket, count):
+        await websocket.send(json.dumps({"type": "order", "data": {"order_id": "1"}}))
+        await websocket.send(utils.tick_frame(utils.tick_packet(738561, 8)))
+        await websocket.wait_closed()
+
+    async def client(kws):
+        def on_order_update(ws, data):
+            raise ValueError("handler bug")
+
+        kws.on_order_update = on_order_update
+        await kws.connect()
+        return await kws.__anext__(), kws.get_order_state("1")
+
+    ticks, order = run(server, client)
+    assert ticks[0]["instrument_token"] == 738561
+    assert order == {"order_id": "1"}
+
+
+def test_drop_during_resubscribe_reconnects():
+    async def server(websocket, count):
+        if count == 1:
+            # Close right after the handshake, before the subscription is sent
+            await websocket.close()
+            return
+        await websocket.recv()
+        await websocket.send(utils.tick_frame(utils.tick_packet(738561, 8)))
+        await websocket.wait_closed()
+
+    async def client(kws):
+        await kws.subscribe([738561])
+        await kws.connect()
+        return await kws.__anext__()
+
+    assert run(server, client)[0]["instrument_token"] == 738561
+
+
+def test_close_ends_reconnect_wait():
+    async def server(websocket, count):
+        await websocket.close()
+
+    async def client(kws):
+        kws.reconnect_policy = ReconnectPolicy(max_delay=60, base_delay=60, immediate_first=False)
+        await kws.connect()
+        await asyncio.sleep(0.1)
+        started = time.time()
+        await kws.close()
+        return time.time() - started
+
+    assert run(server, client) < 1
+
+
+def test_close_with_full_queue():
+    async def server(websocket, count):
+        for price in range(20):
+            await websocket.send(utils.tick_frame(utils.tick_packet(738561, 8, last_price=price)))
+        await websocket.wait_closed()
+
+    async def client(kws):
+        kws.max_queue = 2
+        await kws.connect()
+        async for ticks in kws:
+            # Let the server fill the queue before leaving
+            await asyncio.sleep(0.1)
+            break
+
+        started = time.time()
+        await asyncio.wait_for(kws.close(), 2)
+        return time.time() - started, kws._queue.qsize()
+
+    seconds, queued = run(server, client)
+    assert seconds < 1
+    # Frames not read before closing are dropped
+    assert queued == 1
@@ -0,0 +1,53 @@
+# coding: utf-8
+"""Batched quote tests"""
+import json
+
+import mock
+import responses
+import kiteconnect.exceptions as ex
+from kiteconnect.batch import BatchResult, split
+
+
+def test_split_drops_duplicates():
+    assert split(["NSE:A", "NSE:B", "NSE:A", "NSE:C"], 2) == [["NSE:A", "NSE:B"], ["NSE:C"]]
+    assert split([], 500) == []
+
+
+def test_result_errors():
+    result = BatchResult()
+    error = ex.NetworkException("Too many requests", code=429)
+    result.add(["NSE:A"], {"NSE:A": {"last_price": 1}})
+    result.add(["NSE:B", "NSE:C"], error=error)
+
+    assert result == {"NSE:A": {"last_price": 1}}
+    assert result.errors == {"NSE:B": error, "NSE:C": error}
+
+
+@responses.activate
+def test_ltp_batch(kiteconnect):
+    """Instruments are requested in chunks and failed chunks are reported per instrument."""
+    def callback(request):
+        instruments = [param.split("=")[1].replace("%3A", ":") for param in request.url.split("?")[1].split("&")]
+        if "NSE:S1500" in instruments:
+            return (503, {}, json.dumps({"status": "error", "error_type": "NetworkException", "message": "Down"}))
+        data = dict((i, {"last_price": float(i[5:])}) for i in instruments)
+        return (200, {}, json.dumps({"status": "success", "data": data}))
+
+    responses.add_callback(
+        responses.GET,
+        "{0}{1}".format(kiteconnect.root, kiteconnect._routes["market.quote.ltp"]),
+        callback=callback,
+        content_type="application/json"
+    )
+
+    instruments = ["NSE:S{}".format(i) for i in range(2500)]
+    with mock.patch("kiteconnect.connect.time.sleep") as sleep:
+        result = kiteconnect.ltp_batch(instruments)
+
+    assert len(responses.calls) == 3
+    # Spaced to the quote rate limit without a rate limiter
+    assert sleep.call_count == 2
+    assert len(result) == 1000 + 500
+    assert result["NSE:S2400"] == {"last_price": 2400.0}
+    assert sorted(result.errors) == sorted(instruments[1000:2000])
+    assert isinstance(result.errors["NSE:S1000"], ex.NetworkException)
@@ -0,0 +1,94 @@
+# coding: utf-8
+"""Candle builder tests"""
+import time
+import calendar
+from datetime import datetime
+
+import pytest
+import utils
+from kiteconnect import KiteTicker
+from kiteconnect.candles import CandleBuilder
+
+# 09:15 local time
+OPEN = time.mktime(datetime(2021, 3, 1, 9, 15).timetuple())
+
+
+def tick(token, price, volume, seconds):
+    return {
+        "instrument_token": token,
+        "last_price": price,
+        "volume_traded": volume,
+        "exchange_timestamp": datetime.fromtimestamp(OPEN + seconds)
+    }
+
+
+def test_candles_are_built_and_closed():
+    closed = []
+    builder = CandleBuilder(intervals=("minute", "3minute"), on_candle=lambda *candle: closed.append(candle))
+
+    builder.update([tick(1, 100, 1000, 0), tick(1, 105, 1010, 10), tick(1, 98, 1025, 30)])
+    assert builder.current(1, "minute") == {
+        "date": datetime(2021, 3, 1, 9, 15), "open": 100, "high": 105, "low": 98, "close": 98, "volume": 25}
+
+    builder.update([tick(1, 101, 1030, 65)])
+    assert [(c[0], c[1], c[2]["close"]) for c in closed] == [(1, "minute", 98)]
+    assert builder.last_closed(1, "minute")["volume"] == 25
+    assert builder.current(1, "minute")["volume"] == 5
+    assert builder.current(1, "3minute") == {
+        "date": datetime(2021, 3, 1, 9, 15), "open": 100, "high": 105, "low": 98, "close": 101, "volume": 30}
+
+    assert builder.close_due(now=OPEN + 180) == 2
+    assert builder.last_closed(1, "3minute")["close"] == 101
+    assert builder.current(1, "minute") is None
+    assert builder.current(2, "minute") is None
+
+    # Late tick of bars closed by `close_due` doesn't reopen them
+    builder.update([tick(1, 110, 1040, 100)])
+    assert len(closed) == 3
+    assert builder.current(1, "minute") is None
+    assert builder.current(1, "3minute") is None
+
+    builder.update([tick(1, 111, 1050, 185)])
+    assert builder.current(1, "3minute")["open"] == 111
+
+
+def test_invalid_interval_and_max_instruments():
+    with pytest.raises(ValueError):
+        CandleBuilder(intervals=("day",))
+
+    builder = CandleBuilder(max_instruments=1)
+    builder.update([tick(1, 100, 0, 0), tick(2, 100, 0, 0)])
+    assert builder.ticks_ignored == 1
+
+
+def test_ticker_feeds_candles():
+    kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>")
+    kws.candles = CandleBuilder()
+    # Quote mode ticks are placed by the time they're received
+    kws._on_message(None, utils.tick_frame(utils.tick_packet(738561, 44, last_price=100)), True)
+    assert kws.candles.current(738561, "5minute")["close"] == 1.0
+
+
+def test_bars_aligned_to_session_open():
+    # 09:15 IST
+    session_open = calendar.timegm(datetime(2021, 3, 1, 3, 45).timetuple())
+    intervals = ("2minute", "10minute", "30minute", "60minute")
+    builder = CandleBuilder(intervals=intervals)
+
+    def ist_tick(seconds):
+        return {"instrument_token": 1, "last_price": 100, "exchange_timestamp": datetime.fromtimestamp(session_open + seconds)}
+
+    builder.update([ist_tick(5)])
+    for interval in intervals:
+        assert builder.current(1, interval)["date"] == datetime.fromtimestamp(session_open)
+
+    # 10:20 IST
+    builder.update([ist_tick(65 * 60)])
+    assert builder.current(1, "30minute")["date"] == datetime.fromtimestamp(session_open + 60 * 60)
+    assert builder.current(1, "60minute")["date"] == datetime.fromtimestamp(session_open + 60 * 60)
+    assert builder.last_closed(1, "60minute")["date"] == datetime.fromtimestamp(session_open)
+
+    # Bars aligned to another session open
+    builder = CandleBuilder(intervals=("60minute",), session_open="09:00")
+    builder.update([ist_tick(5)])
+    assert builder.current(1, "60minute")["date"] == datetime.fromtimestamp(session_open - 15 * 60)
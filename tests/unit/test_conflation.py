@@ -0,0 +1,54 @@
+# coding: utf-8
+"""Tick conflation tests"""
+import threading
+
+from kiteconnect.conflation import TickConflator
+
+
+def test_conflates_ticks_per_instrument():
+    delivered = []
+    entered = threading.Event()
+    release = threading.Event()
+    done = threading.Event()
+
+    def handler(ticks):
+        # Block the first batch so that next frames pile up
+        entered.set()
+        release.wait(1)
+        delivered.append(ticks)
+        if len(delivered) == 2:
+            done.set()
+
+    conflator = TickConflator(handler, max_rate=1000)
+    conflator.push([{"instrument_token": 1, "last_price": 1}])
+    assert entered.wait(1)
+
+    for price in range(2, 6):
+        conflator.push([{"instrument_token": 1, "last_price": price}, {"instrument_token": 2, "last_price": price}])
+
+    release.set()
+    assert done.wait(1)
+    conflator.stop()
+
+    assert delivered[0] == [{"instrument_token": 1, "last_price": 1}]
+    assert sorted(t["last_price"] for t in delivered[1]) == [5, 5]
+
+    stats = conflator.stats()
+    assert stats["frames_received"] == 5
+    assert stats["ticks_received"] == 9
+    # Only two of the eight ticks pushed while the handler was busy are delivered
+    assert stats["ticks_dropped"] == 6
+    assert stats["batches_delivered"] == 2
+    assert stats["max_handler_lag"] > 0
+
+
+def test_bounded_pending_batch():
+    conflator = TickConflator(lambda ticks: None, max_instruments=2)
+    conflator.stop()
+    conflator._running = True
+
+    conflator._pending = {}
+    conflator.push([{"instrument_token": token} for token in range(3)])
+
+    assert sorted(conflator._pending) == [0, 1]
+    assert conflator.ticks_overflowed == 1
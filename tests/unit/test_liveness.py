@@ -0,0 +1,78 @@
+# coding: utf-8
+"""Liveness monitor tests"""
+import mock
+from twisted.internet.task import Clock
+from kiteconnect.liveness import LivenessMonitor
+from kiteconnect.ticker import KiteTickerClientProtocol
+
+
+def test_pings_only_when_idle_or_rtt_due():
+    monitor = LivenessMonitor(interval=2.5, rtt_interval=10, rtt_window=3)
+    assert monitor.check(0) is None
+
+    monitor.reset(0)
+    monitor.frame_received(2)
+    assert monitor.check(2.5) is None
+    assert monitor.pings_skipped == 1
+
+    # Idle
+    assert monitor.check(5) == monitor.PING
+    monitor.ping_sent(5)
+    assert monitor.check(6) is None
+    assert round(monitor.pong_received(5.02)) == 20
+    assert monitor.pong_received(5.03) is None
+
+    # Round trip time is due even while frames flow
+    monitor.frame_received(15)
+    assert monitor.check(15.1) == monitor.PING
+    monitor.ping_sent(15.1)
+
+    # Nothing received for longer than the timeout after the ping
+    assert monitor.check(20) is None
+    assert monitor.check(21) == monitor.DEAD
+
+
+def test_idle_connection_with_fast_pongs_alive():
+    monitor = LivenessMonitor(interval=2.5)
+    monitor.reset(0)
+
+    # Checks drift a little, pongs come back in a few milliseconds
+    now = 0
+    for _ in range(20):
+        now += 2.503
+        action = monitor.check(now)
+        assert action != monitor.DEAD
+        if action == monitor.PING:
+            monitor.ping_sent(now)
+            monitor.pong_received(now + 0.004)
+
+    assert monitor.pongs_received >= 9
+
+
+def test_rtt_window():
+    monitor = LivenessMonitor(rtt_window=3)
+    monitor.reset(0)
+    for i in range(1, 5):
+        monitor.ping_sent(i)
+        monitor.pong_received(i + i / 1000.0)
+
+    assert [round(rtt) for rtt in monitor.rtt_window()] == [2, 3, 4]
+    stats = monitor.stats()
+    assert stats["rtt_samples"] == 3 and round(stats["rtt_max"]) == 4
+    assert stats["pings_sent"] == 4 and stats["pongs_received"] == 4
+
+
+def test_protocol_heartbeat():
+    protocol = KiteTickerClientProtocol()
+    protocol.factory = mock.Mock(reactor=Clock(), liveness=LivenessMonitor(interval=2.5), debug=False)
+    protocol.sendPing = mock.Mock()
+    protocol.dropConnection = mock.Mock()
+
+    protocol.factory.liveness.reset(0)
+    with mock.patch("time.monotonic", return_value=3):
+        protocol._loop_heartbeat()
+    assert protocol.sendPing.call_count == 1
+
+    with mock.patch("time.monotonic", return_value=10):
+        protocol._loop_heartbeat()
+    assert protocol.dropConnection.call_count == 1
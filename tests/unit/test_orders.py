@@ -0,0 +1,49 @@
+# coding: utf-8
+"""Order update parsing and state tests"""
+import json
+
+import mock
+from kiteconnect import KiteTicker
+from kiteconnect import orders
+from kiteconnect.orders import OrderStateCache, parse_text_message
+
+
+def order_message(**data):
+    return json.dumps({"type": "order", "id": "", "data": data}).encode("utf-8")
+
+
+def test_parse_text_message():
+    assert parse_text_message(order_message(order_id="1"))["data"] == {"order_id": "1"}
+    assert parse_text_message('{"type": "error", "data": "Invalid"}')["data"] == "Invalid"
+    assert parse_text_message(b"not json") is None
+
+    # Other types are skipped before parsing
+    with mock.patch.object(orders.json, "loads") as loads, mock.patch.object(orders, "fast_json", None):
+        assert parse_text_message(b'{"type": "message", "data": "hello"}') is None
+        assert not loads.called
+
+
+def test_order_state_merges_in_sequence():
+    cache = OrderStateCache()
+    cache.update({"order_id": "1", "status": "OPEN", "exchange_update_timestamp": "2021-05-31 09:18:57", "tag": "a"})
+    state = cache.update({"order_id": "1", "status": "COMPLETE", "exchange_update_timestamp": "2021-05-31 09:19:01",
+                          "tag": None})
+    assert state["status"] == "COMPLETE" and state["tag"] == "a"
+
+    # Out of sequence
+    assert cache.update({"order_id": "1", "status": "OPEN", "exchange_update_timestamp": "2021-05-31 09:18:59"}) is None
+    assert cache.get("1")["status"] == "COMPLETE"
+    assert cache.updates_stale == 1
+    assert cache.get("2") is None
+
+
+def test_ticker_order_updates():
+    kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>")
+    updates = []
+    kws.on_order_update = lambda ws, data: updates.append(data)
+
+    kws._on_message(None, order_message(order_id="1", status="OPEN"), False)
+    kws._on_message(None, order_message(order_id="1", status="COMPLETE", average_price=100.5), False)
+
+    assert len(updates) == 2
+    assert kws.get_order_state("1") == {"order_id": "1", "status": "COMPLETE", "average_price": 100.5}
@@ -0,0 +1,72 @@
+# coding: utf-8
+"""KiteTickerPool tests"""
+import mock
+import pytest
+from kiteconnect import KiteTicker
+from kiteconnect.pool import KiteTickerPool
+
+
+def open_pool(pool, *indexes):
+    for index in indexes:
+        ws = mock.Mock()
+        ws.state = ws.STATE_OPEN
+        pool.tickers[index]._on_connect(ws, None)
+        pool.tickers[index]._on_open(ws)
+
+
+def drop(pool, index):
+    ticker = pool.tickers[index]
+    ticker.ws.state = None
+    ticker.on_close(ticker, 1006, "dropped")
+
+
+def sent(ticker):
+    return [call[0][0] for call in ticker.ws.sendMessage.call_args_list]
+
+
+def test_subscriptions_are_spread():
+    pool = KiteTickerPool("<API-KEY>", "<ACCESS-TOKEN>", connections=3, max_tokens_per_connection=4)
+    pool.subscribe(range(7), mode=KiteTicker.MODE_LTP)
+
+    assert sorted(len(t.subscribed_tokens) for t in pool.tickers) == [2, 2, 3]
+    assert pool.subscribed_tokens == dict.fromkeys(range(7), KiteTicker.MODE_LTP)
+
+    with pytest.raises(ValueError):
+        pool.subscribe(range(7, 13))
+
+    # Pending subscriptions are sent when a connection opens
+    open_pool(pool, 0)
+    messages = sent(pool.tickers[0])
+    assert len(messages) == 2
+    assert b'"a": "subscribe"' in messages[0] and b'"ltp"' in messages[1]
+
+
+def test_drop_moves_tokens_and_rebalance():
+    pool = KiteTickerPool("<API-KEY>", "<ACCESS-TOKEN>", connections=2)
+    open_pool(pool, 0, 1)
+    pool.subscribe(range(10))
+
+    # Dropped connection's tokens move to the open connection
+    drop(pool, 1)
+    assert len(pool.tickers[0].subscribed_tokens) == 10
+    assert pool.tickers[1].subscribed_tokens == {}
+
+    stats = pool.stats()
+    assert stats[1]["drops"] == 1 and not stats[1]["connected"]
+    assert stats[0]["moved_tokens"] == 5
+
+    open_pool(pool, 1)
+    assert pool.rebalance() == 5
+    assert [len(t.subscribed_tokens) for t in pool.tickers] == [5, 5]
+
+
+def test_single_tick_callback():
+    pool = KiteTickerPool("<API-KEY>", "<ACCESS-TOKEN>", connections=2)
+    received = []
+    pool.on_ticks = lambda pool, ticks: received.extend(ticks)
+
+    pool.tickers[0].on_ticks(pool.tickers[0], [{"instrument_token": 1}])
+    pool.tickers[1].on_ticks(pool.tickers[1], [{"instrument_token": 2}, {"instrument_token": 3}])
+
+    assert [t["instrument_token"] for t in received] == [1, 2, 3]
+    assert [s["ticks"] for s in pool.stats()] == [1, 2]
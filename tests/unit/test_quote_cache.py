@@ -0,0 +1,122 @@
+# coding: utf-8
+"""Quote cache tests"""
+import json
+import time
+import threading
+
+import pytest
+import responses
+import kiteconnect.exceptions as ex
+from kiteconnect.batch import BatchResult
+from kiteconnect.quote_cache import QuoteCache
+
+
+def fetcher(calls, error_for=()):
+    def fetch(instruments):
+        calls.append(list(instruments))
+        result = BatchResult()
+        for instrument in instruments:
+            if instrument in error_for:
+                result.add([instrument], error=ex.NetworkException("Down"))
+            else:
+                result.add([instrument], {instrument: {"last_price": len(calls)}})
+        return result
+    return fetch
+
+
+def test_misses_fetched_together_and_cached():
+    calls = []
+    cache = QuoteCache()
+
+    assert cache.get("ltp", ["NSE:A", "NSE:B", "NSE:A"], fetcher(calls)) == {
+        "NSE:A": {"last_price": 1}, "NSE:B": {"last_price": 1}}
+    assert cache.get("ltp", ["NSE:B", "NSE:C"], fetcher(calls)) == {
+        "NSE:B": {"last_price": 1}, "NSE:C": {"last_price": 2}}
+
+    assert calls == [["NSE:A", "NSE:B"], ["NSE:C"]]
+    assert cache.stats() == {"hits": 1, "misses": 3, "coalesced": 0, "requests": 2}
+
+
+def test_ttl_per_call_type():
+    calls = []
+    cache = QuoteCache(ttl={"ltp": 0})
+
+    cache.get("ltp", ["NSE:A"], fetcher(calls))
+    cache.get("ltp", ["NSE:A"], fetcher(calls))
+    cache.get("quote", ["NSE:A"], fetcher(calls))
+    cache.get("quote", ["NSE:A"], fetcher(calls))
+
+    assert len(calls) == 3
+
+
+def test_concurrent_calls_share_request():
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+    fetch = fetcher(calls)
+
+    def slow_fetch(instruments):
+        started.set()
+        release.wait(5)
+        return fetch(instruments)
+
+    cache = QuoteCache()
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get("quote", ["NSE:A"], slow_fetch)))
+    leader.start()
+    started.wait(5)
+
+    follower = threading.Thread(target=lambda: results.append(cache.get("quote", ["NSE:A"], fetch)))
+    follower.start()
+    # Let the leader finish once the follower waits on its request
+    deadline = time.time() + 5
+    while not cache.coalesced and time.time() < deadline:
+        time.sleep(0.001)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert calls == [["NSE:A"]]
+    assert results == [{"NSE:A": {"last_price": 1}}] * 2
+    assert cache.stats()["coalesced"] == 1
+
+
+def test_errors_raised_after_caching_others():
+    calls = []
+    cache = QuoteCache()
+
+    with pytest.raises(ex.NetworkException):
+        cache.get("ltp", ["NSE:A", "NSE:B"], fetcher(calls, error_for=["NSE:B"]))
+
+    assert cache.get("ltp", ["NSE:A"], fetcher(calls)) == {"NSE:A": {"last_price": 1}}
+    assert len(calls) == 1
+
+
+@responses.activate
+def test_kiteconnect_ltp_cached(kiteconnect):
+    responses.add(
+        responses.GET,
+        "{0}{1}".format(kiteconnect.root, kiteconnect._routes["market.quote.ltp"]),
+        body=json.dumps({"status": "success", "data": {"NSE:INFY": {"last_price": 1500.0}}}),
+        content_type="application/json"
+    )
+    kiteconnect.quote_cache = QuoteCache()
+
+    assert kiteconnect.ltp("NSE:INFY") == {"NSE:INFY": {"last_price": 1500.0}}
+    assert kiteconnect.ltp(["NSE:INFY"]) == {"NSE:INFY": {"last_price": 1500.0}}
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_instrument_tokens_cached(kiteconnect):
+    responses.add(
+        responses.GET,
+        "{0}{1}".format(kiteconnect.root, kiteconnect._routes["market.quote.ltp"]),
+        body=json.dumps({"status": "success", "data": {"408065": {"last_price": 1500.0}}}),
+        content_type="application/json"
+    )
+    kiteconnect.quote_cache = QuoteCache()
+
+    assert kiteconnect.ltp(408065) == {"408065": {"last_price": 1500.0}}
+    assert kiteconnect.ltp("408065") == {"408065": {"last_price": 1500.0}}
+    assert len(responses.calls) == 1
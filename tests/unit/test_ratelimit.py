@@ -0,0 +1,57 @@
+# coding: utf-8
+"""Rate limiter tests"""
+import json
+
+import mock
+import pytest
+import responses
+from kiteconnect.ratelimit import TokenBucket, RateLimiter
+
+
+def test_bucket_spaces_requests_after_burst():
+    bucket = TokenBucket(10, burst=2)
+    delays = [bucket.reserve() for _ in range(4)]
+
+    assert delays[:2] == [0, 0]
+    assert delays[2] == pytest.approx(0.1, abs=0.01)
+    assert delays[3] == pytest.approx(0.2, abs=0.01)
+    assert bucket.stats()["waits"] == 2
+
+
+def test_routes_share_group_buckets():
+    limiter = RateLimiter()
+
+    assert limiter.reserve("market.quote") == 0
+    # ltp is in the same group as quote, historical data isn't
+    assert limiter.reserve("market.quote.ltp") > 0.9
+    assert limiter.reserve("market.historical") == 0
+    assert limiter.reserve("orders") == 0
+
+    stats = limiter.stats()
+    assert stats["market.quote*"]["requests"] == 2
+    assert stats["*"]["requests"] == 1
+
+
+def test_unmatched_routes_are_not_limited():
+    limiter = RateLimiter({"market.quote*": (1, 1)})
+
+    assert [limiter.reserve("orders") for _ in range(5)] == [0] * 5
+
+
+@responses.activate
+def test_requests_wait_on_limiter(kiteconnect):
+    responses.add(
+        responses.GET,
+        "{0}{1}".format(kiteconnect.root, kiteconnect._routes["market.quote.ltp"]),
+        body=json.dumps({"status": "success", "data": {}}),
+        content_type="application/json"
+    )
+    kiteconnect.rate_limiter = RateLimiter({"market.quote*": (1, 1)})
+
+    with mock.patch("kiteconnect.ratelimit.time.sleep") as sleep:
+        kiteconnect.ltp("NSE:INFY")
+        kiteconnect.ltp("NSE:INFY")
+
+    assert sleep.call_count == 1
+    assert sleep.call_args[0][0] > 0.9
+    assert len(responses.calls) == 2
@@ -0,0 +1,38 @@
+# coding: utf-8
+"""Reconnect policy tests"""
+import mock
+from twisted.internet.task import Clock
+from kiteconnect.reconnect import ReconnectPolicy
+from kiteconnect.ticker import KiteTickerClientFactory
+
+
+def test_policy_delays():
+    policy = ReconnectPolicy(max_delay=5, base_delay=0.5)
+    delays = [policy.next_delay() for i in range(50)]
+
+    assert delays[0] == 0
+    assert all(0.5 <= d <= 5 for d in delays[1:])
+    assert max(delays) == 5
+
+    policy.reset()
+    assert policy.next_delay() == 0
+
+    policy = ReconnectPolicy(immediate_first=False)
+    assert policy.next_delay() >= 0.5
+
+
+def test_factory_uses_policy():
+    factory = KiteTickerClientFactory("ws://127.0.0.1")
+    factory.clock = Clock()
+    factory.reconnect_policy = ReconnectPolicy(max_delay=5)
+    connector = mock.Mock()
+
+    factory.retry(connector)
+    factory.clock.advance(0)
+    assert connector.connect.call_count == 1
+
+    factory.retry(connector)
+    assert 0.5 <= factory.delay <= 1.5
+
+    factory.resetDelay()
+    assert factory.retries == 0 and factory.reconnect_policy.attempts == 0
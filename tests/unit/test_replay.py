@@ -0,0 +1,45 @@
+# coding: utf-8
+"""Tick recording and replay tests"""
+import utils
+from kiteconnect import KiteTicker
+from kiteconnect.replay import TickRecorder, TickReplayer
+
+
+def test_record_and_replay(tmp_path):
+    path = str(tmp_path / "session.ticks")
+    frames = [utils.tick_frame(utils.tick_packet(738561, 8, last_price=price)) for price in range(100, 105)]
+
+    kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>")
+    # Small chunks to grow the file while recording
+    kws.recorder = TickRecorder(path, chunk_size=32)
+    for frame in frames:
+        kws._on_message(None, frame, True)
+    kws._on_message(None, b"\x00", True)
+    kws.recorder.close()
+
+    replayed = []
+    kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>")
+    kws.on_ticks = lambda ws, ticks: replayed.extend(ticks)
+
+    assert TickReplayer(path).replay(kws) == 6
+    assert [t["last_price"] for t in replayed] == [1.0, 1.01, 1.02, 1.03, 1.04]
+
+
+def test_append_and_recorded_speed(tmp_path):
+    path = str(tmp_path / "session.ticks")
+    recorder = TickRecorder(path)
+    recorder.record(b"frame-1", timestamp=1000.0)
+    recorder.close()
+
+    recorder = TickRecorder(path, append=True)
+    recorder.record(b"frame-2", timestamp=1000.05)
+    recorder.close()
+
+    frames = list(TickReplayer(path))
+    assert frames == [(1000.0, b"frame-1"), (1000.05, b"frame-2")]
+
+    received = []
+    kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>")
+    kws.on_message = lambda ws, payload, is_binary: received.append(payload)
+    TickReplayer(path).replay(kws, speed=10)
+    assert received == [b"frame-1", b"frame-2"]
@@ -0,0 +1,139 @@
+# coding: utf-8
+"""Retry policy tests"""
+import json
+
+import mock
+import pytest
+import requests
+import responses
+import kiteconnect.exceptions as ex
+from kiteconnect.retry import RetryPolicy
+
+ORDER = {
+    "variety": "regular", "exchange": "NSE", "tradingsymbol": "INFY", "transaction_type": "BUY",
+    "quantity": 1, "product": "CNC", "order_type": "MARKET"
+}
+
+
+def add(kiteconnect, method, route, data=None, status=200, body=None):
+    responses.add(
+        method,
+        "{0}{1}".format(kiteconnect.root, kiteconnect._routes[route].format(variety="regular")),
+        body=body if body is not None else json.dumps(data),
+        status=status,
+        content_type="application/json"
+    )
+
+
+def error(message, error_type="GeneralException"):
+    return {"status": "error", "error_type": error_type, "message": message}
+
+
+@pytest.fixture()
+def sleep():
+    with mock.patch("kiteconnect.connect.time.sleep") as sleep:
+        yield sleep
+
+
+def test_decide():
+    policy = RetryPolicy(max_retries=2)
+
+    assert policy.decide("orders", "GET", 1) == RetryPolicy.RETRY
+    assert policy.decide("order.margins", "POST", 1) == RetryPolicy.RETRY
+    assert policy.decide("order.modify", "PUT", 1) is None
+    assert policy.decide("order.modify", "PUT", 1, status_code=429) == RetryPolicy.RETRY
+    assert policy.decide("order.place", "POST", 1, params={}) is None
+    assert policy.decide("order.place", "POST", 1, params={"tag": "x1"}) == RetryPolicy.REQUERY
+    assert policy.decide("orders", "GET", 3) is None
+
+    stats = policy.stats()
+    assert stats["retries"]["total"] == 4
+    assert stats["exhausted"] == {"orders": 1, "total": 1}
+
+
+def test_delay():
+    policy = RetryPolicy(backoff=0.5, max_backoff=3)
+
+    assert [policy.delay(attempt) for attempt in (1, 2, 3, 4)] == [0.5, 1, 2, 3]
+    assert policy.delay(1, retry_after="2") == 2
+    assert policy.delay(1, retry_after="Wed, 21 Oct 2015 07:28:00 GMT") == 0.5
+
+
+@responses.activate
+def test_get_retried_on_server_error(kiteconnect, sleep):
+    kiteconnect.retry_policy = RetryPolicy()
+    add(kiteconnect, responses.GET, "portfolio.positions", error("Bad gateway"), status=502)
+    add(kiteconnect, responses.GET, "portfolio.positions", body=requests.exceptions.ConnectionError("reset"))
+    add(kiteconnect, responses.GET, "portfolio.positions", {"status": "success", "data": {"net": []}})
+
+    assert kiteconnect.positions() == {"net": []}
+    assert len(responses.calls) == 3
+    assert [c[0][0] for c in sleep.call_args_list] == [0.5, 1]
+
+
+@responses.activate
+def test_retries_exhausted(kiteconnect, sleep):
+    kiteconnect.retry_policy = RetryPolicy(max_retries=1)
+    add(kiteconnect, responses.GET, "portfolio.positions", error("Unavailable"), status=503)
+
+    with pytest.raises(ex.GeneralException):
+        kiteconnect.positions()
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_order_placement_without_tag_not_retried(kiteconnect, sleep):
+    kiteconnect.retry_policy = RetryPolicy()
+    add(kiteconnect, responses.POST, "order.place", error("Internal error"), status=500)
+
+    with pytest.raises(ex.GeneralException):
+        kiteconnect.place_order(**ORDER)
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_order_placement_found_by_tag(kiteconnect, sleep):
+    kiteconnect.retry_policy = RetryPolicy()
+    add(kiteconnect, responses.POST, "order.place", body=requests.exceptions.ReadTimeout("timeout"))
+    add(kiteconnect, responses.GET, "orders", {"status": "success", "data": [
+        dict(ORDER, order_id="1", tag="other"),
+        dict(ORDER, order_id="2", tag="batch1")
+    ]})
+
+    assert kiteconnect.place_order(tag="batch1", **ORDER) == "2"
+    assert [c.request.method for c in responses.calls] == ["POST", "GET"]
+    assert kiteconnect.retry_policy.stats()["recovered"]["order.place"] == 1
+
+
+@responses.activate
+def test_order_placement_sent_again_when_not_found(kiteconnect, sleep):
+    kiteconnect.retry_policy = RetryPolicy(requery_attempts=2)
+    add(kiteconnect, responses.POST, "order.place", error("Internal error"), status=500)
+    add(kiteconnect, responses.GET, "orders", {"status": "success", "data": []})
+    add(kiteconnect, responses.POST, "order.place", {"status": "success", "data": {"order_id": "3"}})
+
+    assert kiteconnect.place_order(tag="batch1", **ORDER) == "3"
+    # Looked up again before sending the order again
+    assert [c.request.method for c in responses.calls] == ["POST", "GET", "GET", "POST"]
+
+
+@responses.activate
+def test_order_placement_found_on_later_lookup(kiteconnect, sleep):
+    kiteconnect.retry_policy = RetryPolicy()
+    add(kiteconnect, responses.POST, "order.place", body=requests.exceptions.ReadTimeout("timeout"))
+    add(kiteconnect, responses.GET, "orders", {"status": "success", "data": []})
+    add(kiteconnect, responses.GET, "orders", {"status": "success", "data": [dict(ORDER, order_id="4", tag="batch1")]})
+
+    assert kiteconnect.place_order(tag="batch1", **ORDER) == "4"
+    assert [c.request.method for c in responses.calls] == ["POST", "GET", "GET"]
+
+
+@responses.activate
+def test_order_lookup_failure_raises_placement_error(kiteconnect, sleep):
+    kiteconnect.retry_policy = RetryPolicy()
+    add(kiteconnect, responses.POST, "order.place", body=requests.exceptions.ReadTimeout("timeout"))
+    add(kiteconnect, responses.GET, "orders", error("Session expired", "TokenException"), status=403)
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        kiteconnect.place_order(tag="batch1", **ORDER)
+    assert [c.request.method for c in responses.calls] == ["POST", "GET"]
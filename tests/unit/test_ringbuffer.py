@@ -0,0 +1,58 @@
+# coding: utf-8
+"""Shared memory tick buffer tests"""
+import pytest
+
+import utils
+from kiteconnect import KiteTicker
+
+ringbuffer = pytest.importorskip("kiteconnect.ringbuffer")
+if ringbuffer.shared_memory is None:
+    pytest.skip("shared memory requires Python 3.8", allow_module_level=True)
+
+
+@pytest.fixture()
+def publisher():
+    publisher = ringbuffer.TickPublisher(capacity=4, max_instruments=4)
+    yield publisher
+    publisher.close()
+
+
+def test_publish_and_read(publisher):
+    kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>")
+    kws.tick_publisher = publisher
+    reader = ringbuffer.TickReader(publisher.name)
+
+    frame = utils.tick_frame(
+        utils.tick_packet(738561, 8),
+        utils.tick_packet(256265, 28),
+        utils.tick_packet(5633, 44),
+        utils.tick_packet(738561, 184, depth=[(i, 100000 + i, i) for i in range(10)])
+    )
+    kws._on_message(None, frame, True)
+
+    ticks = reader.read()
+    expected = kws._parse_binary(frame)
+    for tick in expected:
+        # Timestamps are kept to a second
+        for field in ("exchange_timestamp", "last_trade_time"):
+            if field in tick:
+                tick[field] = tick[field].replace(microsecond=0)
+
+    assert ticks == expected
+    assert reader.read() == []
+    assert reader.latest(738561) == expected[3]
+    assert reader.latest(5633)["volume_traded"] == 3
+    assert reader.latest(1) is None
+    reader.close()
+
+
+def test_lagging_reader_skips_overwritten_ticks(publisher):
+    reader = ringbuffer.TickReader(publisher.name)
+
+    publisher.publish([{"instrument_token": 1, "mode": "ltp", "tradable": True, "last_price": float(i)}
+                       for i in range(6)])
+
+    assert [t["last_price"] for t in reader.read()] == [2.0, 3.0, 4.0, 5.0]
+    assert reader.ticks_lost == 2
+    assert reader.latest(1)["last_price"] == 5.0
+    reader.close()
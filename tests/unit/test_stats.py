@@ -0,0 +1,29 @@
+# coding: utf-8
+"""Latency histogram tests"""
+import pytest
+from kiteconnect.stats import Histogram
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    assert histogram.to_dict()["p99"] == 0
+
+    for value in range(1, 1001):
+        histogram.record(value)
+    histogram.record(0)
+
+    stats = histogram.to_dict()
+    assert stats["count"] == 1001
+    assert stats["max"] == 1000
+    assert stats["p50"] == pytest.approx(500, rel=0.07)
+    assert stats["p99"] == pytest.approx(990, rel=0.07)
+    assert histogram.percentile(100) == 1000
+
+    histogram.reset()
+    assert histogram.count == 0 and histogram.percentile(50) == 0
+
+
+def test_histogram_small_values():
+    histogram = Histogram()
+    histogram.record(0.002)
+    assert histogram.percentile(50) == pytest.approx(0.002, rel=0.07)
@@ -0,0 +1,35 @@
+# coding: utf-8
+"""Subscription message batching tests"""
+from kiteconnect.subscription import SubscriptionBatcher
+
+
+def test_changes_are_merged_and_deduplicated():
+    batcher = SubscriptionBatcher()
+    wanted = {1: "quote", 2: "full", 3: "ltp"}
+    batcher.changed([1, 2, 3])
+    assert batcher.messages(wanted) == [("subscribe", [1, 2, 3]), ("mode", ["full", [2]]), ("mode", ["ltp", [3]])]
+
+    # Repeated and cancelled out changes send nothing
+    batcher.changed([1, 2])
+    wanted[4] = "quote"
+    del wanted[4]
+    batcher.changed([4])
+    assert batcher.messages(wanted) == []
+
+    del wanted[1]
+    wanted[2] = "ltp"
+    batcher.changed([1, 2])
+    assert batcher.messages(wanted) == [("unsubscribe", [1]), ("mode", ["ltp", [2]])]
+
+
+def test_large_lists_are_chunked_and_reset():
+    batcher = SubscriptionBatcher(chunk_size=2)
+    wanted = dict.fromkeys(range(5), "ltp")
+    batcher.changed(wanted)
+    messages = batcher.messages(wanted)
+    assert messages[:3] == [("subscribe", [0, 1]), ("subscribe", [2, 3]), ("subscribe", [4])]
+    assert [m[1][1] for m in messages[3:]] == [[0, 1], [2, 3], [4]]
+
+    assert not batcher.pending()
+    batcher.reset(wanted)
+    assert batcher.messages(wanted) == messages
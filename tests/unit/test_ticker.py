@@ -1,13 +1,19 @@
 # coding: utf-8
 """Ticker tests"""
 import six
+import pytest
 import json
-from mock import Mock
+import threading
+from mock import Mock, patch
 from base64 import b64encode
 from hashlib import sha1
 
 from autobahn.websocket.protocol import WebSocketProtocol
 
+import utils
+from kiteconnect import KiteTicker
+from kiteconnect.pipeline import TickPipeline
+
 
 class TestTicker:
 
@@ -46,3 +52,342 @@ class TestTicker:
         assert protocol.state == protocol.STATE_OPEN
 
         protocol.sendMessage(six.b(json.dumps({"message": "blah"})))
+
+    def test_parse_binary_ltp_and_quote(self, kiteticker):
+        ticks = kiteticker._parse_binary(utils.tick_frame(
+            utils.tick_packet(738561, 8),
+            utils.tick_packet(738561, 44)
+        ))
+
+        assert ticks[0] == {"tradable": True, "mode": "ltp", "instrument_token": 738561, "last_price": 1000.0}
+        assert ticks[1]["mode"] == "quote"
+        assert ticks[1]["last_traded_quantity"] == 1
+        assert ticks[1]["average_traded_price"] == 0.02
+        assert ticks[1]["ohlc"] == {"open": 0.06, "high": 0.07, "low": 0.08, "close": 0.09}
+
+    def test_parse_binary_full(self, kiteticker):
+        depth = [(i, 100000 + i, i) for i in range(10)]
+        # Segment 3 (cds) prices are divided by 10^7
+        tick = kiteticker._parse_binary(utils.tick_frame(utils.tick_packet(256 * 10 + 3, 184, depth=depth)))[0]
+
+        assert tick["mode"] == "full"
+        assert tick["last_price"] == 0.01
+        assert tick["oi"] == 11
+        assert len(tick["depth"]["buy"]) == 5
+        assert tick["depth"]["sell"][0] == {"quantity": 5, "price": 0.0100005, "orders": 5}
+
+    def test_parse_binary_indices(self, kiteticker):
+        ticks = kiteticker._parse_binary(utils.tick_frame(
+            utils.tick_packet(256265, 28),
+            utils.tick_packet(256265, 32)
+        ))
+
+        assert [t["mode"] for t in ticks] == ["quote", "full"]
+        assert ticks[0]["tradable"] is False
+        assert ticks[0]["ohlc"]["close"] == 0.04
+        assert "exchange_timestamp" in ticks[1]
+
+    def test_parse_binary_array_matches_dicts(self, kiteticker):
+        np = pytest.importorskip("numpy")
+        depth = [(i, 100000 + i, i) for i in range(10)]
+
+        # Single packet length frames are decoded as a strided view, mixed ones are grouped by length.
+        for frame in [
+            utils.tick_frame(utils.tick_packet(738561, 184, depth=depth), utils.tick_packet(256 * 10 + 3, 184)),
+            utils.tick_frame(
+                utils.tick_packet(738561, 8),
+                utils.tick_packet(256265, 28),
+                utils.tick_packet(738561, 184, depth=depth),
+                utils.tick_packet(256 * 10 + 6, 44)
+            ),
+            # Mixed lengths adding up to the size of a frame of five 28 byte packets
+            utils.tick_frame(
+                utils.tick_packet(256265, 28),
+                utils.tick_packet(738561, 32),
+                utils.tick_packet(5633, 8),
+                utils.tick_packet(256 * 10 + 6, 44),
+                utils.tick_packet(408065, 28)
+            )
+        ]:
+            ticks = kiteticker._parse_binary(frame)
+            array = kiteticker._parse_binary_array(frame)
+
+            assert len(array) == len(ticks)
+            for row, tick in zip(array, ticks):
+                assert row["instrument_token"] == tick["instrument_token"]
+                assert row["mode"].decode() == tick["mode"]
+                assert row["tradable"] == tick["tradable"]
+                assert row["last_price"] == pytest.approx(tick["last_price"])
+                if "ohlc" in tick:
+                    assert row["close"] == pytest.approx(tick["ohlc"]["close"])
+                    assert row["change"] == pytest.approx(tick["change"])
+                if "depth" in tick:
+                    assert np.allclose(row["depth_sell_price"], [d["price"] for d in tick["depth"]["sell"]])
+                    assert list(row["depth_buy_orders"]) == [d["orders"] for d in tick["depth"]["buy"]]
+
+    def test_parse_binary_array_truncated(self, kiteticker):
+        pytest.importorskip("numpy")
+        frame = utils.tick_frame(utils.tick_packet(738561, 8), utils.tick_packet(256265, 28), utils.tick_packet(5633, 44))
+
+        array = kiteticker._parse_binary_array(frame[:-10])
+
+        assert list(array["instrument_token"]) == [738561, 256265]
+
+    def test_on_ticks_array(self, kiteticker):
+        pytest.importorskip("numpy")
+        received = []
+        kiteticker.on_ticks_array = lambda ws, ticks: received.append(ticks)
+
+        kiteticker._on_message(None, utils.tick_frame(utils.tick_packet(738561, 8)), True)
+
+        assert len(received) == 1
+        assert received[0]["last_price"][0] == 1000.0
+
+    def test_split_packets(self, kiteticker):
+        frame = utils.tick_frame(utils.tick_packet(738561, 8), utils.tick_packet(738561, 44))
+
+        assert list(kiteticker._split_packets(frame)) == [(4, 8), (14, 44)]
+        assert list(kiteticker._split_packets(b"\x00")) == []
+        # Truncated trailing packet is dropped
+        assert list(kiteticker._split_packets(frame[:-1])) == [(4, 8)]
+
+    def test_parse_binary_tick_objects(self, kiteticker):
+        frame = utils.tick_frame(
+            utils.tick_packet(738561, 8),
+            utils.tick_packet(256265, 28),
+            utils.tick_packet(256265, 32),
+            utils.tick_packet(738561, 44),
+            utils.tick_packet(738561, 184, depth=[(i, 100000 + i, i) for i in range(10)])
+        )
+        ticks = kiteticker._parse_binary(frame)
+
+        kiteticker.tick_format = kiteticker.TICK_FORMAT_OBJECT
+        objects = kiteticker._parse_binary(frame)
+
+        assert [t.to_dict() for t in objects] == ticks
+        assert objects[4]["depth"]["sell"][0]["price"] == objects[4].depth.price[5] == 1000.05
+        assert objects[3].ohlc.close == objects[3]["ohlc"]["close"]
+        assert "depth" not in objects[3]
+        assert objects[0].get("ohlc") is None
+        with pytest.raises(KeyError):
+            objects[0]["ohlc"]
+
+    def test_invalid_tick_format(self):
+        with pytest.raises(ValueError):
+            KiteTicker("<API-KEY>", "<ACCESS-TOKEN>", tick_format="list")
+
+    def test_lazy_depth(self, kiteticker):
+        frame = utils.tick_frame(utils.tick_packet(738561, 184, depth=[(i, 100000 + i, i) for i in range(10)]))
+        tick = kiteticker._parse_binary(frame)[0]
+
+        kiteticker.lazy_depth = True
+        lazy = kiteticker._parse_binary(frame)[0]
+
+        # Raw bytes are kept until depth is read
+        assert lazy["depth"]._raw is not None
+        assert lazy["depth"]["buy"] == tick["depth"]["buy"]
+        assert lazy["depth"]._raw is None
+        assert lazy["depth"].to_dict() == tick["depth"]
+        assert lazy["oi"] == tick["oi"]
+
+    def test_snapshot(self):
+        kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>", snapshot=True)
+        kws._on_message(None, utils.tick_frame(utils.tick_packet(738561, 8), utils.tick_packet(5633, 8)), True)
+        kws._on_message(None, utils.tick_frame(utils.tick_packet(738561, 8, last_price=100100)), True)
+
+        assert kws.latest(738561)["last_price"] == 1001.0
+        assert kws.latest(1) is None
+        assert sorted(kws.snapshot()) == [5633, 738561]
+        assert list(kws.snapshot([5633, 1])) == [5633]
+
+    def test_snapshot_disabled(self, kiteticker):
+        with pytest.raises(ValueError):
+            kiteticker.latest(738561)
+
+    def test_conflated_on_ticks(self):
+        received = threading.Event()
+        kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>", conflate=True)
+        kws.on_ticks = lambda ws, ticks: received.set()
+
+        kws._on_message(None, utils.tick_frame(utils.tick_packet(738561, 8)), True)
+
+        assert received.wait(1)
+        assert kws.conflator.stats()["frames_received"] == 1
+        kws.conflator.stop()
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_decode_workers(self, executor):
+        received = []
+        done = threading.Event()
+        kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>", decode_workers=2, decode_executor=executor)
+
+        def on_ticks(ws, ticks):
+            received.extend(t["last_price"] for t in ticks)
+            if len(received) == 20:
+                done.set()
+
+        kws.on_ticks = on_ticks
+        for price in range(20):
+            kws._on_message(None, utils.tick_frame(utils.tick_packet(738561, 8, last_price=price * 100)), True)
+
+        assert done.wait(10)
+        # Dispatched in the order frames were received
+        assert received == [float(price) for price in range(20)]
+        assert kws.pipeline.stats()["frames_received"] == 20
+        kws.pipeline.stop()
+
+
+def test_pipeline_stop_with_full_queue():
+    dispatching = threading.Event()
+    release = threading.Event()
+
+    def dispatch(payload, ticks):
+        dispatching.set()
+        release.wait(10)
+
+    pipeline = TickPipeline(lambda payload: payload, dispatch, workers=1, queue_size=2)
+    pipeline.submit(b"1")
+    assert dispatching.wait(10)
+    assert pipeline.submit(b"2") and pipeline.submit(b"3")
+
+    # Returns while the dispatcher is stuck in a callback
+    stopper = threading.Thread(target=pipeline.stop)
+    stopper.start()
+    stopper.join(5)
+    stopped = not stopper.is_alive()
+    release.set()
+    stopper.join(5)
+
+    assert stopped
+    assert pipeline.frames_dropped == 1
+
+
+def test_gap_after_reconnect():
+    kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>", snapshot=True)
+    gaps = []
+    kws.on_gap = lambda ws, seconds, ticks: gaps.append((seconds, ticks))
+
+    kws._on_message(None, utils.tick_frame(utils.tick_packet(738561, 8, last_price=100)), True)
+    kws._on_close(None, 1006, "dropped")
+    kws._on_close(None, 1006, "dropped again")
+    # Heartbeats before the first ticks don't end the gap
+    kws._on_message(None, b"\x00", True)
+    assert gaps == []
+
+    kws._on_message(None, utils.tick_frame(utils.tick_packet(738561, 8, last_price=200)), True)
+    assert len(gaps) == 1
+    seconds, ticks = gaps[0]
+    assert seconds >= 0
+    assert ticks[738561]["last_price"] == 1.0
+    assert kws.latest(738561)["last_price"] == 2.0
+
+
+def test_latency_stats():
+    kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>", latency_stats=True)
+    kws.on_ticks = lambda ws, ticks: None
+    assert list(KiteTicker("<API-KEY>", "<ACCESS-TOKEN>").stats()) == ["liveness"]
+
+    frame = utils.tick_frame(utils.tick_packet(738561, 184), utils.tick_packet(5633, 184))
+    kws._on_message(None, frame, True)
+    kws._on_message(None, frame, True)
+
+    stats = kws.stats(reset=True)
+    assert stats["frame_size"]["count"] == 2
+    assert stats["frame_size"]["max"] == len(frame)
+    assert stats["decode_time"]["count"] == 2
+    assert stats["handler_time"]["count"] == 2
+    assert stats["exchange_latency"]["count"] == 4
+    assert kws.stats()["frame_size"]["count"] == 0
+
+
+@pytest.mark.parametrize("decode_workers", [0, 1])
+def test_exchange_latency_from_frame_receipt(decode_workers):
+    kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>", latency_stats=True, decode_workers=decode_workers)
+    done = threading.Event()
+    kws.on_ticks = lambda ws, ticks: done.set()
+    frame = utils.tick_frame(utils.tick_packet(738561, 184))
+    clock = [1000.0]
+    decode = kws._decode
+
+    def delayed_decode(payload, *args):
+        # Decoded a second after receiving the frame
+        clock[0] += 1
+        return decode(payload, *args)
+
+    kws._decode = delayed_decode
+    if kws.pipeline is not None:
+        kws.pipeline.decode = delayed_decode
+
+    with patch("kiteconnect.ticker.time.time", side_effect=lambda: clock[0]):
+        kws._on_message(None, frame, True)
+        assert done.wait(10)
+
+    exchange_timestamp = kws._exchange_time[1]
+    assert kws.stats()["exchange_latency"]["max"] == pytest.approx((1000.0 - exchange_timestamp) * 1000)
+    if kws.pipeline is not None:
+        kws.pipeline.stop()
+
+
+def test_listeners():
+    kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>")
+    first, second = [], []
+
+    def on_first(ws, ticks):
+        first.append([t["instrument_token"] for t in ticks])
+
+    def on_second(ws, ticks):
+        second.append([t["instrument_token"] for t in ticks])
+
+    kws.add_listener([1, 2], on_first)
+    kws.add_listener([2], on_second)
+    kws.add_listener([2], on_second)
+
+    frame = utils.tick_frame(utils.tick_packet(1, 8), utils.tick_packet(2, 8), utils.tick_packet(3, 8))
+    kws._on_message(None, frame, True)
+    assert first == [[1, 2]]
+    assert second == [[2]]
+
+    # Packets without listeners aren't decoded
+    assert [t["instrument_token"] for t in kws._decode(frame)] == [1, 2]
+
+    kws.remove_listener(on_first)
+    kws._on_message(None, frame, True)
+    assert first == [[1, 2]]
+    assert second == [[2], [2]]
+
+
+@pytest.mark.parametrize("tick_format", ["dict", "object"])
+def test_depth_delta(tick_format):
+    kws = KiteTicker("<API-KEY>", "<ACCESS-TOKEN>", tick_format=tick_format, depth_delta=True)
+    depth = [(10, 100000, 1)] * 10
+
+    first = kws._parse_binary(utils.tick_frame(utils.tick_packet(738561, 184, depth=depth)))[0]
+    assert len(first["depth_changes"]) == 10
+    assert "depth" not in first
+
+    # Same book
+    assert kws._parse_binary(utils.tick_frame(utils.tick_packet(738561, 184, depth=depth)))[0]["depth_changes"] == []
+
+    depth = list(depth)
+    depth[1] = (20, 100100, 2)
+    depth[7] = (5, 100500, 1)
+    changes = kws._parse_binary(utils.tick_frame(utils.tick_packet(738561, 184, depth=depth)))[0]["depth_changes"]
+    assert changes == [
+        {"side": "buy", "level": 1, "quantity": 20, "price": 1001.0, "orders": 2},
+        {"side": "sell", "level": 2, "quantity": 5, "price": 1005.0, "orders": 1}
+    ]
+    if tick_format == "object":
+        tick = kws._parse_binary(utils.tick_frame(utils.tick_packet(738561, 184)))[0].to_dict()
+        assert type(tick["depth_changes"][0]) is dict
+        assert tick["depth_changes"][0] == {"side": "buy", "level": 1, "quantity": 10, "price": 1000.0, "orders": 1}
+
+    # Books are sent in full again after unsubscribing and on a new connection
+    kws.unsubscribe([738561])
+    assert len(kws._parse_binary(utils.tick_frame(utils.tick_packet(738561, 184, depth=depth)))[0]["depth_changes"]) == 10
+    kws._on_open(None)
+    assert len(kws._parse_binary(utils.tick_frame(utils.tick_packet(738561, 184, depth=depth)))[0]["depth_changes"]) == 10
+
+    with pytest.raises(ValueError):
+        KiteTicker("<API-KEY>", "<ACCESS-TOKEN>", depth_delta=True, decode_workers=2)
+    with pytest.raises(ValueError):
+        KiteTicker("<API-KEY>", "<ACCESS-TOKEN>", depth_delta=True, conflate=True)